@@ -3,5 +3,12 @@
 from .wipp_ict import wipp_to_ict
 from .wipp_clt import wipp_to_clt
 from .ict_clt import ict_to_clt
+from .bulk import convert_manifests, find_manifests
 
-__all__ = ["wipp_to_ict", "wipp_to_clt", "ict_to_clt"]
\ No newline at end of file
+__all__ = [
+    "wipp_to_ict",
+    "wipp_to_clt",
+    "ict_to_clt",
+    "convert_manifests",
+    "find_manifests",
+]
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""Convert many WIPP manifests to CLT or ICT on a process pool.
+
+Each manifest is read once in the current process, to fingerprint it
+and find its output, and validated once in a worker, where it is
+converted. Conversions are incremental: a manifest is skipped when its
+output is newer than it, or when its content did not change since the
+conversion recorded in the summary of a previous run. Outputs are
+written to a temporary file first and only replace the existing file
+when their content changed.
+
+The number of workers can be set per call, or globally with the
+`POLUS_CONVERSION_WORKERS` environment variable.
+"""
+
+# pylint: disable=W1203
+import enum
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional, Union
+
+from ict import validate  # type: ignore
+
+from polus.tools.conversions.wipp_clt import wipp_to_clt
+from polus.tools.conversions.wipp_ict import wipp_to_ict
+from polus.tools.plugins._plugins.classes import _load_plugin
+from polus.tools.plugins._plugins.utils import name_cleaner
+
+logger = logging.getLogger("polus.tools.conversions")
+
+# below this number of manifests, starting a pool costs more than it saves
+MIN_PARALLEL_MANIFESTS = 16
+DEFAULT_CHUNKSIZE = 4
+IGNORE_LIST = ("cookiecutter", ".env", "Shared-Memory-OpenMP")
+SUMMARY_FORMAT = 1
+
+
+class Target(str, enum.Enum):
+    """Format manifests are converted to."""
+
+    CLT = "clt"
+    ICT = "ict"
+
+
+class ConversionStatus(str, enum.Enum):
+    """Outcome of the conversion of a manifest."""
+
+    CONVERTED = "converted"
+    UNCHANGED = "unchanged"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+class Conversion(NamedTuple):
+    """Result of the conversion of one manifest.
+
+    Attributes:
+        manifest: path of the manifest.
+        output: path of the converted manifest, `None` if unknown.
+        status: `converted` if the output was written, `unchanged` if
+            the conversion gave the existing output, `skipped` if the
+            manifest was not converted again, or `failed`.
+        source_hash: sha256 of the manifest, `None` if it is unreadable.
+        error: description of the error of a failed conversion.
+    """
+
+    manifest: str
+    output: Optional[str]
+    status: ConversionStatus
+    source_hash: Optional[str] = None
+    error: Optional[str] = None
+
+
+def find_manifests(
+    repo: pathlib.Path,
+    ignore: tuple[str, ...] = IGNORE_LIST,
+) -> list[pathlib.Path]:
+    """Return the WIPP manifests of a repository, sorted by path.
+
+    Manifests with any of the `ignore` strings in their path are left out.
+    """
+    return sorted(
+        path
+        for path in repo.rglob("*plugin.json")
+        if not any(ig in str(path) for ig in ignore)
+    )
+
+
+def _output_path(manifest: pathlib.Path, content: dict, target: Target) -> pathlib.Path:
+    if target == Target.ICT:
+        return manifest.with_name("ict.yaml")
+    return manifest.with_name(f"{name_cleaner(content['name'])}.cwl")
+
+
+def _convert_one(job: tuple) -> Conversion:
+    """Validate and convert a manifest, write the output if it changed."""
+    manifest, content, output, target, network_access, source_hash = job
+    output = pathlib.Path(output)
+    tmp_path = output.with_name(f".{output.stem}.{uuid.uuid4().hex}{output.suffix}")
+    try:
+        plugin = _load_plugin(content)
+        if target == Target.ICT:
+            wipp_to_ict(plugin, tmp_path)
+            validate(tmp_path)
+        else:
+            wipp_to_clt(plugin, tmp_path, network_access=network_access)
+        if output.exists() and output.read_bytes() == tmp_path.read_bytes():
+            tmp_path.unlink()
+            # a newer output spares reading the manifest on the next run
+            output.touch()
+            status = ConversionStatus.UNCHANGED
+        else:
+            tmp_path.replace(output)
+            status = ConversionStatus.CONVERTED
+    except Exception as exc:  # pylint: disable=W0718
+        tmp_path.unlink(missing_ok=True)
+        return Conversion(
+            manifest,
+            str(output),
+            ConversionStatus.FAILED,
+            source_hash,
+            str(exc),
+        )
+    return Conversion(manifest, str(output), status, source_hash)
+
+
+def _previous_hashes(summary: Optional[pathlib.Path]) -> dict[str, str]:
+    """Return the manifest hashes of the successful conversions of a summary."""
+    if summary is None:
+        return {}
+    try:
+        with summary.open("r", encoding="utf-8") as file:
+            previous = json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        logger.debug(f"Ignoring conversion summary {summary}: {exc}")
+        return {}
+    if previous.get("format") != SUMMARY_FORMAT:
+        return {}
+    return {
+        conv["manifest"]: conv["source_hash"]
+        for conv in previous["conversions"]
+        if conv["status"] != ConversionStatus.FAILED and conv["source_hash"]
+    }
+
+
+def _save_summary(
+    summary: pathlib.Path,
+    target: Target,
+    conversions: list[Conversion],
+    duration: float,
+) -> None:
+    content = {
+        "format": SUMMARY_FORMAT,
+        "target": target.value,
+        "duration": round(duration, 3),
+        "counts": conversion_counts(conversions),
+        "conversions": [
+            {**conv._asdict(), "status": conv.status.value} for conv in conversions
+        ],
+    }
+    tmp_path = summary.with_name(f"{summary.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(content, file, indent=2)
+    tmp_path.replace(summary)
+
+
+def convert_manifests(  # noqa: PLR0913, C901
+    manifests: list[Union[str, pathlib.Path]],
+    target: Union[str, Target] = Target.CLT,
+    max_workers: Optional[int] = None,
+    force: bool = False,
+    summary: Optional[Union[str, pathlib.Path]] = None,
+    network_access: bool = False,
+) -> list[Conversion]:
+    """Convert WIPP manifests, in parallel if worthwhile.
+
+    Outputs are saved next to their manifest, as `{class_name}.cwl` for
+    CLTs or `ict.yaml` for ICTs. Errors do not interrupt the conversion,
+    they are reported in the result of the corresponding manifest.
+
+    Args:
+        manifests: paths of the manifests to convert.
+        target: `clt` or `ict`.
+        max_workers: number of worker processes. Default to
+            `POLUS_CONVERSION_WORKERS` or the number of CPUs.
+            Manifests are converted in the current process if `1`.
+        force: if `True`, convert all manifests even if their output
+            is up to date.
+        summary: path of a json summary of the conversions. If it
+            exists, the manifest hashes it records are used to skip
+            unchanged manifests, then it is replaced.
+        network_access: if `True`, CLTs require network access.
+
+    Returns:
+        One `Conversion` per manifest, in the same order.
+    """
+    start = time.perf_counter()
+    target = Target(target)
+    summary = pathlib.Path(summary) if summary is not None else None
+    if max_workers is None:
+        env_workers = os.environ.get("POLUS_CONVERSION_WORKERS")
+        max_workers = int(env_workers) if env_workers else os.cpu_count() or 1
+    previous = {} if force else _previous_hashes(summary)
+
+    results: list[Optional[Conversion]] = []
+    jobs: list[tuple[int, tuple]] = []
+    for manifest in map(pathlib.Path, manifests):
+        name = str(manifest)
+        try:
+            data = manifest.read_bytes()
+            source_hash = hashlib.sha256(data).hexdigest()
+            content = json.loads(data)
+            output = _output_path(manifest, content, target)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            results.append(
+                Conversion(name, None, ConversionStatus.FAILED, error=str(exc)),
+            )
+            continue
+        if not force and output.exists():
+            newer = output.stat().st_mtime_ns >= manifest.stat().st_mtime_ns
+            if newer or previous.get(name) == source_hash:
+                results.append(
+                    Conversion(
+                        name,
+                        str(output),
+                        ConversionStatus.SKIPPED,
+                        source_hash,
+                    ),
+                )
+                continue
+        jobs.append(
+            (
+                len(results),
+                (name, content, str(output), target, network_access, source_hash),
+            ),
+        )
+        results.append(None)
+
+    logger.info(
+        f"Converting {len(jobs)} of {len(results)} manifests to {target.value}",
+    )
+    converted: Optional[list[Conversion]] = None
+    if max_workers > 1 and len(jobs) >= MIN_PARALLEL_MANIFESTS:
+        max_workers = min(max_workers, -(-len(jobs) // DEFAULT_CHUNKSIZE))
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                converted = list(
+                    executor.map(
+                        _convert_one,
+                        [job for _, job in jobs],
+                        chunksize=DEFAULT_CHUNKSIZE,
+                    ),
+                )
+        except (OSError, BrokenProcessPool) as exc:
+            logger.warning(f"Conversion pool failed ({exc}), converting serially.")
+    if converted is None:
+        converted = [_convert_one(job) for _, job in jobs]
+    for (index, _), conv in zip(jobs, converted):
+        results[index] = conv
+
+    conversions: list[Conversion] = results  # type: ignore[assignment]
+    if summary is not None:
+        _save_summary(summary, target, conversions, time.perf_counter() - start)
+    return conversions
+
+
+def conversion_counts(conversions: list[Conversion]) -> dict[str, int]:
+    """Return the number of conversions of each status."""
+    counts = {status.value: 0 for status in ConversionStatus}
+    for conv in conversions:
+        counts[conv.status.value] += 1
+    return counts
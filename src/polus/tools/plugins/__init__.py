@@ -9,9 +9,15 @@ from polus.tools.plugins._plugins.classes import Plugin  # pylint: disable=unuse
 from polus.tools.plugins._plugins.classes import (
     _refresh,  # pylint: disable=unused-import
 )
+from polus.tools.plugins._plugins.classes import (
+    check_plugin_paths,  # pylint: disable=unused-import
+)
 from polus.tools.plugins._plugins.classes import (
     get_plugin,  # pylint: disable=unused-import
 )
+from polus.tools.plugins._plugins.classes import (
+    invalidate_registry,  # pylint: disable=unused-import
+)
 from polus.tools.plugins._plugins.classes import (
     list_plugins,  # pylint: disable=unused-import
 )
@@ -25,8 +31,19 @@ from polus.tools.plugins._plugins.classes import (
     validate_local_manifests,  # pylint: disable=unused-import
 )
 from polus.tools.plugins._plugins.classes import (  # pylint: disable=unused-import
+    CWLExecutor,
+    PluginProcess,
+    PluginRunner,
+    RunCache,
+    RunResult,
+    RunStatus,
+    get_run_cache,
     remove_plugin,
     submit_plugin,
+    submit_plugins,
+)
+from polus.tools.plugins._plugins.io import (
+    defer_path_checks,  # pylint: disable=unused-import
 )
 from polus.tools.plugins._plugins.update import (  # pylint: disable=unused-import
     update_nist_plugins,
@@ -44,10 +61,13 @@ logger = logging.getLogger("polus.tools.plugins")
 #     VERSION = version_file.read().strip()
 
 
-_refresh(supress_warnings=True)  # calls the refresh method when library is imported
+# the plugin registry is built on first access (see `list_plugins`, `get_plugin`)
 
 
 def __getattr__(name: str) -> Union[Plugin, list]:
+    if name.startswith("__"):  # do not scan the registry for dunder lookups
+        msg = f"module '{__name__}' has no attribute '{name}'"
+        raise AttributeError(msg)
     if name == "list":
         return list_plugins()
     if name in list_plugins():
@@ -58,6 +78,7 @@ def __getattr__(name: str) -> Union[Plugin, list]:
 
 __all__ = [
     "submit_plugin",
+    "submit_plugins",
     "get_plugin",
     "load_config",
     "list_plugins",
@@ -66,4 +87,14 @@ __all__ = [
     "update_nist_plugins",
     "remove_all",
     "remove_plugin",
+    "invalidate_registry",
+    "check_plugin_paths",
+    "defer_path_checks",
+    "CWLExecutor",
+    "PluginProcess",
+    "PluginRunner",
+    "RunResult",
+    "RunStatus",
+    "RunCache",
+    "get_run_cache",
 ]
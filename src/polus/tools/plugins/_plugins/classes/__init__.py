@@ -2,32 +2,68 @@
 
 # pylint: disable=E0611
 
+from polus.tools.plugins._plugins.classes.cwl_executor import (
+    CWLExecutor,
+    get_cwl_executor,
+)
+from polus.tools.plugins._plugins.classes.plugin_base import check_plugin_paths
 from polus.tools.plugins._plugins.classes.plugin_classes import (  # type: ignore
+    _SCRAPER_CACHE_PATH,
     PLUGINS,
     Plugin,
     _load_plugin,
+    _local_versions,
     _private_submit_plugin_for_update,
     _refresh,
+    _save_manifest,
     get_plugin,
+    invalidate_registry,
     list_plugins,
     load_config,
     remove_all,
     remove_plugin,
     submit_plugin,
+    submit_plugins,
     validate_local_manifests,
 )
+from polus.tools.plugins._plugins.classes.plugin_process import PluginProcess
+from polus.tools.plugins._plugins.classes.plugin_runner import (
+    PluginRunner,
+    RunResult,
+    RunStatus,
+)
+from polus.tools.plugins._plugins.classes.run_cache import (
+    RunCache,
+    get_run_cache,
+    set_run_cache,
+)
 
 __all__ = [
     "Plugin",
     "submit_plugin",
+    "submit_plugins",
     "get_plugin",
     "_refresh",
     "validate_local_manifests",
     "list_plugins",
     "remove_plugin",
     "remove_all",
+    "invalidate_registry",
+    "check_plugin_paths",
+    "CWLExecutor",
+    "get_cwl_executor",
+    "PluginProcess",
+    "PluginRunner",
+    "RunResult",
+    "RunStatus",
+    "RunCache",
+    "get_run_cache",
+    "set_run_cache",
     "load_config",
     "_load_plugin",
+    "_local_versions",
     "_private_submit_plugin_for_update",
     "PLUGINS",
+    "_SCRAPER_CACHE_PATH",
+    "_save_manifest",
 ]
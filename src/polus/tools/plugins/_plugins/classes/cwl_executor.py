@@ -0,0 +1,186 @@
+"""Run plugins as CWL CommandLineTools in this process."""
+
+# pylint: disable=W1203, W0212
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Union
+
+import yaml  # type: ignore
+from cwltool.context import RuntimeContext
+from cwltool.executors import JobExecutor, SingleJobExecutor
+from cwltool.factory import Callable, Factory, WorkflowStatus
+from cwltool.utils import CWLObjectType
+
+if TYPE_CHECKING:
+    from polus.tools.plugins._plugins.classes.plugin_base import BasePlugin
+
+logger = logging.getLogger("polus.plugins")
+
+# Maximum number of loaded tools kept by an executor
+CWL_TOOL_CACHE_SIZE = 128
+
+
+class CWLExecutor:
+    """Run plugins with cwltool, loading the CLT of each plugin version once.
+
+    Loading a CLT with cwltool parses and validates it, which takes
+    seconds the first time and tens of milliseconds afterwards. The
+    executor keeps a single cwltool `Factory` and the tools it loaded,
+    so that a plugin can be run many times with different I/O values
+    at the cost of the runs only. Nothing is written to disk except the
+    outputs, unless a directory is given to save the CLT and I/O files.
+
+    Loaded tools are shared by all runs, but cwltool job executors keep
+    the state of the run (outputs, status and output directories), so
+    each run uses its own `SingleJobExecutor` and runs from several
+    threads are independent.
+
+    Example:
+    ```python
+    >>> executor = CWLExecutor()
+    >>> outputs = executor.run_batch(
+    ...     plugin,
+    ...     [{"filePattern": p, "outDir": out} for p, out in zip(patterns, outs)],
+    ... )
+    ```
+
+    Args:
+        outdir: directory of the outputs, default to the parent of the
+            `outDir` output of each plugin.
+        max_tools: maximum number of loaded tools kept.
+        executor: cwltool job executor, default to a new
+            `SingleJobExecutor` for each run. A given executor is shared
+            by all runs, which then run one at a time.
+        runtime_options: other options of the cwltool `RuntimeContext`.
+    """
+
+    def __init__(
+        self,
+        outdir: Optional[Union[str, Path]] = None,
+        max_tools: int = CWL_TOOL_CACHE_SIZE,
+        executor: Optional[JobExecutor] = None,
+        **runtime_options: Any,  # noqa: ANN401
+    ) -> None:
+        """Create the cwltool factory, no tool is loaded."""
+        if outdir is not None:
+            runtime_options["outdir"] = str(Path(outdir).absolute())
+        self.factory = Factory(runtime_context=RuntimeContext(runtime_options))
+        self.max_tools = max_tools
+        self.loads = 0
+        self._executor = executor
+        self._tools: OrderedDict[tuple, Callable] = OrderedDict()
+        self._lock = threading.Lock()
+        # serializes the runs of a shared job executor
+        self._run_lock = threading.Lock()
+
+    def tool(self, plugin: "BasePlugin", network_access: bool = False) -> Callable:
+        """Return the loaded CLT of a plugin, loading it on first use."""
+        key = plugin._clt_key(network_access)
+        with self._lock:
+            tool = self._tools.get(key)
+            if tool is not None:
+                self._tools.move_to_end(key)
+                return tool
+        clt = plugin._to_cwl(network_access)
+        # ids of loaded documents must be unique in the loading context
+        clt["id"] = f"_:{hashlib.sha256(repr(key).encode()).hexdigest()}"
+        logger.debug(f"Loading CLT of {plugin.name} {plugin.version!s}")
+        tool = self.factory.make(clt)
+        with self._lock:
+            self.loads += 1
+            tool = self._tools.setdefault(key, tool)
+            while len(self._tools) > self.max_tools:
+                self._tools.popitem(last=False)
+        return tool
+
+    def run(  # noqa: PLR0913
+        self,
+        plugin: "BasePlugin",
+        io: Optional[dict] = None,
+        network_access: bool = False,
+        save_dir: Optional[Union[str, Path]] = None,
+        outdir: Optional[Union[str, Path]] = None,
+    ) -> Optional[CWLObjectType]:
+        """Run a plugin and return its CWL outputs.
+
+        Args:
+            plugin: the plugin to run.
+            io: values of I/O that replace the values set in the plugin,
+                which is not modified.
+            network_access: if `True`, the container has network access.
+            save_dir: if given, the CLT and the I/O of the run are saved
+                in this directory as `{class_name}.cwl` and `.yml`.
+            outdir: directory of the outputs, default to the directory
+                of the executor or to the parent of `outDir`.
+
+        Raises:
+            WorkflowStatus: if the run did not succeed.
+        """
+        tool = self.tool(plugin, network_access)
+        job = plugin._cwl_job(io)
+        if save_dir is not None:
+            save_dir = Path(save_dir)
+            save_dir.mkdir(parents=True, exist_ok=True)
+            path = save_dir.joinpath(plugin.class_name)
+            plugin.save_cwl(path.with_suffix(".cwl"), network_access)
+            with path.with_suffix(".yml").open("w", encoding="utf-8") as file:
+                yaml.dump(job, file)
+        return self._execute(tool, job, outdir)
+
+    def run_batch(
+        self,
+        plugin: "BasePlugin",
+        ios: Iterable[dict],
+        network_access: bool = False,
+        outdir: Optional[Union[str, Path]] = None,
+    ) -> list[Optional[CWLObjectType]]:
+        """Run a plugin once per dict of I/O values, see `run()`.
+
+        All the I/O values are validated before the first run.
+        """
+        tool = self.tool(plugin, network_access)
+        jobs = [plugin._cwl_job(io) for io in ios]
+        return [self._execute(tool, job, outdir) for job in jobs]
+
+    def _execute(
+        self,
+        tool: Callable,
+        job: dict,
+        outdir: Optional[Union[str, Path]],
+    ) -> Optional[CWLObjectType]:
+        runtime_context = self.factory.runtime_context.copy()
+        runtime_context.basedir = os.getcwd()
+        if outdir is None and runtime_context.outdir is None and "outDir" in job:
+            outdir = Path(job["outDir"]["location"]).parent
+        if outdir is not None:
+            runtime_context.outdir = str(Path(outdir).absolute())
+        if self._executor is None:
+            out, status = SingleJobExecutor()(tool.t, job, runtime_context)
+        else:
+            with self._run_lock:
+                out, status = self._executor(tool.t, job, runtime_context)
+        if status != "success":
+            raise WorkflowStatus(out, status)
+        return out
+
+    def clear(self) -> None:
+        """Forget the loaded tools."""
+        with self._lock:
+            self._tools.clear()
+
+
+_CWL_EXECUTOR: Optional[CWLExecutor] = None
+_CWL_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_cwl_executor() -> CWLExecutor:
+    """Return the executor used by `Plugin.run_cwl()`."""
+    global _CWL_EXECUTOR  # pylint: disable=W0603
+    with _CWL_EXECUTOR_LOCK:
+        if _CWL_EXECUTOR is None:
+            _CWL_EXECUTOR = CWLExecutor()
+        return _CWL_EXECUTOR
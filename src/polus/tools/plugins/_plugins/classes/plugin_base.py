@@ -4,19 +4,36 @@
 import enum
 import json
 import logging
-import random
+import pickle
+import re
+import shutil
 import signal
+import sys
+import tempfile
+import threading
+import uuid
+from copy import deepcopy
 from pathlib import Path
 from typing import Any, Optional, TypeVar, Union
 
 import yaml  # type: ignore
-from cwltool.context import RuntimeContext
-from cwltool.factory import Factory
 from cwltool.utils import CWLObjectType
 from python_on_whales import docker
 
+from polus.tools.plugins._plugins.classes.cwl_executor import (
+    CWLExecutor,
+    get_cwl_executor,
+)
+from polus.tools.plugins._plugins.classes.plugin_process import (
+    PluginProcess,
+    docker_run_command,
+)
+from polus.tools.plugins._plugins.classes.run_cache import RunCache, get_run_cache
 from polus.tools.plugins._plugins.cwl import CWL_BASE_DICT
 from polus.tools.plugins._plugins.io import (
+    WIPP_TYPES,
+    check_io_paths,
+    defer_path_checks,
     input_to_cwl,
     io_to_yml,
     output_to_cwl,
@@ -36,6 +53,85 @@ class MissingInputValuesError(Exception):
     """Raised when there are required input values that have not been set."""
 
 
+def check_plugin_paths(
+    plugins: list["BasePlugin"],
+    max_workers: Optional[int] = None,
+) -> None:
+    """Check directories of many plugins at once, concurrently.
+
+    Only directories whose check was deferred are checked, see
+    `defer_path_checks`.
+
+    Example:
+    ```python
+    >>> with defer_path_checks():
+    ...     for plugin, image_dir in zip(plugins, image_dirs):
+    ...         plugin.inpDir = image_dir
+    >>> check_plugin_paths(plugins)
+    ```
+
+    Raises:
+        InvalidPathError: if a directory does not exist.
+    """
+    check_io_paths(
+        (io for plugin in plugins for io in plugin._io_keys.values()),
+        max_workers,
+    )
+
+
+# how an I/O value is passed to the container, see `_compile_cli`
+CLI_VALUE, CLI_PATH, CLI_ENUM = range(3)
+
+
+def _compile_cli(
+    inputs: list[tuple[str, Any]],
+    outputs: list[tuple[str, Any]],
+) -> tuple:
+    """Precompute how each I/O is passed to the plugin container.
+
+    Directories are mounted in `/data/inputs/input{n}` and
+    `/data/outputs/output{n}`, `n` being the index of the I/O among
+    the directory inputs (or outputs) of the plugin.
+
+    Args:
+        inputs: name and type of each input.
+        outputs: name and type of each output.
+
+    Returns:
+        A tuple `(name, flag, kind, target, mount)` per I/O, where
+        `mount` is a %-format template of the mount with the directory.
+    """
+    spec = []
+    for ios, target_dir, readonly in (
+        (inputs, "/data/inputs/input", ",readonly"),
+        (outputs, "/data/outputs/output", ""),
+    ):
+        n_dirs = 0
+        for name, type_ in ios:
+            if WIPP_TYPES.get(type_) is Path:
+                target = f"{target_dir}{n_dirs}"
+                mount = f"type=bind,source=%s,target={target}{readonly}"
+                spec.append((name, f"--{name}", CLI_PATH, target, mount))
+                n_dirs += 1
+            elif type_ == "enum":
+                spec.append((name, f"--{name}", CLI_ENUM, None, None))
+            else:
+                spec.append((name, f"--{name}", CLI_VALUE, None, None))
+    return tuple(spec)
+
+
+def container_name(plugin: "BasePlugin") -> str:
+    """Return a unique name for a container of the plugin."""
+    name = re.sub(r"[^a-z0-9]+", "-", plugin.class_name.lower()).strip("-")
+    return f"polus-{name}-{uuid.uuid4().hex[:12]}"
+
+
+# CLTs of plugin versions, pickled, and their YAML, see `BasePlugin._cached_cwl`
+_CLT_CACHE: dict[tuple, tuple[bytes, str]] = {}
+_CLT_CACHE_LOCK = threading.Lock()
+CLT_CACHE_SIZE = 1024
+
+
 class BasePlugin:
     """Base Class for Plugins."""
 
@@ -48,6 +144,33 @@ class BasePlugin:
                 msg,  # type: ignore
             )
 
+    def check_paths(self) -> None:
+        """Check directories whose check was deferred, concurrently.
+
+        See `defer_path_checks`.
+
+        Raises:
+            InvalidPathError: if a directory does not exist.
+        """
+        check_io_paths(self._io_keys.values())
+
+    def set_io(self, **values: Any) -> None:
+        """Set several I/O values, checking their directories concurrently.
+
+        Example:
+        ```python
+        >>> plugin.set_io(inpDir="/data/images", outDir="/data/out")
+        ```
+
+        Raises:
+            IOKeyError: if a name is not an I/O parameter.
+            InvalidPathError: if a directory does not exist.
+        """
+        with defer_path_checks():
+            for name, value in values.items():
+                setattr(self, name, value)
+        self.check_paths()
+
     @property
     def organization(self) -> str:
         """Plugin container's organization."""
@@ -67,9 +190,33 @@ class BasePlugin:
                 setattr(self, k, v)
         logger.debug(f"Loaded config from {path}")
 
+    def _docker_args(self) -> tuple[list[str], list[list[str]]]:
+        """Return the arguments and the mounts of the plugin container.
+
+        Input and output directories are mounted in `/data/inputs`
+        and `/data/outputs`, and passed to the plugin as such.
+        """
+        spec = self._cli_spec  # see `_compile_cli`
+        io_keys = self._io_keys
+        args: list[str] = []
+        mnts: list[list[str]] = []
+        for name, flag, kind, target, mount in spec:
+            value = io_keys[name].value
+            if value is None:  # do not include those with value=None
+                continue
+            if kind == CLI_PATH:
+                args += (flag, target)
+                mnts.append([mount % value])  # must be a list of lists
+            elif kind == CLI_ENUM:
+                args += (flag, value._name_)
+            else:
+                args += (flag, str(value))
+        return args, mnts
+
     def run(
         self,
         gpus: Union[None, str, int] = "all",
+        cache: Union[None, bool, RunCache] = None,
         **kwargs: Union[None, str, int],
     ) -> None:
         """Run plugin in Docker container using `python-on-whales`.
@@ -81,101 +228,103 @@ class BasePlugin:
 
         Args:
             gpus: `--gpus` value to pass to Docker. Default is `all`.
+            cache: if `True` or a `RunCache`, the outputs of a previous
+                run with the same container, inputs and input directory
+                contents are restored instead of running the container
+                (see `get_run_cache()`). Default is no cache.
         """
         self._check_inputs()
-        inp_dirs = [x for x in self.inputs if isinstance(x.value, Path)]
-        out_dirs = [x for x in self.outputs if isinstance(x.value, Path)]
-
-        inp_dirs_dict = {x: f"/data/inputs/input{n}" for (n, x) in enumerate(inp_dirs)}
-        out_dirs_dict = {
-            x: f"/data/outputs/output{n}" for (n, x) in enumerate(out_dirs)
-        }
-
-        mnts_in = [
-            # must be a list of lists
-            [f"type=bind,source={k},target={v},readonly"]
-            for (k, v) in inp_dirs_dict.items()
-        ]
-        mnts_out = [
-            [f"type=bind,source={k},target={v}"]  # must be a list of lists
-            for (k, v) in out_dirs_dict.items()
-        ]
-
-        mnts = mnts_in + mnts_out
-        args = []
-
-        for i in self.inputs:
-            if i.value is not None:  # do not include those with value=None
-                i._validate()
-                args.append(f"--{i.name}")
-
-                if isinstance(i.value, Path):
-                    args.append(inp_dirs_dict[str(i.value)])
-
-                elif isinstance(i.value, enum.Enum):
-                    args.append(str(i.value._name_))
-
-                else:
-                    args.append(str(i.value))
-
-        for o in self.outputs:
-            if o.value is not None:  # do not include those with value=None
-                o._validate()
-                args.append(f"--{o.name}")
-
-                if isinstance(o.value, Path):
-                    args.append(out_dirs_dict[str(o.value)])
-
-                elif isinstance(o.value, enum.Enum):
-                    args.append(str(o.value._name_))
+        self.check_paths()
+        if cache is True:
+            cache = get_run_cache()
+        if cache:
+            key = cache.key(self)
+            if cache.restore(key, self):
+                return
+            before = cache.snapshot(self)
+        self._run_container(gpus, **kwargs)
+        if cache:
+            cache.store(key, self, before)
 
-                else:
-                    args.append(str(o.value))
+    def _run_container(
+        self,
+        gpus: Union[None, str, int],
+        **kwargs: Union[None, str, int],
+    ) -> None:
+        args, mnts = self._docker_args()
 
-        random_int = random.randint(10, 99)  # noqa: S311 # only for naming
-        container_name = f"polus{random_int}"
+        name = container_name(self)
 
         def sig(
             signal,  # noqa # pylint: disable=W0613, W0621
             frame,  # noqa # pylint: disable=W0613, W0621
         ) -> None:
             """Signal handler to kill container when `KeyboardInterrupt`."""
-            logger.info(f"Exiting container {container_name}")
-            docker.kill(container_name)
-
-        signal.signal(
-            signal.SIGINT,
-            sig,
-        )  # make of sig the handler for KeyboardInterrupt
-        if gpus is None:
-            logger.info(
-                f"""Running container without GPU. {self.__class__.__name__}
-                version {self.version!s}""",
-            )
-            docker_ = docker.run(
-                self.containerId,
-                args,
-                name=container_name,
-                remove=True,
-                mounts=mnts,
-                **kwargs,  # type: ignore
-            )
-            print(docker_)  # noqa
-        else:
-            logger.info(
-                f"""Running container with GPU: --gpus {gpus}.
-                {self.__class__.__name__} version {self.version!s}""",
-            )
+            logger.info(f"Exiting container {name}")
+            docker.kill(name)
+
+        # signal handlers can only be set in the main thread
+        main_thread = threading.current_thread() is threading.main_thread()
+        if main_thread:  # make of sig the handler for KeyboardInterrupt
+            previous_handler = signal.signal(signal.SIGINT, sig)
+        try:
+            if gpus is None:
+                logger.info(
+                    f"""Running container without GPU. {self.__class__.__name__}
+                    version {self.version!s}""",
+                )
+            else:
+                logger.info(
+                    f"""Running container with GPU: --gpus {gpus}.
+                    {self.__class__.__name__} version {self.version!s}""",
+                )
+                kwargs["gpus"] = gpus
             docker_ = docker.run(
                 self.containerId,
                 args,
-                gpus=gpus,
-                name=container_name,
+                name=name,
                 remove=True,
                 mounts=mnts,
                 **kwargs,  # type: ignore
             )
             print(docker_)  # noqa
+        finally:
+            if main_thread:
+                signal.signal(signal.SIGINT, previous_handler)
+
+    async def arun(
+        self,
+        gpus: Union[None, str, int] = "all",
+        timeout: Optional[float] = None,
+        **kwargs: Union[None, bool, str, int, float, list],
+    ) -> PluginProcess:
+        """Start the plugin in a Docker container, without blocking the event loop.
+
+        The container is run by the `docker` CLI in a subprocess. Its
+        output is streamed by `PluginProcess.stream()`, and the container
+        is killed if the timeout expires or the task is cancelled while
+        `PluginProcess.stream()` or `PluginProcess.wait()` is awaited.
+        Keyword arguments are passed to `docker run` as in `run()`.
+
+        Example:
+        ```python
+        >>> process = await plugin.arun(gpus=None, timeout=600, memory="2g")
+        >>> async for source, line in process.stream():
+        ...     logger.info(line.decode())
+        >>> returncode = await process.wait()
+        ```
+
+        Args:
+            gpus: `--gpus` value to pass to Docker. Default is `all`.
+            timeout: seconds the container can run, see `PluginProcess`.
+        """
+        self._check_inputs()
+        self.check_paths()
+        args, mnts = self._docker_args()
+        name = container_name(self)
+        logger.info(f"Running {self.name} {self.version!s} in {name}")
+        cmd = docker_run_command(self.containerId, args, name, mnts, gpus, **kwargs)
+        return await PluginProcess.start(cmd, container_name=name, timeout=timeout)
 
     @property
     def manifest(self) -> dict:
@@ -186,28 +335,33 @@ class BasePlugin:
         manifest_["version"] = manifest_["version"]["_root"]
         return manifest_
 
-    def __getattribute__(self, name: str) -> Any:  # noqa
-        if name == "__class__":  # pydantic v2 change
-            return super().__getattribute__(name)
-        if name != "_io_keys" and hasattr(self, "_io_keys") and name in self._io_keys:
-            value = self._io_keys[name].value
+    def __getattr__(self, name: str) -> Any:  # noqa
+        """Return I/O values as attributes.
+
+        `__getattr__` is only called when the normal attribute lookup
+        fails, so other attributes are not slowed down by I/O lookup.
+        """
+        io_keys = self.__dict__.get("_io_keys")
+        if io_keys is not None and name in io_keys:
+            value = io_keys[name].value
             if isinstance(value, enum.Enum):
                 value = value.name
             return value
-
-        return super().__getattribute__(name)
+        msg = f"'{self.__class__.__name__}' object has no attribute '{name}'"
+        raise AttributeError(msg)
 
     def __setattr__(self, name: str, value: Any) -> None:  # noqa
         if name == "class_name":
             super().__setattr__(name, value)
             return
 
-        if name != "_io_keys" and hasattr(self, "_io_keys"):
-            if name in self._io_keys:
+        io_keys = self.__dict__.get("_io_keys")
+        if io_keys is not None and name != "_io_keys":
+            if name in io_keys:
                 logger.debug(
                     f"Value of {name} in {self.__class__.__name__} set to {value}",
                 )
-                self._io_keys[name].value = value
+                io_keys[name].value = value
                 return
             msg = (
                 f"attempting to set {name} in "
@@ -220,19 +374,20 @@ class BasePlugin:
 
         super().__setattr__(name, value)
 
-    def _to_cwl(self, network_access: bool) -> dict:
-        """Convert Plugin to CWL CommandLineTool.
-
-
-        Args:
-            network_access:
-                Default is `False`. If set to `True`, the
-                requirements of the CLT will include
-                `networkAccess`: `True`.
+    def _clt_key(self, network_access: bool) -> tuple:
+        """Return what the CLT of the plugin depends on."""
+        return (
+            self.name,
+            str(self.version),
+            self.containerId,
+            tuple((i.name, i.type.value, i.required) for i in self.inputs),
+            tuple(o.name for o in self.outputs),
+            network_access,
+        )
 
-        Returns: `dict` representation of the CLT.
-        """
-        cwl_dict = CWL_BASE_DICT
+    def _build_cwl(self, network_access: bool) -> dict:
+        """Build the CLT of the plugin, see `_to_cwl`."""
+        cwl_dict = deepcopy(CWL_BASE_DICT)
         cwl_dict["inputs"] = {}
         cwl_dict["outputs"] = {}
         inputs = [input_to_cwl(x) for x in self.inputs]
@@ -247,6 +402,39 @@ class BasePlugin:
             cwl_dict["requirements"]["NetworkAccess"] = {"networkAccess": True}
         return cwl_dict
 
+    def _cached_cwl(self, network_access: bool) -> tuple[bytes, str]:
+        """Return the CLT of the plugin, pickled, and its YAML.
+
+        They are built once per plugin version and shared by all plugins.
+        Unpickling is the fastest way to get an independent copy of the CLT.
+        """
+        key = self._clt_key(network_access)
+        cached = _CLT_CACHE.get(key)
+        if cached is None:
+            clt = self._build_cwl(network_access)
+            cached = (pickle.dumps(clt, pickle.HIGHEST_PROTOCOL), yaml.dump(clt))
+            with _CLT_CACHE_LOCK:
+                cached = _CLT_CACHE.setdefault(key, cached)
+                while len(_CLT_CACHE) > CLT_CACHE_SIZE:
+                    del _CLT_CACHE[next(iter(_CLT_CACHE))]
+        return cached
+
+    def _to_cwl(self, network_access: bool) -> dict:
+        """Convert Plugin to CWL CommandLineTool.
+
+        The CLT is generated once per plugin version (see `_cached_cwl`),
+        each call returns a new copy of it.
+
+        Args:
+            network_access:
+                Default is `False`. If set to `True`, the
+                requirements of the CLT will include
+                `networkAccess`: `True`.
+
+        Returns: `dict` representation of the CLT.
+        """
+        return pickle.loads(self._cached_cwl(network_access)[0])  # noqa: S301
+
     @property
     def clt(self) -> dict:
         """Convenience property of Plugin as CommandLineTool with no network access."""
@@ -258,7 +446,7 @@ class BasePlugin:
             msg = "path must end in .cwl"
             raise ValueError(msg)
         with Path(path).open("w", encoding="utf-8") as file:
-            yaml.dump(self._to_cwl(network_access), file)
+            file.write(self._cached_cwl(network_access)[1])
         return Path(path)
 
     def save_clt(self, path: StrPath, network_access: bool = False) -> Path:
@@ -285,47 +473,119 @@ class BasePlugin:
             yaml.dump(self._cwl_io, file)
         return Path(path)
 
+    def _cwl_job(self, io: Optional[dict] = None) -> dict:
+        """Return the CWL I/O of the plugin, with the values of `io` if given.
+
+        The values of `io` are validated on copies of the I/O of the
+        plugin, which is not modified.
+
+        Raises:
+            IOKeyError: if a name of `io` is not an I/O parameter.
+            MissingInputValuesError: if a required input is not set.
+        """
+        if not io:
+            self._check_inputs()
+            self.check_paths()
+            return self._cwl_io
+        unknown = set(io) - set(self._io_keys)
+        if unknown:
+            msg = f"{sorted(unknown)} are not valid I/O parameters of {self.name}"
+            raise IOKeyError(msg)
+        job = {}
+        missing = []
+        for name, io_ in self._io_keys.items():
+            if name in io:
+                io_ = io_.model_copy()
+                io_.value = io[name]
+            io_._check_path()
+            if io_.value is not None:
+                job[name] = io_to_yml(io_)
+            elif getattr(io_, "required", False):
+                missing.append(name)
+        if missing:
+            msg = f"{missing} are required inputs but have not been set"
+            raise MissingInputValuesError(msg)
+        return job
+
     def run_cwl(
         self,
         cwl_path: Optional[StrPath] = None,
         io_path: Optional[StrPath] = None,
+        executor: Optional[CWLExecutor] = None,
     ) -> Union[CWLObjectType, str, None]:
         """Run configured plugin in CWL.
 
         Run plugin as a CWL command line tool after setting I/O values.
-        Two files will be generated: a CWL (`.cwl`) command line tool
-        and an I/O file (`.yml`). They will be generated in
-        current working directory if no paths are specified. Optional paths
-        for these files can be specified with arguments `cwl_path`,
-        and `io_path` respectively.
+        The CLT is run in this process by a `CWLExecutor`, which loads
+        the CLT of each plugin version once. A CWL (`.cwl`) command line
+        tool and an I/O file (`.yml`) are only saved if their paths are
+        specified with arguments `cwl_path` and `io_path` respectively.
 
         Args:
             cwl_path: [Optional] target path for `.cwl` file
             io_path: [Optional] target path for `.yml` file
+            executor: [Optional] executor running the CLT, default to
+                the executor shared by all plugins (`get_cwl_executor()`).
 
         """
         if not self.outDir:
-            msg = ""
+            msg = "outDir must be set to run the plugin in CWL"
             raise ValueError(msg)
+        self.check_paths()
 
-        if not cwl_path:
-            _p = Path.cwd().joinpath(self.class_name + ".cwl")
-            _cwl = self.save_cwl(_p)
-        else:
-            _cwl = self.save_cwl(cwl_path)
-
-        if not io_path:
-            _p = Path.cwd().joinpath(self.class_name + ".yml")
-            self.save_cwl_io(_p)  # saves io to make it visible to user
-        else:
+        if cwl_path:
+            self.save_cwl(cwl_path)
+        if io_path:
             self.save_cwl_io(io_path)  # saves io to make it visible to user
 
-        outdir_path = self.outDir.parent.relative_to(Path.cwd())
-        r_c = RuntimeContext({"outdir": str(outdir_path)})
-        fac = Factory(runtime_context=r_c)
-        cwl = fac.make(str(_cwl))
-        # object's io dict is used instead of .yml file
-        return cwl(**self._cwl_io)
+        executor = executor or get_cwl_executor()
+        return executor.run(self, outdir=self.outDir.parent)
+
+    async def arun_cwl(
+        self,
+        cwl_path: Optional[StrPath] = None,
+        io_path: Optional[StrPath] = None,
+        timeout: Optional[float] = None,
+    ) -> PluginProcess:
+        """Start the plugin with cwltool, without blocking the event loop.
+
+        The `.cwl` and `.yml` files are saved to `cwl_path` and `io_path`,
+        or to a temporary directory of the run, removed when the process
+        has exited, so that concurrent runs do not overwrite each other's
+        files. Then cwltool is run in a subprocess. The outputs of the
+        tool are printed as JSON on its stdout, see `PluginProcess.stream()`.
+
+        Args:
+            cwl_path: [Optional] target path for `.cwl` file
+            io_path: [Optional] target path for `.yml` file
+            timeout: seconds the process can run, see `PluginProcess`.
+        """
+        if not self.outDir:
+            msg = "outDir must be set to run the plugin in CWL"
+            raise ValueError(msg)
+        self.check_paths()
+        tmp_dir = None
+        if not (cwl_path and io_path):
+            tmp_dir = Path(tempfile.mkdtemp(prefix=f"{container_name(self)}-"))
+            cwl_path = cwl_path or tmp_dir.joinpath(self.class_name + ".cwl")
+            io_path = io_path or tmp_dir.joinpath(self.class_name + ".yml")
+        try:
+            _cwl = self.save_cwl(cwl_path)
+            _io = self.save_cwl_io(io_path)
+            cmd = [
+                sys.executable,
+                "-m",
+                "cwltool",
+                "--outdir",
+                str(self.outDir.parent),
+                str(_cwl),
+                str(_io),
+            ]
+            return await PluginProcess.start(cmd, timeout=timeout, tmp_dir=tmp_dir)
+        except BaseException:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
 
     def __lt__(self, other: "BasePlugin") -> bool:
         return self.version < other.version
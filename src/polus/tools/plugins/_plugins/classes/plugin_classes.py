@@ -1,26 +1,40 @@
 """Classes for Plugin objects containing methods to configure, run, and save."""
 
 # pylint: disable=W1203, W0212, E1101, E1133, enable=W1201
+import hashlib
+import itertools
 import json
 import logging
+import os
 import shutil
+import threading
 import uuid
-from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Iterable, Iterator, Optional, Union
 
-from pydantic import ConfigDict
+from pydantic import ConfigDict, PrivateAttr
 
-from polus.tools.plugins._plugins.classes.plugin_base import BasePlugin
+from polus.tools.plugins._plugins.classes.plugin_base import (
+    BasePlugin,
+    IOKeyError,
+    _compile_cli,
+)
 from polus.tools.plugins._plugins.io._io import (  # type: ignore
     DuplicateVersionFoundError,
+    Input,
+    Output,
     Version,
     _semver_to_pypi,
+    cast_version,
 )
+from polus.tools.plugins._plugins.io._spec import SortedVersions, VersionSpec
 from polus.tools.plugins._plugins.manifests import (
     InvalidManifestError,
+    ManifestIndex,
     _load_manifest,
     validate_manifest,
+    validate_manifests,
 )
 from polus.tools.plugins._plugins.models import WIPPPluginManifest
 from polus.tools.plugins._plugins.utils import name_cleaner
@@ -36,47 +50,165 @@ Paths and Fields
 """
 # Location to store any discovered plugin manifests
 _PLUGIN_DIR = Path(__file__).parent.parent.joinpath("manifests")
+# Caches of the local database, outside of the (possibly read-only) package,
+# one directory per plugin directory
+_CACHE_DIR = Path(
+    os.environ.get("POLUS_REGISTRY_CACHE")
+    or Path.home().joinpath(".cache", "polus-plugins", "registry"),
+).joinpath(hashlib.sha256(str(_PLUGIN_DIR.absolute()).encode()).hexdigest()[:16])
+# Name and version of the local manifests, see `ManifestIndex`
+_INDEX_PATH = _CACHE_DIR.joinpath("index.json")
+# Manifests already downloaded by `update_polus_plugins`
+_SCRAPER_CACHE_PATH = _CACHE_DIR.joinpath("scraper.json")
+# PLUGINS is built on first access, see `_plugins()`
+_PLUGINS_LOADED = False
+_PLUGINS_LOCK = threading.RLock()
+# Versions of each plugin in PLUGINS, sorted by precedence
+_SORTED_VERSIONS: dict[str, SortedVersions] = {}
+# Maximum number of parsed manifests kept in memory, see `_plugin_template()`
+PLUGIN_CACHE_SIZE = 256
+
+
+def _register(key: str, version: Version, file: Path) -> None:
+    """Add a manifest file to PLUGINS."""
+    if key not in PLUGINS:
+        PLUGINS[key] = {}
+        _SORTED_VERSIONS[key] = SortedVersions()
+    if version in PLUGINS[key] and file != PLUGINS[key][version]:
+        msg = f"found duplicate version of plugin{key} in {_PLUGIN_DIR}"
+        raise DuplicateVersionFoundError(
+            msg,
+        )
+    PLUGINS[key][version] = file
+    _SORTED_VERSIONS[key].add(version)
+
+
+def _index_manifests(
+    files: list[Path],
+    index: ManifestIndex,
+    supress_warnings: bool,
+) -> dict[Path, dict]:
+    """Validate manifest files and record the results in the index.
+
+    Only validation failures are recorded, other errors (for example a
+    file that could not be read) are not, so that the file is validated
+    again on the next refresh.
 
+    Returns:
+        The index entry of each file.
+    """
+    entries = {}
+    results = validate_manifests(files, keep_models=False)  # type: ignore
+    for file, result in zip(files, results):
+        stat = file.stat()
+        if result.valid:
+            entries[file] = index.add(
+                file,
+                stat,
+                name_cleaner(result.name),  # type: ignore
+                result.version,  # type: ignore
+            )
+            continue
+        if result.invalid:
+            msg = f"Validation error in {file!s}: {result.error}"
+            entries[file] = index.add_invalid(file, stat, msg)
+        else:
+            msg = f"Unexpected error {result.error} with {file!s}"
+            entries[file] = {"error": msg}
+        if not supress_warnings:
+            logger.warning(msg)
+    return entries
 
-def _refresh(supress_warnings: bool = False) -> None:
-    """Refresh the plugin list."""
-    organizations = [
-        x for x in _PLUGIN_DIR.iterdir() if x.name != "__pycache__" and x.is_dir()
-    ]  # ignore __pycache__
 
-    PLUGINS.clear()
+def _refresh(supress_warnings: bool = False, use_index: bool = True) -> None:
+    """Refresh the plugin list.
 
-    for org in organizations:
-        for file in org.iterdir():
-            if file.suffix == ".py":
-                continue
+    Manifests are registered from the persistent manifest index when
+    they did not change since they were last validated. New or modified
+    manifests are validated and the index is updated accordingly.
 
-            try:
-                plugin = validate_manifest(file)
-            except InvalidManifestError as im_err:
-                if not supress_warnings:
-                    logger.warning(f"Validation error in {file!s}: {im_err.__cause__}")
-            except BaseException as exc:  # pylint: disable=W0718
-                if not supress_warnings:
-                    logger.warning(f"Unexpected error {exc} with {file!s}")
+    Args:
+        supress_warnings: do not log validation errors.
+        use_index: if `False`, ignore the index and validate all manifests.
+    """
+    global _PLUGINS_LOADED  # pylint: disable=W0603
+    with _PLUGINS_LOCK:
+        PLUGINS.clear()
+        _SORTED_VERSIONS.clear()
+        _scan(supress_warnings, use_index)
+        _PLUGINS_LOADED = True
 
-            else:
-                key = name_cleaner(plugin.name)
-                # Add version and path to VERSIONS
-                if key not in PLUGINS:
-                    PLUGINS[key] = {}
-                if (
-                    plugin.version in PLUGINS[key]
-                    and file != PLUGINS[key][plugin.version]
-                ):
-                    msg = (
-                        "found duplicate version of plugin"
-                        f"{plugin.name} in {_PLUGIN_DIR}"
-                    )
-                    raise DuplicateVersionFoundError(
-                        msg,
-                    )
-                PLUGINS[key][plugin.version] = file
+
+def _scan(supress_warnings: bool, use_index: bool) -> None:
+    """Fill PLUGINS from the manifests found in the plugin directory."""
+    organizations = [
+        x for x in _PLUGIN_DIR.iterdir() if x.name != "__pycache__" and x.is_dir()
+    ]  # ignore __pycache__
+
+    index = ManifestIndex(_PLUGIN_DIR, _INDEX_PATH)
+    if use_index:
+        index.load()
+    files = [
+        file
+        for org in organizations
+        for file in org.iterdir()
+        if file.suffix != ".py"
+    ]
+
+    entries = {}
+    for file in files:
+        entry = index.get(file, file.stat()) if use_index else None
+        if entry is None:
+            continue
+        if "error" in entry and not supress_warnings:
+            logger.warning(entry["error"])
+        entries[file] = entry
+    # validate new or modified manifests, in parallel if there are many.
+    stale = [file for file in files if file not in entries]
+    entries.update(_index_manifests(stale, index, supress_warnings))
+
+    for file in files:
+        entry = entries[file]
+        if "error" not in entry:
+            _register(entry["name"], cast_version(entry["version"]), file)
+
+    index.prune(set(files))
+    index.save()
+
+
+def _plugins() -> dict[str, dict]:
+    """Return PLUGINS, building it on first access."""
+    if not _PLUGINS_LOADED:
+        with _PLUGINS_LOCK:
+            if not _PLUGINS_LOADED:
+                _refresh(supress_warnings=True)
+    return PLUGINS
+
+
+def _local_versions() -> set[tuple[str, str]]:
+    """Return the `(class_name, version)` of every local plugin."""
+    with _PLUGINS_LOCK:
+        return {
+            (name, str(version))
+            for name, versions in _plugins().items()
+            for version in versions
+        }
+
+
+def invalidate_registry() -> None:
+    """Discard the local plugin registry.
+
+    The registry is built again from the plugin directory the next time
+    it is accessed, for example by `list_plugins()` or `get_plugin()`.
+    Use this function when manifests were added or removed from the
+    plugin directory by another process.
+    """
+    global _PLUGINS_LOADED  # pylint: disable=W0603
+    with _PLUGINS_LOCK:
+        PLUGINS.clear()
+        _SORTED_VERSIONS.clear()
+        _PLUGINS_LOADED = False
+    _plugin_template.cache_clear()
 
 
 def validate_local_manifests() -> None:
@@ -106,12 +238,12 @@ def validate_local_manifests() -> None:
             For further information visit https://errors.pydantic.dev/2.7/v/missing
     ```
     """
-    _refresh(supress_warnings=False)
+    _refresh(supress_warnings=False, use_index=False)
 
 
 def list_plugins() -> list:
     """List all local plugins."""
-    output = list(PLUGINS.keys())
+    output = list(_plugins().keys())
     output.sort()
     return output
 
@@ -132,6 +264,8 @@ class Plugin(WIPPPluginManifest, BasePlugin):
 
     id: uuid.UUID  # noqa: A003
     model_config = ConfigDict(extra="allow", frozen=True)
+    # container arguments, compiled once per I/O signature (see `_compile_cli`)
+    _cli_spec: tuple = PrivateAttr(())
 
     def __init__(self, _uuid: bool = True, **data: dict) -> None:
         """Init a plugin object from manifest."""
@@ -140,15 +274,31 @@ class Plugin(WIPPPluginManifest, BasePlugin):
         else:
             data["id"] = uuid.UUID(str(data["id"]))  # type: ignore
 
-        data["version"] = Version(data["version"])
+        data["version"] = cast_version(data["version"])
 
         super().__init__(**data)  # type: ignore
 
         self.class_name = name_cleaner(self.name)
+        self._cli_spec = _plugin_cli_spec(
+            tuple((i.name, i.type.value) for i in self.inputs),
+            tuple((o.name, o.type.value) for o in self.outputs),
+        )
 
         self._io_keys = {i.name: i for i in self.inputs}
         self._io_keys.update({o.name: o for o in self.outputs})
 
+        shadowed = [
+            name
+            for name in self._io_keys
+            if name in self.__dict__ or hasattr(self.__class__, name)
+        ]
+        if shadowed:
+            logger.warning(
+                f"I/O {shadowed} of {self.name} have the name of plugin "
+                "attributes, their values can only be read from "
+                "`inputs` and `outputs`.",
+            )
+
         if not self.author:
             warn_msg = (
                 f"The plugin ({self.name}) is missing the author field. "
@@ -159,7 +309,7 @@ class Plugin(WIPPPluginManifest, BasePlugin):
     @property
     def versions(self) -> list:  # cannot be in PluginMethods because PLUGINS lives here
         """Return list of local versions of a Plugin."""
-        return list(PLUGINS[self.class_name])
+        return list(_plugins()[self.class_name])
 
     @property
     def pypi_version(self) -> str:
@@ -196,6 +346,17 @@ version-specifiers/#semantic-versioning)
         logger.debug(f"Saved manifest to {Path(path).absolute()}")
         return Path(path).absolute()
 
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Get I/O parameters as attributes.
+
+        Defined here so that it is found before `BaseModel.__getattr__`,
+        which is used for any other missing attribute.
+        """
+        io_keys = self.__dict__.get("_io_keys")
+        if io_keys is not None and name in io_keys:
+            return BasePlugin.__getattr__(self, name)
+        return super().__getattr__(name)  # type: ignore[misc]
+
     def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
         """Set I/O parameters as attributes."""
         BasePlugin.__setattr__(self, name, value)
@@ -204,13 +365,10 @@ version-specifiers/#semantic-versioning)
     def _config(self) -> dict:
         model_ = json.loads(self.model_dump_json())
         model_["version"] = model_["version"]["_root"]
-        model_["_io_keys"] = deepcopy(self._io_keys)  # type: ignore
-        # iterate over I/O to convert to dict
-        for io_name, io in model_["_io_keys"].items():
-            model_["_io_keys"][io_name] = json.loads(io.model_dump_json())
-            # overwrite val if enum
-            if io.type.value == "enum":
-                model_["_io_keys"][io_name]["value"] = io.value.name  # str
+        model_["_io_keys"] = {
+            io_name: _io_config(io)
+            for io_name, io in self._io_keys.items()  # type: ignore
+        }
         for inp in model_["inputs"]:
             inp["value"] = None
         for inp in model_["outputs"]:
@@ -235,14 +393,258 @@ version-specifiers/#semantic-versioning)
         """Print plugin name and version."""
         return BasePlugin.__repr__(self)
 
+    def sweep(
+        self,
+        params: Union[dict[str, list], list[dict[str, Any]]],
+        path: Optional[Union[str, Path]] = None,
+    ) -> Iterator[Union[dict, Path]]:
+        """Generate the configs of a parameter sweep.
+
+        `params` is either a grid, mapping I/O names to the values to
+        sweep (all combinations are generated), or a list of dicts of
+        I/O values, one per config. I/O that are not swept keep their
+        value in the plugin.
+
+        Each distinct value of an I/O is validated once, when `sweep`
+        is called, then configs are generated lazily. Each config has its
+        own `id`, but configs share the rest of the manifest part of the
+        plugin config, which must not be modified.
+
+        Example:
+        ```python
+        >>> grid = {"darkfield": [True, False], "filePattern": ["a{x}", "b{x}"]}
+        >>> for config in plugin.sweep(grid):
+        ...     plugin_ = load_config(config)
+        >>> paths = list(plugin.sweep(grid, path="configs"))
+        ```
+
+        Args:
+            params: grid or list of I/O values.
+            path: directory in which to save the configs, as
+                `{class_name}_{n}.json`. If given, the paths of the saved
+                configs are generated instead of the configs.
+
+        Raises:
+            IOKeyError: if a name is not an I/O parameter.
+        """
+        io_configs: dict[tuple[str, Any], dict] = {}
+
+        def _validated(name: str, value: Any) -> dict:  # noqa: ANN401
+            try:
+                return io_configs[(name, value)]
+            except KeyError:
+                pass
+            except TypeError:  # unhashable value
+                return self._io_value_config(name, value)
+            io_configs[(name, value)] = self._io_value_config(name, value)
+            return io_configs[(name, value)]
+
+        rows: Iterable[dict[str, dict]]
+        if isinstance(params, dict):
+            names = list(params)
+            axes = [[_validated(name, v) for v in params[name]] for name in names]
+            rows = (dict(zip(names, row)) for row in itertools.product(*axes))
+        else:
+            rows = [
+                {name: _validated(name, value) for name, value in values.items()}
+                for values in params
+            ]
+        if path is not None:
+            path = Path(path).absolute()
+            path.mkdir(parents=True, exist_ok=True)
+        return _sweep_configs(self._config, rows, path, self.class_name)
+
+    def _io_value_config(self, name: str, value: Any) -> dict:  # noqa: ANN401
+        """Validate a value of an I/O and return its config entry."""
+        io_keys = self._io_keys  # type: ignore
+        if name not in io_keys:
+            msg = f"{name} is not a valid I/O parameter of {self.name}"
+            raise IOKeyError(msg)
+        io = io_keys[name].model_copy()
+        io.value = value
+        return _io_config(io)
+
+
+def _io_config(io: Union[Input, Output]) -> dict:
+    """Return the config entry of an I/O, with enum values as strings."""
+    config = json.loads(io.model_dump_json())
+    if io.type.value == "enum" and io.value is not None:
+        config["value"] = io.value.name  # str
+    return config
+
+
+def _sweep_configs(
+    base: dict,
+    rows: Iterable[dict[str, dict]],
+    path: Optional[Path],
+    class_name: str,
+) -> Iterator[Union[dict, Path]]:
+    """Generate configs from a base config and the I/O entries of each config.
+
+    Each config gets a new `id`. Saved configs are serialized from the
+    JSON of the rest of the base config, which is encoded once.
+    """
+    io_keys = base["_io_keys"]
+    if path is None:
+        for row in rows:
+            config = dict(base)
+            config["id"] = str(uuid.uuid4())
+            config["_io_keys"] = {**io_keys, **row}
+            yield config
+        return
+    head = json.dumps(
+        {k: v for k, v in base.items() if k not in ("id", "_io_keys")},
+        default=str,
+    )[:-1]
+    for n, row in enumerate(rows):
+        file = path.joinpath(f"{class_name}_{n}.json")
+        io_json = json.dumps({**io_keys, **row}, default=str)
+        file.write_text(
+            f'{head}, "id": "{uuid.uuid4()}", "_io_keys": {io_json}}}',
+            encoding="utf-8",
+        )
+        yield file
+
+
+@lru_cache(maxsize=PLUGIN_CACHE_SIZE)
+def _plugin_cli_spec(
+    inputs: tuple[tuple[str, str], ...],
+    outputs: tuple[tuple[str, str], ...],
+) -> tuple:
+    """Return the container arguments of a plugin, compiled once.
+
+    Plugins with the same name and type of each I/O share the same
+    compiled arguments, see `_compile_cli`.
+    """
+    return _compile_cli(inputs, outputs)
+
+
+@lru_cache(maxsize=PLUGIN_CACHE_SIZE)
+def _plugin_template(path: Path, mtime_ns: int, size: int) -> Plugin:  # noqa: ARG001
+    """Parse a manifest file once for all the plugins created from it.
+
+    `mtime_ns` and `size` are only part of the cache key, so that a
+    modified manifest is parsed again.
+    The returned plugin is never handed out, see `_copy_plugin`.
+    """
+    return Plugin(**_load_manifest(path))  # type: ignore[arg-type]
+
+
+def _copy_plugin(template: Plugin) -> Plugin:
+    """Return a new plugin from a template, without validation.
+
+    The new plugin has its own `id` and its own I/O objects, so that
+    values set on it do not affect the template or other copies.
+    The rest of the manifest is shared with the template.
+    """
+    inputs = [inp.model_copy() for inp in template.inputs]
+    outputs = [out.model_copy() for out in template.outputs]
+    plugin = template.model_copy(
+        update={"id": uuid.uuid4(), "inputs": inputs, "outputs": outputs},
+    )
+    plugin._io_keys = {i.name: i for i in inputs}  # type: ignore
+    plugin._io_keys.update({o.name: o for o in outputs})  # type: ignore
+    return plugin
+
 
 def _load_plugin(
     manifest: Union[str, dict, Path],
 ) -> Plugin:
-    """Parse a manifest and return Plugin."""
+    """Parse a manifest and return Plugin.
+
+    Manifest files are parsed and validated once, and cached
+    (see `_plugin_template`). A new `Plugin` is returned on every call.
+    """
+    if isinstance(manifest, Path):
+        stat = manifest.stat()
+        template = _plugin_template(
+            manifest.absolute(),
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+        return _copy_plugin(template)
     manifest = _load_manifest(manifest)
-    plugin = Plugin(**manifest)  # type: ignore[arg-type]
-    return plugin
+    return Plugin(**manifest)  # type: ignore[arg-type]
+
+
+def _manifest_path(plugin: WIPPPluginManifest) -> Path:
+    """Return the path of a manifest in the local database.
+
+    The file name includes the plugin name and version number.
+    """
+    plugin_name = name_cleaner(plugin.name)
+
+    # Get Major/Minor/Patch versions
+    out_name = (
+        plugin_name
+        + f"_M{plugin.version.major}m{plugin.version.minor}p{plugin.version.patch}.json"
+    )
+    organization = plugin.containerId.split("/")[0]
+    return _PLUGIN_DIR.joinpath(organization.lower(), out_name)
+
+
+def _save_manifest(plugin: WIPPPluginManifest) -> Path:
+    """Save a validated manifest in the local database.
+
+    The manifest is saved with a name that includes the plugin name and
+    version number. An existing file is not overwritten.
+
+    Returns:
+        Path to the manifest in the local database.
+    """
+    path = _manifest_path(plugin)
+
+    # Save the manifest if it doesn't already exist in the database
+    path.parent.mkdir(exist_ok=True, parents=True)
+    if not path.exists():
+        with path.open("w", encoding="utf-8") as file:
+            manifest_ = json.loads(plugin.model_dump_json())
+            manifest_["version"] = str(plugin.version)
+            json.dump(manifest_, file, indent=4)
+    return path
+
+
+def _add_to_registry(plugins: list[WIPPPluginManifest]) -> list[Path]:
+    """Save validated manifests and add them to the index and PLUGINS.
+
+    Manifests written here are indexed from their model, they are not
+    validated again. Manifests already in the database are kept as they
+    are, and only validated if their index entry is not up to date.
+    The rest of the registry is left untouched.
+
+    Returns:
+        Path of each manifest in the local database.
+    """
+    with _PLUGINS_LOCK:
+        index = ManifestIndex(_PLUGIN_DIR, _INDEX_PATH).load()
+        paths = []
+        entries: dict[Path, Optional[dict]] = {}
+        for plugin in plugins:
+            path = _manifest_path(plugin)
+            paths.append(path)
+            if path in entries:  # submitted twice
+                continue
+            if path.exists():
+                entries[path] = index.get(path, path.stat())
+            else:
+                _save_manifest(plugin)
+                entries[path] = index.add(
+                    path,
+                    path.stat(),
+                    name_cleaner(plugin.name),
+                    str(plugin.version),
+                )
+        stale = [path for path, entry in entries.items() if entry is None]
+        entries.update(_index_manifests(stale, index, supress_warnings=False))
+        for path, entry in entries.items():
+            if "error" not in entry and _PLUGINS_LOADED:  # type: ignore
+                _register(
+                    entry["name"],  # type: ignore
+                    cast_version(entry["version"]),  # type: ignore
+                    path,
+                )
+        index.save()
+    return paths
 
 
 def submit_plugin(
@@ -263,28 +665,37 @@ def submit_plugin(
     Returns:
         A `Plugin` object from the local copy.
     """
-    plugin = validate_manifest(manifest)
-    plugin_name = name_cleaner(plugin.name)
+    (path,) = _add_to_registry([validate_manifest(manifest)])
+    return _load_plugin(path)
 
-    # Get Major/Minor/Patch versions
-    out_name = (
-        plugin_name
-        + f"_M{plugin.version.major}m{plugin.version.minor}p{plugin.version.patch}.json"
-    )
 
-    # Save the manifest if it doesn't already exist in the database
-    organization = plugin.containerId.split("/")[0]
-    org_path = _PLUGIN_DIR.joinpath(organization.lower())
-    org_path.mkdir(exist_ok=True, parents=True)
-    if not org_path.joinpath(out_name).exists():
-        with org_path.joinpath(out_name).open("w", encoding="utf-8") as file:
-            manifest_ = json.loads(plugin.model_dump_json())
-            manifest_["version"] = str(plugin.version)
-            json.dump(manifest_, file, indent=4)
+def submit_plugins(
+    manifests: list[Union[str, dict, Path]],
+) -> list[Plugin]:
+    """Parse several plugins and create a local copy of them.
 
-    # Refresh plugins list
-    _refresh()
-    return _load_plugin(org_path.joinpath(out_name))
+    All manifests are validated before any of them is saved, so that
+    an invalid manifest does not leave the database partially updated.
+    Many manifests are validated in parallel (see `validate_manifests`).
+    The registry is updated once, after all manifests have been saved.
+
+    Args:
+        manifests: A list of plugin manifests. Each manifest can be
+            any of the types accepted by `submit_plugin`.
+
+    Returns:
+        A list of `Plugin` objects from the local copies,
+        in the order of `manifests`.
+    """
+    plugins = []
+    for result in validate_manifests(manifests):
+        if result.valid:
+            plugins.append(result.plugin)
+        else:
+            # errors of the pool are strings, raise the original exception
+            plugins.append(validate_manifest(result.manifest))
+    paths = _add_to_registry(plugins)  # type: ignore[arg-type]
+    return [_load_plugin(path) for path in paths]
 
 
 def _private_submit_plugin_for_update(
@@ -294,54 +705,64 @@ def _private_submit_plugin_for_update(
     """Submit a plugin parsed from update_polus/nist_plugins.
 
     This is a private function and should not be used by the user.
-    It is an exact copy of submit_plugin but without the refresh call.
+    It is the same as submit_plugin but it does not update the registry,
+    which is refreshed once by update_polus/nist_plugins after all
+    plugins have been submitted.
     It specifies return_plugin to indicate whether to return the plugin object.
-    It is used in update_polus/nist_plugins to avoid refreshing the plugin list
-    every time a plugin is submitted.
     """
-    plugin = validate_manifest(manifest)
-    plugin_name = name_cleaner(plugin.name)
-
-    # Get Major/Minor/Patch versions
-    out_name = (
-        plugin_name
-        + f"_M{plugin.version.major}m{plugin.version.minor}p{plugin.version.patch}.json"
-    )
-
-    # Save the manifest if it doesn't already exist in the database
-    organization = plugin.containerId.split("/")[0]
-    org_path = _PLUGIN_DIR.joinpath(organization.lower())
-    org_path.mkdir(exist_ok=True, parents=True)
-    if not org_path.joinpath(out_name).exists():
-        with org_path.joinpath(out_name).open("w", encoding="utf-8") as file:
-            manifest_ = json.loads(plugin.model_dump_json())
-            manifest_["version"] = str(plugin.version)
-            json.dump(manifest_, file, indent=4)
+    path = _save_manifest(validate_manifest(manifest))
     if return_plugin:
-        return _load_plugin(org_path.joinpath(out_name))
+        return _load_plugin(path)
     return None
 
 
 def get_plugin(
     name: str,
     version: Optional[Union[str, Version]] = None,
+    spec: Optional[Union[str, VersionSpec]] = None,
+    prerelease: bool = False,
 ) -> Plugin:
     """Get a plugin with option to specify version.
 
-    Return a plugin with the option to specify a version.
-    The specified version's manifest must exist in manifests folder.
+    Return a plugin with the option to specify a version or a range
+    of versions. The specified version's manifest must exist in
+    manifests folder.
+
+    Example:
+    ```python
+    >>> get_plugin("OmeConverter", spec="^0.3")  # latest 0.3.x
+    >>> get_plugin("OmeConverter", spec=">=0.2.2, <0.3.2")
+    ```
 
     Args:
         name: Name of the plugin.
         version: Optional version of the plugin, must follow semver.
+        spec: Optional range of versions (see `VersionSpec`), the
+            latest local version in the range is returned.
+        prerelease: if `True`, prereleases can match `spec`.
 
     Returns:
         Plugin
     """
+    versions = _plugins()[name]
+    if version is not None and spec is not None:
+        msg = "specify either version or spec, not both"
+        raise ValueError(msg)
+    if spec is not None:
+        if not isinstance(spec, VersionSpec):
+            spec = VersionSpec(spec, prerelease=prerelease)
+        with _PLUGINS_LOCK:
+            version_ = _SORTED_VERSIONS[name].resolve(spec)
+        if version_ is None:
+            msg = f"no local version of {name} matches {spec}"
+            raise KeyError(msg)
+        return _load_plugin(versions[version_])
     if version is None:
-        return _load_plugin(PLUGINS[name][max(PLUGINS[name])])
-    version_ = version if isinstance(version, Version) else Version(version)
-    return _load_plugin(PLUGINS[name][version_])
+        with _PLUGINS_LOCK:
+            version_ = _SORTED_VERSIONS[name].latest()
+        return _load_plugin(versions[version_])
+    version_ = cast_version(version)
+    return _load_plugin(versions[version_])
 
 
 def load_config(config: Union[dict, Path, str]) -> Plugin:
@@ -364,19 +785,33 @@ def load_config(config: Union[dict, Path, str]) -> Plugin:
 
 
 def remove_plugin(plugin: str, version: Optional[Union[str, list[str]]] = None) -> None:
-    """Remove plugin from the local database."""
+    """Remove plugin from the local database.
+
+    Args:
+        plugin: Name of the plugin.
+        version: Optional version or list of versions to remove.
+            All versions are removed if not specified.
+    """
+    versions = _plugins()[plugin]
     if version is None:
-        for plugin_version in PLUGINS[plugin]:
-            remove_plugin(plugin, plugin_version)
-    else:
-        if isinstance(version, list):
-            for version_ in version:
-                remove_plugin(plugin, version_)
-            return
-        version_ = Version(version) if not isinstance(version, Version) else version
-        path = PLUGINS[plugin][version_]
-        path.unlink()
-    _refresh()
+        version = list(versions)
+    elif not isinstance(version, list):
+        version = [version]
+    # a version listed twice is removed once
+    versions_ = list(dict.fromkeys(cast_version(v) for v in version))
+    paths = [versions[v] for v in versions_]
+
+    with _PLUGINS_LOCK:
+        index = ManifestIndex(_PLUGIN_DIR, _INDEX_PATH).load()
+        for version_, path in zip(versions_, paths):
+            path.unlink()
+            index.remove(path)
+            del versions[version_]
+            _SORTED_VERSIONS[plugin].remove(version_)
+        if not versions:
+            del PLUGINS[plugin]
+            del _SORTED_VERSIONS[plugin]
+        index.save()
 
 
 def remove_all() -> None:
@@ -387,4 +822,5 @@ def remove_all() -> None:
     logger.warning("Removing all plugins from local database")
     for org in organizations:
         shutil.rmtree(org)
+    _SCRAPER_CACHE_PATH.unlink(missing_ok=True)
     _refresh()
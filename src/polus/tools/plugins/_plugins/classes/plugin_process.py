@@ -0,0 +1,225 @@
+"""Plugins running in subprocesses, supervised from an event loop."""
+
+# pylint: disable=W1203
+import asyncio
+import collections
+import logging
+import shutil
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+
+logger = logging.getLogger("polus.plugins")
+
+# seconds given to a terminated process before it is killed
+KILL_GRACE_PERIOD = 10.0
+# lines of output kept until they are consumed, older lines are dropped
+MAX_BUFFERED_LINES = 10_000
+
+
+def docker_run_command(  # noqa: PLR0913
+    image: str,
+    args: list[str],
+    name: str,
+    mounts: list[list[str]],
+    gpus: Union[None, str, int] = None,
+    **kwargs: Union[None, bool, str, int, float, list],
+) -> list[str]:
+    """Return the `docker run` command of a plugin container.
+
+    Keyword arguments are converted to `docker run` options, for
+    example `memory="2g"` to `--memory 2g` and `read_only=True` to
+    `--read-only`. Options set to `None` or `False` are omitted.
+    """
+    cmd = ["docker", "run", "--rm", "--name", name]
+    for mount in mounts:
+        cmd += ["--mount", *mount]
+    if gpus is not None:
+        cmd += ["--gpus", str(gpus)]
+    for key, value in kwargs.items():
+        if value is None or value is False:
+            continue
+        flag = f"--{key.replace('_', '-')}"
+        if value is True:
+            cmd.append(flag)
+        elif isinstance(value, (list, tuple)):
+            for value_ in value:
+                cmd += [flag, str(value_)]
+        else:
+            cmd += [flag, str(value)]
+    return [*cmd, image, *args]
+
+
+class PluginProcess:
+    """A plugin running in a subprocess, see `Plugin.arun()`.
+
+    The output of the process is read as soon as it is written, so that
+    the process never blocks on a full pipe, and buffered until it is
+    consumed by `stream()`. At most `MAX_BUFFERED_LINES` lines are
+    buffered, older lines are dropped (and counted in `dropped_lines`)
+    when the output is not consumed fast enough.
+
+    The timeout of the process starts when the process starts. It is
+    enforced by both `stream()` and `wait()`, which kill the process
+    and its container when it expires, or when the task running them
+    is cancelled.
+
+    Example:
+    ```python
+    >>> process = await plugin.arun(timeout=3600)
+    >>> async for source, line in process.stream():
+    ...     print(source, line.decode(), end="")
+    >>> returncode = await process.wait()
+    ```
+
+    Args:
+        process: the subprocess, with piped stdout and stderr.
+        container_name: name of the container run by the process, it is
+            killed along with the process.
+        timeout: seconds the process can run, `None` for no limit.
+        tmp_dir: directory removed when the process has exited.
+    """
+
+    def __init__(
+        self,
+        process: asyncio.subprocess.Process,
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        tmp_dir: Optional[Path] = None,
+    ) -> None:
+        """Start reading the output of the process."""
+        self.process = process
+        self.container_name = container_name
+        self.timeout = timeout
+        self.tmp_dir = tmp_dir
+        self.dropped_lines = 0
+        loop = asyncio.get_running_loop()
+        self._deadline = None if timeout is None else loop.time() + timeout
+        self._lines: collections.deque = collections.deque(maxlen=MAX_BUFFERED_LINES)
+        self._new_lines = asyncio.Event()
+        self._readers = [
+            asyncio.ensure_future(self._read("stdout", process.stdout)),
+            asyncio.ensure_future(self._read("stderr", process.stderr)),
+        ]
+
+    @classmethod
+    async def start(
+        cls,
+        cmd: list[str],
+        container_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+        tmp_dir: Optional[Path] = None,
+    ) -> "PluginProcess":
+        """Start a command in a subprocess."""
+        logger.debug(f"Starting {cmd}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        return cls(process, container_name, timeout, tmp_dir)
+
+    async def _read(
+        self,
+        source: str,
+        stream: Optional[asyncio.StreamReader],
+    ) -> None:
+        try:
+            if stream is not None:
+                async for line in stream:
+                    if len(self._lines) == self._lines.maxlen:
+                        self.dropped_lines += 1
+                    self._lines.append((source, line))
+                    self._new_lines.set()
+        finally:
+            # wake up `stream()` when the stream is closed too
+            self._new_lines.set()
+
+    def _time_left(self) -> Optional[float]:
+        """Seconds left before the timeout of the process, `None` if unlimited."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - asyncio.get_running_loop().time())
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """Exit code of the process, `None` while it is running."""
+        return self.process.returncode
+
+    async def stream(self) -> AsyncIterator[tuple[str, bytes]]:
+        """Iterate over the lines of output, as `("stdout"|"stderr", line)`.
+
+        Iteration ends when both stdout and stderr are closed and the
+        process has exited, its temporary directory is then removed.
+
+        Raises:
+            asyncio.TimeoutError: if the timeout of the process expired.
+        """
+        try:
+            while True:
+                while self._lines:
+                    if self.returncode is None and self._time_left() == 0:
+                        raise asyncio.TimeoutError
+                    yield self._lines.popleft()
+                if all(reader.done() for reader in self._readers):
+                    await asyncio.wait_for(self.process.wait(), self._time_left())
+                    self._remove_tmp_dir()
+                    return
+                self._new_lines.clear()
+                await asyncio.wait_for(self._new_lines.wait(), self._time_left())
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await asyncio.shield(self.kill())
+            raise
+
+    async def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the process to exit and return its exit code.
+
+        If the timeout expires or the waiting task is cancelled, the
+        process and its container are killed.
+
+        Args:
+            timeout: seconds to wait, default to the time left before
+                the timeout of the process.
+
+        Raises:
+            asyncio.TimeoutError: if the timeout expired.
+        """
+        timeout = self._time_left() if timeout is None else timeout
+        try:
+            returncode = await asyncio.wait_for(self.process.wait(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await asyncio.shield(self.kill())
+            raise
+        await asyncio.gather(*self._readers)
+        self._remove_tmp_dir()
+        return returncode
+
+    def _remove_tmp_dir(self) -> None:
+        if self.tmp_dir is not None:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            self.tmp_dir = None
+
+    async def kill(self) -> None:
+        """Kill the container and the process, if they are still running."""
+        if self.returncode is not None:
+            return
+        if self.container_name is not None:
+            logger.info(f"Killing container {self.container_name}")
+            killer = await asyncio.create_subprocess_exec(
+                "docker",
+                "kill",
+                self.container_name,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await killer.wait()
+        try:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), KILL_GRACE_PERIOD)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        except ProcessLookupError:  # exited meanwhile
+            pass
+        self._remove_tmp_dir()
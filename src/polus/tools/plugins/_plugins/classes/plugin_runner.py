@@ -0,0 +1,313 @@
+"""Run many configured plugins concurrently in Docker containers."""
+
+# pylint: disable=W1203, W0212, enable=W1201
+import enum
+import logging
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from python_on_whales import docker
+
+from polus.tools.plugins._plugins.classes.plugin_base import (
+    BasePlugin,
+    check_plugin_paths,
+    container_name,
+)
+
+logger = logging.getLogger("polus.plugins")
+
+MEMORY_UNITS = {"": 1, "b": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+MEMORY_REGEX = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([bkmgt]?)b?\s*$", re.IGNORECASE)
+
+
+class RunStatus(str, enum.Enum):
+    """Status of a plugin run."""
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class RunResult:
+    """Result of a plugin run by a `PluginRunner`.
+
+    `started` and `finished` are `time.time()` timestamps, `started` is
+    `None` if the container was never started.
+    """
+
+    plugin: BasePlugin
+    container_name: str
+    status: RunStatus
+    exit_code: Optional[int]
+    started: Optional[float]
+    finished: float
+    log_path: Optional[Path]
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Running time of the container in seconds, 0 if never started."""
+        return 0.0 if self.started is None else self.finished - self.started
+
+    @property
+    def ok(self) -> bool:
+        """Whether the plugin ran successfully."""
+        return self.status == RunStatus.SUCCEEDED
+
+
+class _JobCancelledError(Exception):
+    """Raised when a job is cancelled before its container is started."""
+
+
+def _parse_memory(memory: Union[None, int, str]) -> Optional[int]:
+    """Convert a Docker memory limit (ex: `512m`, `2g`) to bytes."""
+    if memory is None or isinstance(memory, int):
+        return memory
+    re_match = MEMORY_REGEX.match(memory)
+    if re_match is None:
+        msg = f"invalid memory limit ({memory})"
+        raise ValueError(msg)
+    return int(float(re_match[1]) * MEMORY_UNITS[re_match[2].lower()])
+
+
+class PluginRunner:
+    """Run configured plugins concurrently, within resource limits.
+
+    Containers are started detached, their logs are streamed to a file
+    per container and they are removed once finished. A job starts when
+    a container slot, and the CPUs and memory it requests, are free.
+
+    Example:
+    ```python
+    >>> runner = PluginRunner(max_containers=4, cpus=8, memory="16g")
+    >>> results = runner.run(plugins, cpus=2, memory="4g")
+    >>> [r.status for r in results if not r.ok]
+    ```
+
+    Args:
+        max_containers: maximum number of containers running at once.
+        cpus: total CPUs of the running containers, unlimited if `None`.
+        memory: total memory of the running containers, in bytes or
+            as a Docker memory limit (ex: `16g`), unlimited if `None`.
+        log_dir: directory of the log files, `{container_name}.log`.
+            Default to a new temporary directory.
+        gpus: `--gpus` value passed to Docker, no GPU if `None`.
+        client: Docker client, default to `python_on_whales.docker`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_containers: int = 4,
+        cpus: Optional[float] = None,
+        memory: Union[None, int, str] = None,
+        log_dir: Optional[Union[str, Path]] = None,
+        gpus: Union[None, str, int] = None,
+        client: Any = None,  # noqa: ANN401
+    ) -> None:
+        """Init the runner, no container is started."""
+        if max_containers < 1:
+            msg = "max_containers must be at least 1"
+            raise ValueError(msg)
+        self.max_containers = max_containers
+        self.cpus = cpus
+        self.memory = _parse_memory(memory)
+        self.log_dir = (
+            Path(log_dir) if log_dir else Path(tempfile.mkdtemp(prefix="polus-runs-"))
+        )
+        self.gpus = gpus
+        self.client = client if client is not None else docker
+
+        self._resources = threading.Condition()
+        self._used_cpus = 0.0
+        self._used_memory = 0
+        self._cancelled = threading.Event()
+        self._running: set[str] = set()
+
+    def run(
+        self,
+        plugins: list[BasePlugin],
+        cpus: Optional[float] = None,
+        memory: Union[None, int, str] = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> list[RunResult]:
+        """Run plugins and wait for all of them.
+
+        All plugins are checked before any container is started. If the
+        batch is cancelled, by `cancel()` or a `KeyboardInterrupt`, the
+        running containers are killed and the others are not started.
+
+        Args:
+            plugins: configured plugins.
+            cpus: CPUs of each container (`--cpus`), counted against
+                the CPU limit of the runner.
+            memory: memory limit of each container (`--memory`),
+                counted against the memory limit of the runner.
+            kwargs: other arguments of `docker run`.
+
+        Returns:
+            The result of each plugin, in the order of `plugins`.
+
+        Raises:
+            MissingInputValuesError: if a required input is not set.
+            InvalidPathError: if a directory does not exist.
+            ValueError: if a container needs more resources than the limits.
+        """
+        memory_ = _parse_memory(memory)
+        if self.cpus is not None and (cpus or 0) > self.cpus:
+            msg = f"containers need {cpus} CPUs, above the limit of {self.cpus}"
+            raise ValueError(msg)
+        if self.memory is not None and (memory_ or 0) > self.memory:
+            msg = f"containers need {memory} memory, above the limit of {self.memory}"
+            raise ValueError(msg)
+        for plugin in plugins:
+            plugin._check_inputs()
+        check_plugin_paths(plugins)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._cancelled.clear()
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_containers,
+            thread_name_prefix="polus-runner",
+        )
+        futures = [
+            executor.submit(self._run_job, plugin, cpus, memory_, kwargs)
+            for plugin in plugins
+        ]
+        try:
+            results = [future.result() for future in futures]
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return results
+
+    def cancel(self) -> None:
+        """Cancel the current batch, killing its running containers."""
+        self._cancelled.set()
+        with self._resources:
+            running = list(self._running)
+            self._resources.notify_all()
+        for name in running:
+            self._kill(name)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the current batch was cancelled."""
+        return self._cancelled.is_set()
+
+    def _kill(self, name: str) -> None:
+        logger.info(f"Killing container {name}")
+        try:
+            self.client.kill(name)
+        except Exception as exc:  # noqa: BLE001 # the container may have exited
+            logger.debug(f"Could not kill container {name}: {exc}")
+
+    def _acquire(self, cpus: Optional[float], memory: Optional[int]) -> None:
+        """Wait until the resources of a container are free."""
+        with self._resources:
+            while not self._cancelled.is_set():
+                cpus_ok = self.cpus is None or self._used_cpus + (cpus or 0) <= self.cpus
+                memory_ok = (
+                    self.memory is None
+                    or self._used_memory + (memory or 0) <= self.memory
+                )
+                if cpus_ok and memory_ok:
+                    self._used_cpus += cpus or 0
+                    self._used_memory += memory or 0
+                    return
+                self._resources.wait()
+            raise _JobCancelledError
+
+    def _release(self, cpus: Optional[float], memory: Optional[int]) -> None:
+        with self._resources:
+            self._used_cpus -= cpus or 0
+            self._used_memory -= memory or 0
+            self._resources.notify_all()
+
+    def _run_job(
+        self,
+        plugin: BasePlugin,
+        cpus: Optional[float],
+        memory: Optional[int],
+        kwargs: dict,
+    ) -> RunResult:
+        name = container_name(plugin)
+        try:
+            self._acquire(cpus, memory)
+        except _JobCancelledError:
+            return RunResult(
+                plugin,
+                name,
+                RunStatus.CANCELLED,
+                None,
+                None,
+                time.time(),
+                None,
+            )
+        log_path = self.log_dir.joinpath(f"{name}.log")
+        started = None
+        try:
+            args, mnts = plugin._docker_args()
+            if cpus is not None:
+                kwargs = {**kwargs, "cpus": cpus}
+            if memory is not None:
+                kwargs = {**kwargs, "memory": memory}
+            if self.gpus is not None:
+                kwargs = {**kwargs, "gpus": self.gpus}
+            logger.info(f"Running {plugin.name} {plugin.version!s} in {name}")
+            started = time.time()
+            with self._resources:
+                self._running.add(name)
+            self.client.run(
+                plugin.containerId,
+                args,
+                name=name,
+                mounts=mnts,
+                detach=True,
+                **kwargs,
+            )
+            if self._cancelled.is_set():  # cancelled while starting
+                self._kill(name)
+            with log_path.open("wb") as log_file:
+                for _, line in self.client.logs(name, follow=True, stream=True):
+                    log_file.write(line)
+            exit_code = self.client.wait(name)
+        except Exception as exc:  # noqa: BLE001 # reported in the result
+            logger.error(f"Container {name} of {plugin.name} failed: {exc}")
+            return RunResult(
+                plugin,
+                name,
+                RunStatus.CANCELLED if self._cancelled.is_set() else RunStatus.FAILED,
+                None,
+                started,
+                time.time(),
+                log_path if log_path.exists() else None,
+                str(exc),
+            )
+        finally:
+            with self._resources:
+                self._running.discard(name)
+            if started is not None:
+                self._remove(name)
+            self._release(cpus, memory)
+        if exit_code == 0:
+            status = RunStatus.SUCCEEDED
+        elif self._cancelled.is_set():
+            status = RunStatus.CANCELLED
+        else:
+            status = RunStatus.FAILED
+        return RunResult(plugin, name, status, exit_code, started, time.time(), log_path)
+
+    def _remove(self, name: str) -> None:
+        try:
+            self.client.remove(name, force=True)
+        except Exception as exc:  # noqa: BLE001 # the container may not exist
+            logger.debug(f"Could not remove container {name}: {exc}")
@@ -0,0 +1,405 @@
+"""On-disk cache of the outputs of plugin runs.
+
+A run is identified by the container of the plugin, the values of its
+inputs and a fingerprint of the content of its input directories. When
+a plugin is run again with the same key, the recorded outputs are
+restored in its output directories instead of running the container.
+
+The cache is opt-in (see `Plugin.run(cache=...)`) and is configured
+with environment variables:
+
+- `POLUS_RUN_CACHE`: cache directory, default to
+  `~/.cache/polus-plugins/runs`.
+- `POLUS_RUN_CACHE_SIZE`: maximum size of the cache in bytes, least
+  recently used runs are evicted beyond it. Default to 10 GiB.
+- `POLUS_RUN_CACHE_AGE`: maximum age of a cached run in seconds,
+  default to 30 days.
+- `POLUS_RUN_CACHE_FINGERPRINT`: `mtime` to fingerprint input files by
+  their size and modification time (default), `content` to hash them.
+
+Only the output files created or modified by a run are recorded, files
+already in the output directories before the run are not.
+"""
+
+# pylint: disable=W1203, W0212
+import enum
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from python_on_whales import docker
+
+if TYPE_CHECKING:
+    from polus.tools.plugins._plugins.classes.plugin_base import BasePlugin
+
+logger = logging.getLogger("polus.plugins")
+
+DEFAULT_CACHE_DIR = pathlib.Path.home().joinpath(".cache", "polus-plugins", "runs")
+DEFAULT_MAX_SIZE = 10 * 1024**3
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+INDEX_NAME = "index.json"
+INDEX_FORMAT = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class Fingerprint(str, enum.Enum):
+    """How the content of input directories is fingerprinted."""
+
+    MTIME = "mtime"
+    CONTENT = "content"
+
+
+def _tree_size(path: pathlib.Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _files_state(path: pathlib.Path) -> dict[str, tuple[int, int]]:
+    """Return the size and modification time of each file of a directory."""
+    state = {}
+    if path.is_dir():
+        for file in path.rglob("*"):
+            if file.is_file():
+                stat = file.stat()
+                state[file.relative_to(path).as_posix()] = (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+    return state
+
+
+def fingerprint_dir(path: pathlib.Path, method: Fingerprint = Fingerprint.MTIME) -> str:
+    """Return a fingerprint of the files of a directory.
+
+    The fingerprint depends on the relative path of each file and on
+    either its size and modification time, or its content.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file = pathlib.Path(root, name)
+            digest.update(str(file.relative_to(path)).encode())
+            if method == Fingerprint.CONTENT:
+                with file.open("rb") as fr:
+                    while chunk := fr.read(HASH_CHUNK_SIZE):
+                        digest.update(chunk)
+            else:
+                stat = file.stat()
+                digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class RunCache:
+    """Cache of the outputs of plugin runs.
+
+    Args:
+        cache_dir: directory of the cache. Default to `POLUS_RUN_CACHE`
+            or `~/.cache/polus-plugins/runs`.
+        max_size: maximum total size of the cached outputs in bytes.
+            Default to `POLUS_RUN_CACHE_SIZE` or 10 GiB.
+        max_age: seconds after which a cached run is evicted. Default
+            to `POLUS_RUN_CACHE_AGE` or 30 days.
+        fingerprint: `mtime` or `content`, see `fingerprint_dir`.
+            Default to `POLUS_RUN_CACHE_FINGERPRINT` or `mtime`.
+        link: if `True`, restored output files are symbolic links to
+            the cache instead of copies. A run restored as links is never
+            evicted, neither by age nor by size, so that the links stay
+            valid; it is only removed by `clear()`.
+        image_digest: if `True`, the key includes the digest of the
+            local image of the plugin (from `docker image inspect`)
+            instead of its tag only.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        cache_dir: Optional[pathlib.Path] = None,
+        max_size: Optional[int] = None,
+        max_age: Optional[float] = None,
+        fingerprint: Union[None, str, Fingerprint] = None,
+        link: bool = False,
+        image_digest: bool = False,
+    ) -> None:
+        """Init the cache, its directory is created on first write."""
+        if cache_dir is None:
+            env_dir = os.environ.get("POLUS_RUN_CACHE")
+            cache_dir = pathlib.Path(env_dir) if env_dir else DEFAULT_CACHE_DIR
+        if max_size is None:
+            max_size = int(os.environ.get("POLUS_RUN_CACHE_SIZE", DEFAULT_MAX_SIZE))
+        if max_age is None:
+            max_age = float(os.environ.get("POLUS_RUN_CACHE_AGE", DEFAULT_MAX_AGE))
+        if fingerprint is None:
+            fingerprint = os.environ.get("POLUS_RUN_CACHE_FINGERPRINT", "mtime")
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.fingerprint = Fingerprint(fingerprint)
+        self.link = link
+        self.image_digest = image_digest
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._digests: dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._index: Optional[dict[str, Any]] = None
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        """Path of the json file listing the cached runs."""
+        return self.cache_dir.joinpath(INDEX_NAME)
+
+    def _run_path(self, key: str) -> pathlib.Path:
+        return self.cache_dir.joinpath("runs", key[:2], key)
+
+    @property
+    def index(self) -> dict[str, Any]:
+        """Cached runs, loaded on first access."""
+        if self._index is None:
+            index: dict[str, Any] = {}
+            try:
+                with self.index_path.open("r", encoding="utf-8") as file:
+                    index = json.load(file)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as exc:
+                logger.debug(f"Discarding run cache index {self.index_path}: {exc}")
+            if index.get("format") != INDEX_FORMAT:
+                index = {"format": INDEX_FORMAT, "runs": {}}
+            self._index = index
+        return self._index
+
+    def _save_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(self.index, file)
+        tmp_path.replace(self.index_path)
+
+    def _container(self, plugin: "BasePlugin") -> str:
+        """Return the image of a plugin, with its digest if configured."""
+        image = plugin.containerId
+        if not self.image_digest:
+            return image
+        if image not in self._digests:
+            try:
+                digests = docker.image.inspect(image).repo_digests
+            except Exception as exc:  # noqa: BLE001 # image not pulled
+                logger.debug(f"Could not inspect {image}: {exc}")
+                return image
+            self._digests[image] = digests[0] if digests else image
+        return self._digests[image]
+
+    def key(self, plugin: "BasePlugin") -> str:
+        """Return the key of a run of a configured plugin.
+
+        Input directories are replaced by the fingerprint of their
+        content, so the key does not depend on where they are. Outputs
+        are not part of the key.
+        """
+        inputs = {}
+        for inp in plugin.inputs:
+            value = inp.value
+            if value is None:
+                continue
+            if isinstance(value, pathlib.Path):
+                value = {"fingerprint": fingerprint_dir(value, self.fingerprint)}
+            elif isinstance(value, enum.Enum):
+                value = value.name
+            inputs[inp.name] = value
+        key = {
+            "container": self._container(plugin),
+            "inputs": inputs,
+            "fingerprint": self.fingerprint.value,
+        }
+        return hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode(),
+        ).hexdigest()
+
+    @staticmethod
+    def _output_dirs(plugin: "BasePlugin") -> dict[str, pathlib.Path]:
+        return {
+            out.name: out.value
+            for out in plugin.outputs
+            if isinstance(out.value, pathlib.Path)
+        }
+
+    def restore(self, key: str, plugin: "BasePlugin") -> bool:
+        """Restore the outputs of a cached run in the output directories.
+
+        Returns:
+            `True` on a hit, `False` if the run is not cached.
+        """
+        with self._lock:
+            entry = self.index["runs"].get(key)
+            if (
+                entry is not None
+                and not entry.get("linked")
+                and time.time() - entry["created"] > self.max_age
+            ):
+                self._evict_run(key)
+                self._save_index()
+                entry = None
+            run_path = self._run_path(key)
+            if entry is None or not run_path.is_dir():
+                self.misses += 1
+                return False
+            entry["accessed"] = time.time()
+            if self.link:
+                entry["linked"] = True
+            self.hits += 1
+            self._save_index()
+        for name, out_dir in self._output_dirs(plugin).items():
+            cached = run_path.joinpath(name)
+            if not cached.is_dir():
+                continue
+            if self.link:
+                for file in cached.rglob("*"):
+                    target = out_dir.joinpath(file.relative_to(cached))
+                    if file.is_dir():
+                        target.mkdir(parents=True, exist_ok=True)
+                        continue
+                    target.unlink(missing_ok=True)
+                    target.symlink_to(file)
+            else:
+                shutil.copytree(cached, out_dir, dirs_exist_ok=True)
+        logger.info(f"Restored cached outputs of {plugin.name} ({key[:12]})")
+        return True
+
+    def snapshot(self, plugin: "BasePlugin") -> dict[str, dict[str, tuple[int, int]]]:
+        """Return the state of the output directories before a run.
+
+        Pass it to `store` so that only the files created or modified by
+        the run are recorded. Files are compared by size and
+        modification time.
+        """
+        return {
+            name: _files_state(out_dir)
+            for name, out_dir in self._output_dirs(plugin).items()
+        }
+
+    def store(
+        self,
+        key: str,
+        plugin: "BasePlugin",
+        before: Optional[dict[str, dict[str, tuple[int, int]]]] = None,
+    ) -> None:
+        """Record the outputs of a successful run.
+
+        Args:
+            key: key of the run, see `key`.
+            plugin: the plugin that was run.
+            before: state of the output directories before the run, see
+                `snapshot`. If `None`, all output files are recorded.
+        """
+        run_path = self._run_path(key)
+        tmp_path = run_path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        for name, out_dir in self._output_dirs(plugin).items():
+            old_files = (before or {}).get(name, {})
+            for rel_path, state in _files_state(out_dir).items():
+                if old_files.get(rel_path) == state:
+                    continue
+                target = tmp_path.joinpath(name, rel_path)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(out_dir.joinpath(rel_path), target)
+        tmp_path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if run_path.exists():  # stored meanwhile
+                shutil.rmtree(tmp_path)
+            else:
+                tmp_path.rename(run_path)
+            now = time.time()
+            entry = {
+                "plugin": plugin.name,
+                "version": str(plugin.version),
+                "size": _tree_size(run_path),
+                "created": now,
+                "accessed": now,
+            }
+            if self.index["runs"].get(key, {}).get("linked"):
+                entry["linked"] = True
+            self.index["runs"][key] = entry
+            self.stores += 1
+            self._evict()
+            self._save_index()
+
+    def _evict_run(self, key: str) -> None:
+        self.index["runs"].pop(key, None)
+        shutil.rmtree(self._run_path(key), ignore_errors=True)
+        self.evictions += 1
+
+    def _evict(self) -> None:
+        """Remove expired runs, then least recently used runs beyond the size.
+
+        Runs restored as links are never removed.
+        """
+        runs = self.index["runs"]
+        now = time.time()
+        unlinked = [k for k, run in runs.items() if not run.get("linked")]
+        for key in [k for k in unlinked if now - runs[k]["created"] > self.max_age]:
+            self._evict_run(key)
+        size = sum(run["size"] for run in runs.values())
+        unlinked = [k for k in unlinked if k in runs]
+        for key in sorted(unlinked, key=lambda k: runs[k]["accessed"]):
+            if size <= self.max_size:
+                break
+            size -= runs[key]["size"]
+            self._evict_run(key)
+
+    def evict(self) -> None:
+        """Remove expired runs and runs beyond the size limit."""
+        with self._lock:
+            self._evict()
+            self._save_index()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Hits, misses, stores and evictions of this instance, and cache size."""
+        with self._lock:
+            runs = self.index["runs"]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "runs": len(runs),
+                "size": sum(run["size"] for run in runs.values()),
+            }
+
+    def clear(self) -> None:
+        """Remove all cached runs."""
+        with self._lock:
+            shutil.rmtree(self.cache_dir.joinpath("runs"), ignore_errors=True)
+            self._index = {"format": INDEX_FORMAT, "runs": {}}
+            self.index_path.unlink(missing_ok=True)
+
+
+_RUN_CACHE: Optional[RunCache] = None
+_RUN_CACHE_LOCK = threading.Lock()
+
+
+def get_run_cache() -> RunCache:
+    """Return the cache used by `Plugin.run(cache=True)`."""
+    global _RUN_CACHE  # pylint: disable=W0603
+    with _RUN_CACHE_LOCK:
+        if _RUN_CACHE is None:
+            _RUN_CACHE = RunCache()
+        return _RUN_CACHE
+
+
+def set_run_cache(cache: Optional[RunCache]) -> None:
+    """Replace the cache used by `Plugin.run(cache=True)`.
+
+    If `None`, a new cache is created from the environment on next use.
+    """
+    global _RUN_CACHE  # pylint: disable=W0603
+    with _RUN_CACHE_LOCK:
+        _RUN_CACHE = cache
@@ -5,17 +5,34 @@ from polus.tools.plugins._plugins.io._io import (  # type: ignore
     IOBase,
     Output,
     Version,
+    WIPP_TYPES,
+    cast_version,
+    check_io_paths,
     input_to_cwl,
     io_to_yml,
     output_to_cwl,
     outputs_cwl,
 )
+from polus.tools.plugins._plugins.io._paths import (
+    PathCache,
+    defer_path_checks,
+    get_path_cache,
+)
+from polus.tools.plugins._plugins.io._spec import SortedVersions, VersionSpec
 
 __all__ = [
     "Input",
     "Output",
     "IOBase",
     "Version",
+    "WIPP_TYPES",
+    "cast_version",
+    "check_io_paths",
+    "defer_path_checks",
+    "get_path_cache",
+    "PathCache",
+    "VersionSpec",
+    "SortedVersions",
     "io_to_yml",
     "outputs_cwl",
     "input_to_cwl",
@@ -6,16 +6,18 @@ import enum
 import logging
 import pathlib
 import re
-from functools import singledispatch, singledispatchmethod
+from functools import lru_cache, singledispatch
 from itertools import zip_longest
-from typing import Any, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
 from packaging.version import Version as PyPIVersion
-from pydantic import BaseModel, Field, StringConstraints
+from pydantic import BaseModel, Field, PrivateAttr, StringConstraints
 from pydantic.dataclasses import dataclass
 from pydantic.functional_validators import AfterValidator
 from typing_extensions import Annotated
 
+from polus.tools.plugins._plugins.io._paths import get_path_cache, path_checks_deferred
+
 logger = logging.getLogger("polus.plugins")
 
 
@@ -85,6 +87,48 @@ class OutputTypes(str, enum.Enum):  # wipp schema
     PYRAMIDANNOTATION = "pyramidAnnotation"
 
 
+def _check_dir(path: pathlib.Path) -> None:
+    """Check that an absolute path is an existing directory."""
+    exists, is_dir = get_path_cache().is_dir(path)
+    if not exists:
+        raise InvalidPathError(f"{path} is invalid or does not exist")
+    if not is_dir:
+        raise InvalidPathError(f"{path} is not a valid directory")
+
+
+def check_io_paths(ios: Iterable["IOBase"], max_workers: Optional[int] = None) -> None:
+    """Check the directories of many I/O at once.
+
+    Directories are checked concurrently, and only once each. Only
+    directories that were not checked when assigned, because checks
+    were deferred, are checked.
+
+    Args:
+        ios: I/O objects, for example the I/O of several plugins.
+        max_workers: maximum number of concurrent checks.
+
+    Raises:
+        InvalidPathError: if a directory does not exist.
+    """
+    # pylint: disable=W0212
+    unchecked = [
+        io for io in ios if isinstance(io.value, pathlib.Path) and not io._path_checked
+    ]
+    get_path_cache().prefetch((io.value for io in unchecked), max_workers)
+    for io in unchecked:
+        io._check_path()
+
+
+@lru_cache(maxsize=None)
+def _enum_type(name: str, values: tuple[str, ...]) -> type[enum.Enum]:
+    """Return the enum type of an enum input.
+
+    The type is built once per input definition, so that values of
+    inputs created from the same manifest compare equal.
+    """
+    return enum.Enum(name, values)  # type: ignore[return-value]
+
+
 class IOBase(BaseModel):  # pylint: disable=R0903
     """Base Class for I/O arguments."""
 
@@ -92,6 +136,10 @@ class IOBase(BaseModel):  # pylint: disable=R0903
     options: Optional[dict] = None
     value: Optional[Any] = None
     id_: Optional[Any] = None
+    # enum type of enum inputs, shared by copies of the input
+    _enum_type: Optional[enum.EnumMeta] = PrivateAttr(None)
+    # False if the directory check of the value was deferred
+    _path_checked: bool = PrivateAttr(True)
 
     def _validate(self, value) -> None:  # pylint: disable=R0912
 
@@ -109,7 +157,11 @@ class IOBase(BaseModel):  # pylint: disable=R0903
         if self.type == InputTypes.ENUM:
             try:
                 if isinstance(value, str):
-                    value = enum.Enum(self.name, self.options["values"])[value]
+                    enum_type = self._enum_type or _enum_type(
+                        self.name,
+                        tuple(self.options["values"]),
+                    )
+                    value = enum_type[value]
                 elif not isinstance(value, enum.Enum):
                     raise ValueError
 
@@ -125,13 +177,19 @@ class IOBase(BaseModel):  # pylint: disable=R0903
             value = WIPP_TYPES[self.type](value)
             if isinstance(value, pathlib.Path):
                 value = value.absolute()
-                if not value.exists():
-                    raise InvalidPathError(f"{value} is invalid or does not exist")
-                if not value.is_dir():
-                    raise InvalidPathError(f"{value} is not a valid directory")
+                checked = not path_checks_deferred()
+                if checked:
+                    _check_dir(value)
+                BaseModel.__setattr__(self, "_path_checked", checked)
 
         super().__setattr__("value", value)
 
+    def _check_path(self) -> None:
+        """Check the directory of this I/O if it was not checked yet."""
+        if isinstance(self.value, pathlib.Path) and not self._path_checked:
+            _check_dir(self.value)
+            BaseModel.__setattr__(self, "_path_checked", True)
+
     def __setattr__(self, name: str, value: Any) -> None:  # ruff: noqa: ANN401
         """Set I/O attributes."""
         if name not in ["value", "id"]:
@@ -193,6 +251,13 @@ class Input(IOBase):  # pylint: disable=R0903
         """Initialize input."""
         super().__init__(**data)
 
+        if self.type == InputTypes.ENUM and self.options and "values" in self.options:
+            BaseModel.__setattr__(
+                self,
+                "_enum_type",
+                _enum_type(self.name, tuple(self.options["values"])),
+            )
+
         if self.description is None:
             msg = f"""
                 the input ({self.name}) is missing the description field.
@@ -219,14 +284,57 @@ SEMVER_REGEX = re.compile(
     re.VERBOSE,
 )
 
+# number of distinct version strings whose parsing is cached
+VERSION_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _parse_semver(ver: str) -> Optional[tuple]:
+    """Parse a version string once.
+
+    Returns `None` if the version is invalid, otherwise the tuple
+    `(major, minor, patch, prerelease, buildmetadata, sort_key)`.
+    """
+    re_match = SEMVER_REGEX.match(ver)
+    if not re_match:
+        return None
+    major, minor, patch, prerelease, buildmetadata = re_match.groups()
+    major, minor, patch = int(major), int(minor), int(patch)
+    return (
+        major,
+        minor,
+        patch,
+        prerelease,
+        buildmetadata,
+        (major, minor, patch, *_prerelease_key(prerelease)),
+    )
+
+
+def _prerelease_key(prerelease: Optional[str]) -> tuple:
+    """Return a key ordering prereleases as `prerelease_lt` does.
+
+    A version without prerelease has precedence over any prerelease.
+    Numeric identifiers are compared numerically and have lower
+    precedence than alphanumeric identifiers, compared lexically.
+    A shorter prerelease has lower precedence if all else is equal.
+    """
+    if prerelease is None:
+        return (1,)
+    return (
+        0,
+        *(
+            (0, int(ident)) if ident.isdigit() else (1, ident)
+            for ident in prerelease.split(".")
+        ),
+    )
+
 
 def semver_validator(ver: str) -> str:
     """Validate a version against semver regex.
 
     This validator is used by Pydantic in the `Version` object.
     """
-    re_match = SEMVER_REGEX.match(ver)
-    if not re_match:
+    if _parse_semver(ver) is None:
         raise ValueError(
             f"invalid version ({ver}). Version must follow semantic versioning (see semver.org)"
         )
@@ -238,7 +346,12 @@ SemVerRoot = Annotated[str, AfterValidator(semver_validator)]
 
 @dataclass
 class Version:
-    """SemVer object."""
+    """SemVer object.
+
+    Versions are ordered by a key computed once at creation, so that
+    sorting and comparing versions does not parse them again. Versions
+    should be treated as immutable, see `cast_version`.
+    """
 
     _root: SemVerRoot
     major: int = Field(..., init=False)
@@ -248,47 +361,56 @@ class Version:
     buildmetadata: str = Field(..., init=False)
 
     def __post_init__(self) -> None:
-        re_match = SEMVER_REGEX.match(self._root)
-        match_dict = re_match.groupdict()
-        self.major = int(match_dict["major"])
-        self.minor = int(match_dict["minor"])
-        self.patch = int(match_dict["patch"])
-        self.prerelease = match_dict["prerelease"]
-        self.buildmetadata = match_dict["buildmetadata"]
+        (
+            self.major,
+            self.minor,
+            self.patch,
+            self.prerelease,
+            self.buildmetadata,
+            self._sort_key,
+        ) = _parse_semver(self._root)
+
+    @property
+    def sort_key(self) -> tuple:
+        """Key ordering versions by semver precedence.
+
+        Build metadata is not part of the key, so versions which only
+        differ by build metadata are neither smaller nor greater than
+        one another.
+        """
+        return self._sort_key
 
     def __str__(self) -> str:
         """Return string representation of Version object."""
         return self._root
 
-    @singledispatchmethod
     def __lt__(self, other: Any) -> bool:
         """Compare if Version is less than other object."""
-        msg = "invalid type for comparison."
-        raise TypeError(msg)
+        if other.__class__ is Version:
+            return self._sort_key < other._sort_key
+        return self._sort_key < _comparable(other)._sort_key
 
-    @singledispatchmethod
     def __gt__(self, other: Any) -> bool:
-        """Compare if Version is less than other object."""
-        msg = "invalid type for comparison."
-        raise TypeError(msg)
+        """Compare if Version is greater than other object."""
+        if other.__class__ is Version:
+            return self._sort_key > other._sort_key
+        return self._sort_key > _comparable(other)._sort_key
 
-    @singledispatchmethod
     def __eq__(self, other: Any) -> bool:
         """Compare if two Version objects are equal."""
-        msg = "invalid type for comparison."
-        raise TypeError(msg)
+        if other.__class__ is Version:
+            return self._root == other._root
+        return self._root == _comparable(other)._root
 
-    @singledispatchmethod
     def __le__(self, other: Any) -> bool:
         """Compare if Version is less than or equal to another."""
-        msg = "invalid type for comparison."
-        raise TypeError(msg)
+        other = _comparable(other)
+        return self._sort_key < other._sort_key or self._root == other._root
 
-    @singledispatchmethod
     def __ge__(self, other: Any) -> bool:
         """Compare if Version is greater than or equal to another."""
-        msg = "invalid type for comparison."
-        raise TypeError(msg)
+        other = _comparable(other)
+        return self._sort_key > other._sort_key or self._root == other._root
 
     def __hash__(self) -> int:
         """Needed to use Version objects as dict keys."""
@@ -299,30 +421,30 @@ class Version:
         return self._root
 
 
-@Version.__eq__.register(str)  # pylint: disable=no-member
-def _(self, other):
-    return self == Version(other)
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _intern_version(ver: str) -> Version:
+    return Version(ver)
 
 
-@Version.__lt__.register(str)  # pylint: disable=no-member
-def _(self, other):
-    return self < Version(other)
+def cast_version(ver: Union[str, Version]) -> Version:
+    """Return a Version from a string, or the Version itself.
 
-
-@Version.__gt__.register(str)  # pylint: disable=no-member
-def _(self, other):
-    return self > Version(other)
+    Versions created from strings are interned: casting the same
+    string again returns the same object without parsing it.
+    """
+    if isinstance(ver, Version):
+        return ver
+    return _intern_version(ver)
 
 
-@Version.__eq__.register(Version)  # pylint: disable=no-member
-def _(self, other):
-    return (
-        other.major == self.major
-        and other.minor == self.minor
-        and other.patch == self.patch
-        and other.prerelease == self.prerelease
-        and other.buildmetadata == self.buildmetadata
-    )
+def _comparable(other: Any) -> Version:
+    """Return `other` as a Version to compare it with a Version."""
+    if isinstance(other, Version):
+        return other
+    if isinstance(other, str):
+        return _intern_version(other)
+    msg = "invalid type for comparison."
+    raise TypeError(msg)
 
 
 def prerelease_lt(pre1: str, pre2: str) -> bool:
@@ -362,54 +484,6 @@ def prerelease_lt(pre1: str, pre2: str) -> bool:
 # < 1.0.0-beta.2 < 1.0.0-beta.11 < 1.0.0-rc.1 < 1.0.0.
 
 
-@Version.__lt__.register(Version)  # pylint: disable=no-member
-def _(self, other):
-    if self.major < other.major:  # X.y.z // P.q.r | X < P
-        return True
-    if self.major == other.major:  # x.Y.z // x.Q.r
-        if self.minor < other.minor:  # | Y < Q
-            # if other.minor > self.minor:
-            return True
-        if self.minor == other.minor:  # x.y.Z // x.y.R
-            # if other.patch > self.patch:
-            if self.patch < other.patch:  # | Z < R
-                return True
-            if self.patch == other.patch:  # x.y.z // x.y.z
-                if self.prerelease is not None:
-                    if other.prerelease is None:
-                        return True
-                    # other.prerelease is not None
-                    return prerelease_lt(self.prerelease, other.prerelease)
-            return False
-        return False
-    return False
-
-
-@Version.__gt__.register(Version)  # pylint: disable=no-member
-def _(self, other):
-    return other < self
-
-
-@Version.__le__.register(str)  # pylint: disable=no-member
-def _(self, other):
-    return self < Version(other) or self == Version(other)
-
-
-@Version.__le__.register(Version)  # pylint: disable=no-member
-def _(self, other):
-    return self < other or self == other
-
-
-@Version.__ge__.register(str)  # pylint: disable=no-member
-def _(self, other):
-    return self > Version(other) or self == Version(other)
-
-
-@Version.__ge__.register(Version)  # pylint: disable=no-member
-def _(self, other):
-    return self > other or self == other
-
-
 def _semver_to_pypi(ver: Version) -> PyPIVersion:
     """Convert SemVer to PyPI version."""
     return PyPIVersion(ver._root)  # pylint: disable=W0212
@@ -0,0 +1,111 @@
+"""Cached, batched checks of directories used as I/O values.
+
+Checking a directory costs a `stat` call, which is slow on network
+file systems. Directories found valid are remembered for a short time
+(`POLUS_PATH_CACHE_TTL` seconds, default 10), so configuring many
+plugins with the same directories only checks each directory once.
+Missing directories are not remembered, they may be created later.
+"""
+import os
+import pathlib
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+DEFAULT_PATH_CACHE_TTL = 10.0
+MAX_STAT_WORKERS = 32
+
+_DEFER_PATH_CHECKS: ContextVar[bool] = ContextVar("defer_path_checks", default=False)
+
+
+class PathCache:
+    """Directories found valid recently.
+
+    Args:
+        ttl: seconds during which a valid directory is not checked
+            again. Default to `POLUS_PATH_CACHE_TTL` or 10.
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        """Init an empty cache."""
+        if ttl is None:
+            ttl = float(os.environ.get("POLUS_PATH_CACHE_TTL", DEFAULT_PATH_CACHE_TTL))
+        self.ttl = ttl
+        self._checked: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def is_dir(self, path: pathlib.Path) -> tuple[bool, bool]:
+        """Return whether `path` exists and whether it is a directory.
+
+        `path` must be absolute.
+        """
+        key = str(path)
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(key)
+        if checked is not None and now - checked < self.ttl:
+            return True, True
+        try:
+            mode = os.stat(key).st_mode
+        except OSError:
+            return False, False
+        if not stat.S_ISDIR(mode):
+            return True, False
+        with self._lock:
+            self._checked[key] = now
+        return True, True
+
+    def prefetch(
+        self,
+        paths: Iterable[pathlib.Path],
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Check many directories concurrently to fill the cache."""
+        unique = list(dict.fromkeys(paths))
+        if len(unique) <= 1:
+            return
+        max_workers = min(max_workers or MAX_STAT_WORKERS, len(unique))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.is_dir, unique))
+
+    def clear(self) -> None:
+        """Forget all checked directories."""
+        with self._lock:
+            self._checked.clear()
+
+
+_PATH_CACHE = PathCache()
+
+
+def get_path_cache() -> PathCache:
+    """Return the cache used to check I/O directories."""
+    return _PATH_CACHE
+
+
+@contextmanager
+def defer_path_checks() -> Iterator[None]:
+    """Do not check directories assigned to I/O within this context.
+
+    Directories are checked later, by `check_io_paths` or when the
+    plugin is run. Use it for outputs that do not exist yet.
+
+    Example:
+    ```python
+    >>> with defer_path_checks():
+    ...     plugin.outDir = "/data/not/created/yet"
+    ```
+    """
+    token = _DEFER_PATH_CHECKS.set(True)
+    try:
+        yield
+    finally:
+        _DEFER_PATH_CHECKS.reset(token)
+
+
+def path_checks_deferred() -> bool:
+    """Return whether directory checks are deferred in this context."""
+    return _DEFER_PATH_CHECKS.get()
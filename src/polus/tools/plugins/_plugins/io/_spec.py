@@ -0,0 +1,246 @@
+# pylint: disable=C0103
+"""Semantic version range specifiers.
+
+A specifier is a list of comparators separated by commas or spaces,
+all of which must be satisfied (ex: `>=1.2, <2`). The following
+comparators are supported, versions may be partial (`1`, `1.2`) and
+use `x` or `*` as wildcards:
+
+- `1.2.3`, `=1.2.3`, `==1.2.3`: exactly this version.
+- `1.2`, `1.2.x`: any version `1.2.*`.
+- `>1.2.3`, `>=1.2.3`, `<1.2.3`, `<=1.2.3`, `!=1.2.3`: comparisons.
+- `~1.2.3`: patch updates (`>=1.2.3, <1.3.0`).
+- `^1.2.3`: updates that do not modify the left-most non-zero
+  component (`>=1.2.3, <2.0.0`, `^0.2.3` is `>=0.2.3, <0.3.0`).
+- `*`: any version.
+
+As in npm, prereleases only match if a comparator of the specifier
+is a prerelease of the same `major.minor.patch`, unless prereleases
+are explicitly allowed.
+"""
+import bisect
+import re
+from typing import Optional, Union
+
+from polus.tools.plugins._plugins.io._io import Version, cast_version
+
+COMPARATOR_REGEX = re.compile(
+    r"""
+    ^(?P<op>\^|~|>=|<=|!=|==|>|<|=)?
+    v?(?P<major>0|[1-9]\d*|[xX*])
+    (?:\.(?P<minor>0|[1-9]\d*|[xX*]))?
+    (?:\.(?P<patch>0|[1-9]\d*|[xX*]))?
+    (?:-(?P<prerelease>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?
+    (?:\+[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*)?$
+    """,
+    re.VERBOSE,
+)
+
+# operators followed by spaces are glued to their version before splitting
+_OP_SPACE_REGEX = re.compile(r"(\^|~|>=|<=|!=|==|>|<|=)\s+")
+
+
+def _floor(major: int, minor: int = 0, patch: int = 0) -> tuple:
+    """Return a key smaller than the key of any `major.minor.patch` version.
+
+    It is the key of `major.minor.patch-0`, the lowest possible prerelease.
+    """
+    return (major, minor, patch, 0)
+
+
+class VersionSpec:
+    """A semantic version range.
+
+    Each comparator is converted to bounds on the sort key of versions
+    (see `Version.sort_key`), so that the range can be resolved by
+    bisection in a sorted list of versions.
+
+    Args:
+        spec: the range specifier (ex: `^1.2`, `>=1.2.0, <2`).
+        prerelease: if `True`, prereleases match whenever their
+            precedence is in the range.
+
+    Raises:
+        ValueError: if the specifier is invalid.
+    """
+
+    def __init__(self, spec: str, prerelease: bool = False) -> None:
+        """Parse the specifier."""
+        self.spec = spec
+        self.prerelease = prerelease
+        self.lower: Optional[tuple[tuple, bool]] = None  # (key, inclusive)
+        self.upper: Optional[tuple[tuple, bool]] = None  # (key, inclusive)
+        self.excluded: set[tuple] = set()
+        # major.minor.patch of comparators with a prerelease
+        self.prerelease_tuples: set[tuple] = set()
+
+        comparators = _OP_SPACE_REGEX.sub(r"\1", spec.strip())
+        for comparator in re.split(r"[\s,]+", comparators):
+            if comparator:
+                self._add(comparator)
+
+    def _add(self, comparator: str) -> None:  # noqa: C901, PLR0912
+        re_match = COMPARATOR_REGEX.match(comparator)
+        if re_match is None:
+            msg = f"invalid version specifier ({self.spec})"
+            raise ValueError(msg)
+        op = re_match["op"] or "="
+        parts = []
+        for part in ("major", "minor", "patch"):
+            if re_match[part] is None or re_match[part] in "xX*":
+                break
+            parts.append(int(re_match[part]))
+        prerelease = re_match["prerelease"]
+        if prerelease is not None and len(parts) < 3:  # noqa: PLR2004
+            msg = f"invalid version specifier ({self.spec}), partial prerelease"
+            raise ValueError(msg)
+
+        if not parts:  # wildcard
+            if op in ("<", "!="):  # `<*` and `!=*` match nothing
+                self._upper(_floor(0), False)
+            return
+
+        if prerelease is not None:
+            self.prerelease_tuples.add(tuple(parts))
+            ver = ".".join(map(str, parts))
+            key = cast_version(f"{ver}-{prerelease}").sort_key
+        else:
+            key = (*parts, *(0,) * (3 - len(parts)), 1)
+        # floor of the first version after the partial version (1.2 -> 1.3)
+        bump = _floor(*parts[:-1], parts[-1] + 1)
+        full = len(parts) == 3  # noqa: PLR2004
+
+        if op in ("=", "=="):
+            self._lower(key, True)
+            self._upper(key if full else bump, full)
+        elif op == "!=":
+            if not full:
+                msg = f"invalid version specifier ({self.spec}), partial !="
+                raise ValueError(msg)
+            self.excluded.add(key)
+        elif op == ">=":
+            self._lower(key, True)
+        elif op == ">":
+            self._lower(*((key, False) if full else (bump, True)))
+        elif op == "<":
+            self._upper(key if full else _floor(*parts), False)
+        elif op == "<=":
+            self._upper(*((key, True) if full else (bump, False)))
+        elif op == "~":
+            self._lower(key, True)
+            if len(parts) > 1:
+                bump = _floor(parts[0], parts[1] + 1)
+            self._upper(bump, False)
+        elif op == "^":
+            self._lower(key, True)
+            if parts[0] > 0 or len(parts) == 1:
+                self._upper(_floor(parts[0] + 1), False)
+            elif parts[1] > 0 or len(parts) == 2:  # noqa: PLR2004
+                self._upper(_floor(0, parts[1] + 1), False)
+            else:
+                self._upper(_floor(0, 0, parts[2] + 1), False)
+
+    def _lower(self, key: tuple, inclusive: bool) -> None:
+        if self.lower is None or (key, not inclusive) > (
+            self.lower[0],
+            not self.lower[1],
+        ):
+            self.lower = (key, inclusive)
+
+    def _upper(self, key: tuple, inclusive: bool) -> None:
+        if self.upper is None or (key, inclusive) < self.upper:
+            self.upper = (key, inclusive)
+
+    def __contains__(self, version: Union[str, Version]) -> bool:
+        """Check if a version is in the range."""
+        version = cast_version(version)
+        key = version.sort_key
+        if self.lower is not None:
+            bound, inclusive = self.lower
+            if key < bound or (key == bound and not inclusive):
+                return False
+        if self.upper is not None:
+            bound, inclusive = self.upper
+            if key > bound or (key == bound and not inclusive):
+                return False
+        return self._allowed(version)
+
+    def _allowed(self, version: Version) -> bool:
+        """Check prerelease and excluded versions, bounds aside."""
+        if version.sort_key in self.excluded:
+            return False
+        if version.prerelease is None or self.prerelease:
+            return True
+        return (version.major, version.minor, version.patch) in self.prerelease_tuples
+
+    def __str__(self) -> str:
+        """Return the specifier."""
+        return self.spec
+
+    def __repr__(self) -> str:
+        """Return representation of VersionSpec object."""
+        return f"VersionSpec({self.spec!r})"
+
+
+class SortedVersions:
+    """Versions of a plugin, sorted by precedence.
+
+    Versions are inserted and removed by bisection, so the list never
+    needs to be sorted again and ranges are resolved in logarithmic time.
+    """
+
+    def __init__(self) -> None:
+        """Init an empty list."""
+        self._keys: list[tuple] = []
+        self._versions: list[Version] = []
+
+    def add(self, version: Version) -> None:
+        """Insert a version, unless it is already in the list."""
+        lo = bisect.bisect_left(self._keys, version.sort_key)
+        i = bisect.bisect_right(self._keys, version.sort_key)
+        if version in self._versions[lo:i]:
+            return
+        self._keys.insert(i, version.sort_key)
+        self._versions.insert(i, version)
+
+    def remove(self, version: Version) -> None:
+        """Remove a version, if it is in the list."""
+        lo = bisect.bisect_left(self._keys, version.sort_key)
+        hi = bisect.bisect_right(self._keys, version.sort_key)
+        for i in range(lo, hi):
+            if self._versions[i] == version:
+                del self._keys[i]
+                del self._versions[i]
+                return
+
+    def latest(self) -> Version:
+        """Return the version with the highest precedence."""
+        return self._versions[-1]
+
+    def resolve(self, spec: VersionSpec) -> Optional[Version]:
+        """Return the highest version in the range, `None` if there is none."""
+        if spec.upper is None:
+            hi = len(self._keys)
+        elif spec.upper[1]:  # inclusive
+            hi = bisect.bisect_right(self._keys, spec.upper[0])
+        else:
+            hi = bisect.bisect_left(self._keys, spec.upper[0])
+        if spec.lower is None:
+            lo = 0
+        elif spec.lower[1]:
+            lo = bisect.bisect_left(self._keys, spec.lower[0])
+        else:
+            lo = bisect.bisect_right(self._keys, spec.lower[0])
+        # usually the first version below the upper bound matches
+        for i in range(hi - 1, lo - 1, -1):
+            if spec._allowed(self._versions[i]):  # pylint: disable=W0212
+                return self._versions[i]
+        return None
+
+    def __iter__(self):
+        """Iterate over versions, from lowest to highest precedence."""
+        return iter(self._versions)
+
+    def __len__(self) -> int:
+        """Return the number of versions."""
+        return len(self._versions)
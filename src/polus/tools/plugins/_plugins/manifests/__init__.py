@@ -1,17 +1,35 @@
 """Manifests module."""
 
+from polus.tools.plugins._plugins.manifests.manifest_cache import (
+    ManifestCache,
+    ManifestNotCachedError,
+    get_manifest_cache,
+    set_manifest_cache,
+)
+from polus.tools.plugins._plugins.manifests.manifest_index import ManifestIndex
+from polus.tools.plugins._plugins.manifests.manifest_scraper import ManifestScraper
 from polus.tools.plugins._plugins.manifests.manifest_utils import (
     InvalidManifestError,
     _error_log,
     _load_manifest,
-    _scrape_manifests,
     validate_manifest,
 )
+from polus.tools.plugins._plugins.manifests.manifest_validation import (
+    ManifestValidation,
+    validate_manifests,
+)
 
 __all__ = [
+    "ManifestCache",
+    "ManifestNotCachedError",
+    "get_manifest_cache",
+    "set_manifest_cache",
+    "ManifestIndex",
+    "ManifestScraper",
     "InvalidManifestError",
     "_load_manifest",
     "validate_manifest",
+    "validate_manifests",
+    "ManifestValidation",
     "_error_log",
-    "_scrape_manifests",
 ]
@@ -0,0 +1,338 @@
+"""On-disk cache of plugin manifests downloaded from urls.
+
+Manifests are stored by the sha256 of their content, so that the same
+manifest served from several urls is stored once. Each url records the
+object it resolved to along with its `ETag` and `Last-Modified` headers:
+within the TTL the cached manifest is returned without any request,
+after it the manifest is revalidated with a conditional request and only
+downloaded again if it changed.
+
+The cache is configured with environment variables:
+
+- `POLUS_MANIFEST_CACHE`: cache directory, default to
+  `~/.cache/polus-plugins/manifests`.
+- `POLUS_MANIFEST_CACHE_TTL`: seconds during which a cached manifest
+  is used without revalidation, default to 3600.
+- `POLUS_MANIFEST_CACHE_SIZE`: maximum size of the cache in bytes,
+  least recently used manifests are evicted beyond it.
+- `POLUS_OFFLINE`: if set to `1`, manifests are only read from the cache.
+
+A cache directory that cannot be written (read-only or full) does not
+prevent manifests from being loaded, they are only not cached.
+"""
+
+# pylint: disable=W1203
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+logger = logging.getLogger("polus.plugins")
+
+DEFAULT_CACHE_DIR = pathlib.Path.home().joinpath(".cache", "polus-plugins", "manifests")
+DEFAULT_TTL = 3600
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+INDEX_NAME = "index.json"
+INDEX_FORMAT = 1
+
+
+class ManifestNotCachedError(Exception):
+    """Raised when a manifest is requested offline and is not cached."""
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+class ManifestCache:
+    """Cache of manifests downloaded over http.
+
+    Args:
+        cache_dir: directory of the cache. Default to
+            `POLUS_MANIFEST_CACHE` or `~/.cache/polus-plugins/manifests`.
+        ttl: seconds during which a cached manifest is used without
+            revalidation. Default to `POLUS_MANIFEST_CACHE_TTL` or 3600.
+            If `0`, manifests are revalidated on every access.
+        max_size: maximum total size of the cached manifests in bytes.
+            Default to `POLUS_MANIFEST_CACHE_SIZE` or 64 MiB.
+        offline: if `True`, never make any request and only serve
+            cached manifests. Default to `POLUS_OFFLINE`.
+        timeout: timeout of each request in seconds.
+        pool_size: number of connections kept open per host.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        cache_dir: Optional[pathlib.Path] = None,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        offline: Optional[bool] = None,
+        timeout: int = 10,
+        pool_size: int = 16,
+    ) -> None:
+        """Init the cache, its directory is created on first write."""
+        if cache_dir is None:
+            env_dir = os.environ.get("POLUS_MANIFEST_CACHE")
+            cache_dir = pathlib.Path(env_dir) if env_dir else DEFAULT_CACHE_DIR
+        if ttl is None:
+            ttl = float(os.environ.get("POLUS_MANIFEST_CACHE_TTL", DEFAULT_TTL))
+        if max_size is None:
+            max_size = int(os.environ.get("POLUS_MANIFEST_CACHE_SIZE", DEFAULT_MAX_SIZE))
+        if offline is None:
+            offline = _env_flag("POLUS_OFFLINE")
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.RLock()
+        self._index: Optional[dict[str, Any]] = None
+        # the index has changes to save, other than access times
+        self._modified = False
+        # number of active `batch()` blocks
+        self._batches = 0
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        """Path of the json file mapping urls to cached manifests."""
+        return self.cache_dir.joinpath(INDEX_NAME)
+
+    def _object_path(self, digest: str) -> pathlib.Path:
+        return self.cache_dir.joinpath("objects", digest[:2], f"{digest}.json")
+
+    @property
+    def index(self) -> dict[str, Any]:
+        """Cached urls and objects, loaded on first access."""
+        if self._index is None:
+            index: dict[str, Any] = {}
+            try:
+                with self.index_path.open("r", encoding="utf-8") as file:
+                    index = json.load(file)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as exc:
+                logger.debug(f"Discarding manifest cache index {self.index_path}: {exc}")
+            if index.get("format") != INDEX_FORMAT:
+                index = {"format": INDEX_FORMAT, "urls": {}, "objects": {}}
+            self._index = index
+        return self._index
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as file:
+                json.dump(self.index, file)
+            tmp_path.replace(self.index_path)
+        except OSError as exc:  # read-only or full cache directory
+            logger.warning(
+                f"Could not write manifest cache index {self.index_path}: {exc}",
+            )
+            with contextlib.suppress(OSError):
+                tmp_path.unlink()
+            return
+        self._modified = False
+
+    def _save_if_modified(self) -> None:
+        """Save the index if it changed, unless saves are batched."""
+        with self._lock:
+            if self._modified and not self._batches:
+                self._save_index()
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator["ManifestCache"]:
+        """Save the index once, after all the manifests got in the block.
+
+        Without a batch, the index is saved after every `get()` that
+        changed it, which costs a full rewrite of the index per manifest
+        when many manifests are downloaded.
+
+        Example:
+        ```python
+        >>> with cache.batch():
+        ...     manifests = [cache.get(url) for url in urls]
+        ```
+        """
+        with self._lock:
+            self._batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+            self._save_if_modified()
+
+    def _read(self, url: str) -> Optional[bytes]:
+        """Return the cached content of a url, `None` if not cached.
+
+        Access times are only saved along with the next change of the
+        index, so that reading cached manifests does not write anything.
+        """
+        entry = self.index["urls"].get(url)
+        if entry is None:
+            return None
+        try:
+            content = self._object_path(entry["sha256"]).read_bytes()
+        except OSError:
+            # the object is gone, forget it along with the url
+            del self.index["urls"][url]
+            self.index["objects"].pop(entry["sha256"], None)
+            self._modified = True
+            return None
+        self.index["objects"][entry["sha256"]]["accessed"] = time.time()
+        return content
+
+    def _write(self, url: str, content: bytes, headers: dict) -> None:
+        """Cache the content of a url, nothing is cached if it cannot be written."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_bytes(content)
+                tmp_path.replace(path)
+            except OSError as exc:  # read-only or full cache directory
+                logger.warning(f"Could not cache manifest {url}: {exc}")
+                with contextlib.suppress(OSError):
+                    tmp_path.unlink()
+                return
+        self.index["objects"][digest] = {"size": len(content), "accessed": time.time()}
+        self.index["urls"][url] = {
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "validated": time.time(),
+        }
+        self._modified = True
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used objects beyond the size limit."""
+        objects = self.index["objects"]
+        size = sum(obj["size"] for obj in objects.values())
+        if size <= self.max_size:
+            return
+        evicted = set()
+        for digest in sorted(objects, key=lambda d: objects[d]["accessed"]):
+            if size <= self.max_size:
+                break
+            size -= objects.pop(digest)["size"]
+            self._object_path(digest).unlink(missing_ok=True)
+            evicted.add(digest)
+        urls = self.index["urls"]
+        for url in [url for url, entry in urls.items() if entry["sha256"] in evicted]:
+            del urls[url]
+        logger.debug(f"Evicted {len(evicted)} manifests from {self.cache_dir}")
+
+    def _revalidate(self, url: str, entry: Optional[dict]) -> dict:
+        """Request a url, conditionally if it is already cached.
+
+        Responses are only cached if they are valid json.
+        """
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:  # noqa: PLR2004
+                response.raise_for_status()
+        except requests.RequestException as exc:
+            with self._lock:
+                cached = self._read(url) if entry is not None else None
+            if cached is None:
+                raise
+            logger.warning(f"Could not revalidate {url} ({exc}), using cached copy.")
+            return json.loads(cached)
+        if response.status_code != 304:  # noqa: PLR2004
+            manifest = json.loads(response.content)
+            with self._lock:
+                self._write(url, response.content, response.headers)
+            return manifest
+        with self._lock:
+            cached = self._read(url)
+            if cached is not None:
+                self.index["urls"][url]["validated"] = time.time()
+                self._modified = True
+        if cached is not None:
+            return json.loads(cached)
+        # the cached object was evicted meanwhile, download it again
+        return self._revalidate(url, None)
+
+    def get(self, url: str) -> dict:
+        """Return the manifest at `url`, from the cache if possible.
+
+        Requests are made outside of the cache lock, so that several
+        threads can download manifests concurrently.
+
+        Raises:
+            ManifestNotCachedError: if the cache is offline and the
+                manifest is not cached.
+            ValueError: if the response is not valid json.
+        """
+        with self._lock:
+            entry = self.index["urls"].get(url)
+            entry = dict(entry) if entry is not None else None
+            content = None
+            if self.offline or (
+                entry is not None and time.time() - entry["validated"] < self.ttl
+            ):
+                content = self._read(url)
+        if content is None:
+            if self.offline:
+                msg = f"{url} is not cached and the manifest cache is offline"
+                raise ManifestNotCachedError(msg)
+            manifest = self._revalidate(url, entry)
+        else:
+            manifest = json.loads(content)
+        self._save_if_modified()
+        return manifest
+
+    def clear(self) -> None:
+        """Remove all cached manifests."""
+        with self._lock:
+            for digest in list(self.index["objects"]):
+                self._object_path(digest).unlink(missing_ok=True)
+            self._index = {"format": INDEX_FORMAT, "urls": {}, "objects": {}}
+            self._modified = False
+            self.index_path.unlink(missing_ok=True)
+
+
+_MANIFEST_CACHE: Optional[ManifestCache] = None
+_MANIFEST_CACHE_LOCK = threading.Lock()
+
+
+def get_manifest_cache() -> ManifestCache:
+    """Return the cache used to load manifests from urls."""
+    global _MANIFEST_CACHE  # pylint: disable=W0603
+    with _MANIFEST_CACHE_LOCK:
+        if _MANIFEST_CACHE is None:
+            _MANIFEST_CACHE = ManifestCache()
+        return _MANIFEST_CACHE
+
+
+def set_manifest_cache(cache: Optional[ManifestCache]) -> None:
+    """Replace the cache used to load manifests from urls.
+
+    If `None`, a new cache is created from the environment on next use.
+    """
+    global _MANIFEST_CACHE  # pylint: disable=W0603
+    with _MANIFEST_CACHE_LOCK:
+        _MANIFEST_CACHE = cache
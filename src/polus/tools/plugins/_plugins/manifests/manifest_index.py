@@ -0,0 +1,141 @@
+"""Persistent index of the local plugin manifests.
+
+The index records, for every manifest file found in the local plugin
+directory, the plugin name and version obtained the last time the file
+was validated, along with the file modification time and size. When the
+registry is refreshed, a manifest whose stat signature did not change is
+registered directly from the index and is not validated again.
+"""
+
+# pylint: disable=W1203
+import json
+import logging
+import os
+import pathlib
+from typing import Any, Optional
+
+logger = logging.getLogger("polus.plugins")
+
+INDEX_FORMAT = 1
+
+
+def _signature(stat: os.stat_result) -> list[int]:
+    """Return the part of a stat result used to detect modified files."""
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ManifestIndex:
+    """On-disk index of validated manifests, keyed by file path.
+
+    Each entry stores the plugin `name` (as returned by `name_cleaner`),
+    its `version` and the file signature (mtime and size). Manifests that
+    failed validation are recorded with an `error` instead, so that they
+    are not validated again until they change.
+
+    Args:
+        plugin_dir: root of the local plugin database.
+        path: json file of the index, usually in a cache directory since
+            the plugin directory can be read-only.
+    """
+
+    def __init__(self, plugin_dir: pathlib.Path, path: pathlib.Path) -> None:
+        """Init an empty index for `plugin_dir`."""
+        self.plugin_dir = plugin_dir
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.modified = False
+
+    def _key(self, file: pathlib.Path) -> str:
+        return file.relative_to(self.plugin_dir).as_posix()
+
+    def load(self) -> "ManifestIndex":
+        """Load the index from disk.
+
+        A missing, unreadable or outdated index is silently discarded,
+        every manifest will then be validated again.
+        """
+        try:
+            with self.path.open("r", encoding="utf-8") as file:
+                content = json.load(file)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Discarding unreadable manifest index {self.path}: {exc}")
+            self.modified = True
+            return self
+        if not isinstance(content, dict) or content.get("format") != INDEX_FORMAT:
+            logger.debug(f"Discarding outdated manifest index {self.path}")
+            self.modified = True
+            return self
+        self.entries = content.get("entries", {})
+        return self
+
+    def save(self) -> None:
+        """Write the index to disk if it has been modified.
+
+        The index is written to a temporary file first and then renamed
+        so that concurrent readers never see a partial index.
+        """
+        if not self.modified:
+            return
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as file:
+                json.dump({"format": INDEX_FORMAT, "entries": self.entries}, file)
+            tmp_path.replace(self.path)
+        except OSError as exc:  # read-only cache directory
+            logger.debug(f"Could not write manifest index {self.path}: {exc}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.modified = False
+
+    def get(
+        self,
+        file: pathlib.Path,
+        stat: os.stat_result,
+    ) -> Optional[dict[str, Any]]:
+        """Return the entry of `file` if it is still up to date."""
+        entry = self.entries.get(self._key(file))
+        if entry is None or entry.get("stat") != _signature(stat):
+            return None
+        return entry
+
+    def add(
+        self,
+        file: pathlib.Path,
+        stat: os.stat_result,
+        name: str,
+        version: str,
+    ) -> dict[str, Any]:
+        """Record a valid manifest."""
+        entry = {"stat": _signature(stat), "name": name, "version": version}
+        self.entries[self._key(file)] = entry
+        self.modified = True
+        return entry
+
+    def add_invalid(
+        self,
+        file: pathlib.Path,
+        stat: os.stat_result,
+        error: str,
+    ) -> dict[str, Any]:
+        """Record a manifest that failed validation."""
+        entry = {"stat": _signature(stat), "error": error}
+        self.entries[self._key(file)] = entry
+        self.modified = True
+        return entry
+
+    def remove(self, file: pathlib.Path) -> None:
+        """Drop the entry of `file` if any."""
+        if self.entries.pop(self._key(file), None) is not None:
+            self.modified = True
+
+    def prune(self, files: set[pathlib.Path]) -> None:
+        """Drop the entries of all files not in `files`."""
+        keep = {self._key(file) for file in files}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.modified = True
@@ -0,0 +1,307 @@
+"""Concurrent scraper for plugin manifests hosted on GitHub.
+
+The scraper lists all files of a repository with a single call to the
+git trees API and downloads the manifests concurrently. Responses are
+cached (ETags and blob shas) so that, on later runs, unchanged
+repositories cost one conditional request and unchanged manifests
+are not downloaded again.
+"""
+
+# pylint: disable=W1203
+import base64
+import json
+import logging
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import requests  # type: ignore
+
+from polus.tools.plugins._plugins.manifests.manifest_utils import is_valid_manifest
+from polus.tools.plugins._plugins.utils import name_cleaner
+
+logger = logging.getLogger("polus.plugins")
+
+GITHUB_API_URL = "https://api.github.com"
+CACHE_FORMAT = 2
+
+
+class ManifestScraper:
+    """Scrape plugin manifests from a GitHub repository.
+
+    Args:
+        repo: full name of the repository (ex: `polusai/image-tools`).
+        auth: GitHub token. Default to the `GITHUB_AUTH` environment
+            variable, otherwise requests are not authenticated.
+        ref: branch, tag or commit to scrape. Default to the
+            repository default branch.
+        cache_path: json file in which ETags, blob shas and the plugins
+            of the scraped manifests are cached. If `None`, nothing is
+            cached between runs.
+        max_workers: maximum number of concurrent requests.
+        api_url: url of the GitHub API, can point to a stand-in server.
+        timeout: timeout of each request in seconds.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        repo: str,
+        auth: Optional[str] = None,
+        ref: Optional[str] = None,
+        cache_path: Optional[pathlib.Path] = None,
+        max_workers: int = 8,
+        api_url: str = GITHUB_API_URL,
+        timeout: int = 10,
+    ) -> None:
+        """Init the scraper and load its cache."""
+        self.repo = repo
+        self.ref = ref
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+
+        auth = auth if auth is not None else os.environ.get("GITHUB_AUTH")
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if auth:
+            self.session.headers["Authorization"] = f"token {auth}"
+        else:
+            logger.warning("Scraping GitHub with no user token.")
+
+        self.cache: dict[str, Any] = {
+            "etags": {},
+            "blobs": {},
+            "plugins": {},
+            "refs": {},
+        }
+        # path of each manifest returned by the last `scrape()`
+        self._scraped: list[tuple[str, dict]] = []
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            with self.cache_path.open("r", encoding="utf-8") as file:
+                cache = json.load(file)
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Discarding scraper cache {self.cache_path}: {exc}")
+            return
+        if cache.get("format") == CACHE_FORMAT:
+            self.cache = cache[self.repo] if self.repo in cache else self.cache
+
+    def save(self) -> None:
+        """Save the cache.
+
+        Call this method once the scraped manifests have been processed,
+        so that manifests are scraped again if processing failed.
+        """
+        if self.cache_path is None:
+            return
+        cache: dict[str, Any] = {"format": CACHE_FORMAT}
+        if self.cache_path.exists():
+            try:
+                with self.cache_path.open("r", encoding="utf-8") as file:
+                    cache = json.load(file)
+            except (OSError, ValueError):
+                pass
+        if cache.get("format") != CACHE_FORMAT:
+            cache = {"format": CACHE_FORMAT}
+        cache[self.repo] = self.cache
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        tmp_path.replace(self.cache_path)
+
+    def _forget_trees(self) -> None:
+        """Drop the ETags of trees, so that the next scrape lists all files."""
+        etags = self.cache["etags"]
+        for url in [url for url in etags if "/git/trees/" in url]:
+            del etags[url]
+
+    def retain(self, plugins: set[tuple[str, str]]) -> None:
+        """Forget the scraped manifests of plugins missing from `plugins`.
+
+        Call this method with the plugins of the local database before
+        `scrape()`, so that the manifests of plugins removed from it are
+        downloaded again even if they did not change. Manifests marked
+        with `reject()` are kept, they are not in the local database.
+
+        Args:
+            plugins: `(class_name, version)` of the local plugins.
+        """
+        scraped = self.cache["plugins"]
+        forgotten = [
+            path
+            for path, plugin in scraped.items()
+            if plugin is not None and tuple(plugin) not in plugins
+        ]
+        for path in forgotten:
+            del scraped[path]
+            self.cache["blobs"].pop(path, None)
+        if forgotten:
+            logger.debug(f"{self.repo}: {len(forgotten)} manifests to fetch again.")
+            self._forget_trees()
+
+    def reject(self, manifest: dict) -> None:
+        """Record that a scraped manifest was not saved in the local database.
+
+        Call this method for the manifests returned by `scrape()` that
+        failed validation or were not submitted, so that `retain()` does
+        not download them again until they change.
+        """
+        for path, scraped in self._scraped:
+            if scraped is manifest:
+                self.cache["plugins"][path] = None
+
+    def _get(self, path: str, conditional: bool = False) -> Optional[dict]:
+        """GET a GitHub API endpoint and return the json response.
+
+        If `conditional`, the request is made with the cached ETag
+        and `None` is returned if the resource did not change.
+        """
+        url = f"{self.api_url}/{path}"
+        headers = {}
+        if conditional and url in self.cache["etags"]:
+            headers["If-None-Match"] = self.cache["etags"][url]
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:  # noqa: PLR2004
+            return None
+        response.raise_for_status()
+        if conditional and "ETag" in response.headers:
+            self.cache["etags"][url] = response.headers["ETag"]
+        return response.json()
+
+    def _resolve_ref(self) -> str:
+        if self.ref is not None:
+            return self.ref
+        info = self._get(f"repos/{self.repo}", conditional=True)
+        if info is not None:
+            self.cache["refs"]["default"] = info["default_branch"]
+        return self.cache["refs"]["default"]
+
+    def _walk_trees(self, root_sha: str, max_depth: int) -> list[dict]:
+        """List files by fetching trees level by level, concurrently."""
+        files = []
+        level = [("", root_sha)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for _ in range(max_depth):
+                trees = executor.map(
+                    lambda item: self._get(f"repos/{self.repo}/git/trees/{item[1]}"),
+                    level,
+                )
+                next_level = []
+                for (prefix, _sha), tree in zip(level, trees):
+                    for entry in tree["tree"]:  # type: ignore
+                        path = f"{prefix}{entry['path']}"
+                        if entry["type"] == "tree":
+                            next_level.append((f"{path}/", entry["sha"]))
+                        else:
+                            files.append({**entry, "path": path})
+                level = next_level
+        return files
+
+    def _list_files(self, max_depth: int) -> Optional[list[dict]]:
+        """List all files of the repository.
+
+        Returns `None` if the repository did not change since last run.
+        """
+        ref = self._resolve_ref()
+        tree = self._get(
+            f"repos/{self.repo}/git/trees/{ref}?recursive=1",
+            conditional=True,
+        )
+        if tree is None:
+            return None
+        if not tree.get("truncated"):
+            return [entry for entry in tree["tree"] if entry["type"] == "blob"]
+        logger.info(f"{self.repo}: tree is too large, listing directories instead")
+        return self._walk_trees(tree["sha"], max_depth)
+
+    def _fetch_blob(self, sha: str) -> Optional[dict]:
+        try:
+            blob = self._get(f"repos/{self.repo}/git/blobs/{sha}")
+            return json.loads(base64.b64decode(blob["content"]))  # type: ignore
+        except (requests.RequestException, ValueError) as exc:
+            logger.error(f"Could not fetch manifest {sha} from {self.repo}: {exc}")
+            return None
+
+    def scrape(
+        self,
+        min_depth: int = 1,
+        max_depth: Optional[int] = None,
+    ) -> tuple[list, list]:
+        """Scrape new or modified manifests.
+
+        Manifests are files named `plugin.json` whose depth in the
+        repository (number of parent directories) is at least
+        `min_depth` and less than `max_depth`.
+
+        Returns:
+            A tuple of two lists: manifests with all required fields
+            and manifests missing some of them.
+        """
+        if max_depth is None:
+            max_depth = min_depth
+            min_depth = 0
+
+        if not max_depth >= min_depth:
+            msg = "max_depth is smaller than min_depth"
+            raise ValueError(msg)
+
+        files = self._list_files(max_depth)
+        if files is None:
+            logger.info(f"{self.repo}: no change since last update.")
+            return [], []
+
+        blobs = self.cache["blobs"]
+        scraped = self.cache["plugins"]
+        manifests = [
+            entry
+            for entry in files
+            if entry["path"].endswith("plugin.json")
+            and "cookiecutter" not in entry["path"]
+            and min_depth <= entry["path"].count("/") < max_depth
+        ]
+        modified = [
+            entry for entry in manifests if blobs.get(entry["path"]) != entry["sha"]
+        ]
+        # forget manifests deleted from the repository
+        paths = {entry["path"] for entry in manifests}
+        for path in [path for path in blobs if path not in paths]:
+            del blobs[path]
+            scraped.pop(path, None)
+        logger.info(
+            f"{self.repo}: {len(manifests)} manifests, {len(modified)} new or modified.",
+        )
+
+        valid_manifests: list = []
+        invalid_manifests: list = []
+        self._scraped = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            contents = executor.map(lambda e: self._fetch_blob(e["sha"]), modified)
+            for entry, manifest in zip(modified, contents):
+                if manifest is None:
+                    failed += 1
+                    continue
+                blobs[entry["path"]] = entry["sha"]
+                try:
+                    plugin = [name_cleaner(manifest["name"]), str(manifest["version"])]
+                except (KeyError, TypeError, AttributeError):
+                    plugin = None  # never saved in the local database
+                scraped[entry["path"]] = plugin
+                self._scraped.append((entry["path"], manifest))
+                if is_valid_manifest(manifest):
+                    valid_manifests.append(manifest)
+                else:
+                    invalid_manifests.append(manifest)
+        if failed:
+            # an unchanged tree must not hide the manifests to fetch again
+            logger.warning(f"{self.repo}: {failed} manifests will be fetched again.")
+            self._forget_trees()
+
+        return valid_manifests, invalid_manifests
@@ -3,15 +3,13 @@
 import json
 import logging
 import pathlib
-from typing import Optional, Union
+from typing import Union
 
-import github
-import requests  # type: ignore
 import validators  # type: ignore
 from pydantic import ValidationError, errors
-from tqdm import tqdm  # type: ignore
 
-from polus.tools.plugins._plugins.io import Version
+from polus.tools.plugins._plugins.io import cast_version
+from polus.tools.plugins._plugins.manifests.manifest_cache import get_manifest_cache
 from polus.tools.plugins._plugins.models import WIPPPluginManifest
 
 logger = logging.getLogger("polus.plugins")
@@ -59,7 +57,10 @@ def is_valid_manifest(plugin: dict) -> bool:
 
 
 def _load_manifest(manifest: Union[str, dict, pathlib.Path]) -> dict:
-    """Return manifest as dict from str (url or path) or pathlib.Path."""
+    """Return manifest as dict from str (url or path) or pathlib.Path.
+
+    Manifests loaded from urls go through the manifest cache.
+    """
     if isinstance(manifest, dict):  # is dict
         return manifest
     if isinstance(manifest, pathlib.Path):  # is path
@@ -71,7 +72,7 @@ def _load_manifest(manifest: Union[str, dict, pathlib.Path]) -> dict:
             manifest_ = json.load(manifest_json)
     elif isinstance(manifest, str):  # is str
         if validators.url(manifest):  # is url
-            manifest_ = requests.get(manifest, timeout=10).json()
+            manifest_ = get_manifest_cache().get(manifest)
         else:  # could (and should) be path
             try:
                 manifest_ = _load_manifest(pathlib.Path(manifest))
@@ -89,7 +90,7 @@ def validate_manifest(
 ) -> WIPPPluginManifest:
     """Validate a plugin manifest against schema."""
     manifest = _load_manifest(manifest)
-    manifest["version"] = Version(manifest["version"])  # noqa
+    manifest["version"] = cast_version(manifest["version"])  # noqa
     if not "name" in manifest:
         msg = f"{manifest} has no value for name"
         raise InvalidManifestError(msg)
@@ -107,50 +108,6 @@ def validate_manifest(
     return plugin
 
 
-def _scrape_manifests(
-    repo: Union[str, github.Repository.Repository],  # type: ignore
-    gh: github.Github,
-    min_depth: int = 1,
-    max_depth: Optional[int] = None,
-    return_invalid: bool = False,
-) -> Union[list, tuple[list, list]]:
-    if max_depth is None:
-        max_depth = min_depth
-        min_depth = 0
-
-    if not max_depth >= min_depth:
-        msg = "max_depth is smaller than min_depth"
-        raise ValueError(msg)
-
-    if isinstance(repo, str):
-        repo = gh.get_repo(repo)
-
-    contents = list(repo.get_contents(""))  # type: ignore
-    next_contents: list = []
-    valid_manifests: list = []
-    invalid_manifests: list = []
-
-    for d in range(0, max_depth):
-        for content in tqdm(contents, desc=f"{repo.full_name}: {d}"):
-            if content.type == "dir":
-                next_contents.extend(repo.get_contents(content.path))  # type: ignore
-            elif content.name.endswith("plugin.json") and d >= min_depth:
-                if "cookiecutter" in content.name:
-                    continue
-                manifest = json.loads(content.decoded_content)
-                if is_valid_manifest(manifest):
-                    valid_manifests.append(manifest)
-                else:
-                    invalid_manifests.append(manifest)
-
-        contents = next_contents.copy()
-        next_contents = []
-
-    if return_invalid:
-        return valid_manifests, invalid_manifests
-    return valid_manifests
-
-
 def _error_log(val_err: ValidationError, manifest: dict, fct: str) -> None:
     report = []
 
@@ -0,0 +1,137 @@
+"""Validation of many plugin manifests on a process pool.
+
+Manifest validation is CPU bound (pydantic), so validating a large
+number of manifests is spread over several processes. Results are
+always returned in the order of the submitted manifests, so that
+callers behave the same as when validating manifests one at a time.
+
+The number of workers and the chunk size can be set per call, or
+globally with the `POLUS_VALIDATION_WORKERS` and
+`POLUS_VALIDATION_CHUNKSIZE` environment variables.
+"""
+
+# pylint: disable=W1203
+import logging
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import NamedTuple, Optional, Union
+
+from polus.tools.plugins._plugins.manifests.manifest_utils import (
+    InvalidManifestError,
+    validate_manifest,
+)
+from polus.tools.plugins._plugins.models import WIPPPluginManifest
+
+logger = logging.getLogger("polus.plugins")
+
+# below this number of manifests, starting a pool costs more than it saves
+MIN_PARALLEL_MANIFESTS = 32
+DEFAULT_CHUNKSIZE = 8
+
+
+class ManifestValidation(NamedTuple):
+    """Result of the validation of one manifest.
+
+    Attributes:
+        manifest: the manifest as submitted (dict, path or url).
+        name: the plugin name, `None` if the manifest is invalid.
+        version: the plugin version, `None` if the manifest is invalid.
+        plugin: the validated model, unless it was not requested.
+        error: description of the validation error, `None` if valid.
+        invalid: `True` if the content of the manifest is invalid (it
+            cannot be parsed or does not conform to the schema), `False`
+            if it is valid or could not be validated at all, for example
+            because it could not be read.
+    """
+
+    manifest: Union[str, dict, pathlib.Path]
+    name: Optional[str] = None
+    version: Optional[str] = None
+    plugin: Optional[WIPPPluginManifest] = None
+    error: Optional[str] = None
+    invalid: bool = False
+
+    @property
+    def valid(self) -> bool:
+        """Whether the manifest passed validation."""
+        return self.error is None
+
+
+def _validate_one(
+    manifest: Union[str, dict, pathlib.Path],
+    keep_models: bool = True,
+) -> ManifestValidation:
+    """Validate a manifest and capture any error as a string.
+
+    Exceptions are not returned as is since their cause (pydantic
+    `ValidationError`) does not survive the trip between processes.
+    """
+    try:
+        plugin = validate_manifest(manifest)
+    except InvalidManifestError as im_err:
+        cause = im_err.__cause__ if im_err.__cause__ is not None else im_err
+        return ManifestValidation(manifest, error=str(cause), invalid=True)
+    except (ValueError, KeyError, TypeError) as exc:  # unparsable content
+        return ManifestValidation(manifest, error=str(exc), invalid=True)
+    except Exception as exc:  # pylint: disable=W0718
+        return ManifestValidation(manifest, error=str(exc))
+    return ManifestValidation(
+        manifest,
+        name=plugin.name,
+        version=str(plugin.version),
+        plugin=plugin if keep_models else None,
+    )
+
+
+def _from_env(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def validate_manifests(
+    manifests: list[Union[str, dict, pathlib.Path]],
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    keep_models: bool = True,
+) -> list[ManifestValidation]:
+    """Validate many manifests, in parallel if worthwhile.
+
+    Errors do not interrupt the validation, they are reported in the
+    result of the corresponding manifest.
+
+    Args:
+        manifests: manifests to validate (dict, path or url).
+        max_workers: number of worker processes. Default to
+            `POLUS_VALIDATION_WORKERS` or the number of CPUs.
+            Manifests are validated in the current process if `1`.
+        chunksize: number of manifests sent to a worker at once.
+            Default to `POLUS_VALIDATION_CHUNKSIZE` or 8.
+        keep_models: if `False`, only the name and version of valid
+            manifests are returned, which avoids sending the validated
+            models back from the workers.
+
+    Returns:
+        One `ManifestValidation` per manifest, in the same order.
+    """
+    if max_workers is None:
+        max_workers = _from_env("POLUS_VALIDATION_WORKERS") or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = _from_env("POLUS_VALIDATION_CHUNKSIZE") or DEFAULT_CHUNKSIZE
+    validate = partial(_validate_one, keep_models=keep_models)
+
+    if max_workers <= 1 or len(manifests) < MIN_PARALLEL_MANIFESTS:
+        return [validate(manifest) for manifest in manifests]
+
+    max_workers = min(max_workers, -(-len(manifests) // chunksize))
+    logger.debug(
+        f"Validating {len(manifests)} manifests with {max_workers} processes",
+    )
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(validate, manifests, chunksize=chunksize))
+    except (OSError, BrokenProcessPool) as exc:
+        logger.warning(f"Validation pool failed ({exc}), validating serially.")
+    return [validate(manifest) for manifest in manifests]
@@ -1,5 +1,4 @@
 # pylint: disable=W1203, W1201
-import json
 import logging
 import re
 import typing
@@ -8,28 +7,40 @@ from pydantic import ValidationError
 from tqdm import tqdm  # type: ignore
 
 from polus.tools.plugins._plugins.classes import (
+    _SCRAPER_CACHE_PATH,
+    _local_versions,
     _private_submit_plugin_for_update,
     _refresh,
-    submit_plugin,
+    _save_manifest,
 )
 from polus.tools.plugins._plugins.gh import _init_github
 from polus.tools.plugins._plugins.io import Version
 from polus.tools.plugins._plugins.manifests import (
     InvalidManifestError,
-    _error_log,
-    _scrape_manifests,
+    ManifestScraper,
+    _load_manifest,
+    get_manifest_cache,
+    validate_manifests,
 )
 
 logger = logging.getLogger("polus.plugins")
 
+RAW_GITHUB_URL = "https://raw.githubusercontent.com"
+
 
 def update_polus_plugins(
     gh_auth: typing.Optional[str] = None,
     min_depth: int = 2,
     max_depth: int = 3,
+    max_workers: int = 8,
 ) -> None:
     """Scrape PolusAI/image-tools GitHub repo and create local versions of Plugins found.
 
+    Only manifests that are new or were modified since the last update,
+    or whose plugin was removed from the local database, are downloaded
+    and submitted. Rejected manifests are not downloaded again until
+    they are modified.
+
     Args:
         gh_auth:
             GitHub authentication token, if empty will try
@@ -37,69 +48,66 @@ def update_polus_plugins(
             otherwise will connect without authentication.
         min_depth: Minimum depth to scrape, default is 2
         max_depth: Maximum depth to scrape, default is 3
+        max_workers: Maximum number of concurrent requests to GitHub.
 
     """
     logger.info("Updating polus plugins.")
-    # Get all manifests
-    valid, invalid = _scrape_manifests(
+    # Get all new or modified manifests
+    scraper = ManifestScraper(
         "polusai/image-tools",
-        _init_github(gh_auth),
-        min_depth,
-        max_depth,
-        True,
+        auth=gh_auth,
+        cache_path=_SCRAPER_CACHE_PATH,
+        max_workers=max_workers,
     )
+    scraper.retain(_local_versions())
+    valid, invalid = scraper.scrape(min_depth, max_depth)
     manifests = valid.copy()
     manifests.extend(invalid)
     logger.info(f"Submitting {len(manifests)} plugins.")
 
-    for manifest in manifests:
-        try:
-            plugin = _private_submit_plugin_for_update(manifest, return_plugin=True)
-            # plugin is of type Plugin since return_plugin = True
-            # but mypy does not recognize this
+    for manifest, result in zip(manifests, validate_manifests(manifests)):
+        name = manifest.get("name", manifest)
+        if not result.valid:
+            logger.error(f"Validation error in {name}: {result.error}")
+            scraper.reject(manifest)
+            continue
+        plugin = result.plugin
 
-            # # Check that plugin version matches container version tag
+        try:
+            # Check that plugin version matches container version tag
             container_name, version = tuple(
                 plugin.containerId.split(":")  # type: ignore # pylint: disable=E1101
             )
             version = Version(version)
             organization, container_name = tuple(container_name.split("/"))
             if plugin.version != version:  # type: ignore
-                raise InvalidManifestError("containerId")
+                msg = (
+                    f"In {name}:"
+                    f"containerId version ({version}) does not "
+                    f"match plugin version ({plugin.version})"  # type: ignore
+                )
+                logger.error(msg)
+                scraper.reject(manifest)
+                continue
 
             # Check to see that the plugin is registered to Labshare
             if organization not in ["polusai", "labshare"]:
-                raise InvalidManifestError("organization")
-
-        except InvalidManifestError as im_err:
-            if im_err.__cause__ is not None:
-                logger.error(
-                    f"Validation error in {manifest['name']}: {im_err.__cause__}"
+                msg = (
+                    f"In {name}:"
+                    "all polus plugin containers must be"
+                    " under the Labshare organization."
                 )
-            else:
-                if "name" not in manifest:
-                    logger.error(f"Validation error in {manifest}: no value for 'name'")
-                if "containerId" in im_err.args[0]:
-                    msg = (
-                        f"In {manifest['name']}:"
-                        f"containerId version ({version}) does not "  # type: ignore
-                        f"match plugin version ({plugin.version})"  # type: ignore
-                    )
-                    logger.error(msg)
-                if "organization" in im_err.args[0]:
-                    msg = (
-                        f"In {manifest['name']}:"
-                        "all polus plugin containers must be"
-                        " under the Labshare organization."
-                    )
-                    logger.error(msg)
+                logger.error(msg)
+                scraper.reject(manifest)
+                continue
+
+            _save_manifest(plugin)  # type: ignore
 
         except Exception as exc:  # pylint: disable=W0718
-            if "name" in manifest:
-                logger.error(f"Error in {manifest['name']}: {exc}")
-            else:
-                logger.error(f"Error in {manifest}: {exc}")
+            logger.error(f"Error in {name}: {exc}")
+            scraper.reject(manifest)
 
+    scraper.save()
     _refresh(supress_warnings=True)
 
 
@@ -115,22 +123,31 @@ def update_nist_plugins(gh_auth: typing.Optional[str] = None) -> None:
     )
     matches = pattern.findall(str(readme.decoded_content))
     logger.info("Updating NIST plugins.")
-    for match in tqdm(matches, desc="NIST Manifests"):
-        url_parts = match[0].split("/")[3:]
-        plugin_repo = gh.get_repo("/".join(url_parts[:2]))
-        manifest = json.loads(
-            plugin_repo.get_contents("/".join(url_parts[4:])).decoded_content,
-        )
-
-        try:
-            _private_submit_plugin_for_update(manifest)
-
-        except ValidationError as val_err:
-            logger.error(f"Validation error in {manifest['name']}: {val_err}")
-
-        except InvalidManifestError as im_err:
-            logger.error(f"Validation error in {manifest['name']}: {im_err.__cause__}")
+    # the manifest cache index is saved once, after all manifests are loaded
+    with get_manifest_cache().batch():
+        for match in tqdm(matches, desc="NIST Manifests"):
+            # github.com/<owner>/<repo>/blob/<ref>/<path> is served as is by
+            # raw.githubusercontent.com/<owner>/<repo>/<ref>/<path>, which does
+            # not count against the API rate limit and goes through the cache
+            url_parts = match[0].split("/")[3:]
+            url = "/".join([RAW_GITHUB_URL, *url_parts[:2], *url_parts[3:]])
+            try:
+                manifest = _load_manifest(url)
+            except Exception as exc:  # pylint: disable=W0718
+                logger.error(f"Could not load {url}: {exc}")
+                continue
+
+            try:
+                _private_submit_plugin_for_update(manifest)
+
+            except ValidationError as val_err:
+                logger.error(f"Validation error in {manifest['name']}: {val_err}")
+
+            except InvalidManifestError as im_err:
+                logger.error(
+                    f"Validation error in {manifest['name']}: {im_err.__cause__}",
+                )
 
-        except Exception as exc:  # pylint: disable=W0718
-            logger.error(f"Error in {manifest['name']}: {exc}")
+            except Exception as exc:  # pylint: disable=W0718
+                logger.error(f"Error in {manifest['name']}: {exc}")
     _refresh(supress_warnings=True)
@@ -8,3 +8,4 @@ from polus.tools.workflows.model import CommandLineTool
 from polus.tools.workflows.model import Process
 from polus.tools.workflows.model import Workflow
 from polus.tools.workflows.model import WorkflowStep
+from polus.tools.workflows.model import save_all
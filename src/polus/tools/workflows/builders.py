@@ -237,6 +237,7 @@ class WorkflowBuilder:
         workdir: Path = Path(),
         recursive: bool = True,
         add_step_index: bool = True,
+        save: bool = True,
     ) -> None:
         """Set up the workflow factory options.
 
@@ -247,6 +248,9 @@ class WorkflowBuilder:
             add_step_index: set to true if step should be preprended by their position
             in the original list (necessary if step are repeated).
             # NOTE this could be auto-detected instead.
+            save: set to false to only build workflow models, without writing
+            their cwl specification files. They can be saved later, for
+            example in batch with `save_all(workflows, workdir)`.
         """
         self.context = {}
         self.recursive = True
@@ -254,13 +258,22 @@ class WorkflowBuilder:
         self.recursive = recursive
         self.context = {} if context is None else context
         self.add_step_index = add_step_index
+        self.save = save
 
     def __call__(  # noqa: PLR0912,C901
         self,
         id_: str,
         steps: list[WorkflowStep],
+        save: Optional[bool] = None,
     ) -> Workflow:
-        """Build a workflow and save the cwl specification file."""
+        """Build a workflow and save the cwl specification file.
+
+        Args:
+            id_: the workflow id.
+            steps: the workflow steps.
+            save: whether to save the cwl specification file in the workdir,
+            default to the builder option.
+        """
         if not steps:
             steps = []
 
@@ -279,15 +292,19 @@ class WorkflowBuilder:
         scatter_requirement = False
         subworkflow_feature_requirement = False
         inline_javascript_requirement = False
-        multiple_input_feature_requirement = False
 
         if self.add_step_index:
             self.update_steps_references_with_index(steps)
 
+        # index the step inputs consuming each source once,
+        # rather than scanning all steps for each step input.
+        consumers, multiple_input_feature_requirement = self.index_sources(steps)
+
         for step in steps:
             # if we have the definition already in context, just use it.
             # Subprocesses will not be loaded either.
-            if step.run not in self.context:
+            sub_process = self.context.get(step.run)
+            if sub_process is None:
                 sub_process = Process.load(
                     step.run,
                     recursive=self.recursive,
@@ -315,6 +332,7 @@ class WorkflowBuilder:
                     input_,
                     step,
                     steps,
+                    consumers,
                 )
 
                 workflow_input_id = generate_workflow_io_id(
@@ -344,11 +362,6 @@ class WorkflowBuilder:
                 )
                 workflow_outputs.append(workflow_output)
 
-        for step in steps:
-            for input_ in step.in_:
-                if input_.source is not None and isinstance(input_.source, list):
-                    multiple_input_feature_requirement = True
-
         # NOTE if extra check on the whole model need to be performed, this
         # can be done here. If recursive option is set to True,
         # context will contain all process models.
@@ -371,14 +384,37 @@ class WorkflowBuilder:
             from_builder=True,
         )
 
-        self.workflow.save(self.workdir)
+        if self.save if save is None else save:
+            self.workflow.save(self.workdir)
         return self.workflow
 
+    @staticmethod
+    def index_sources(
+        steps: list[WorkflowStep],
+    ) -> tuple[dict[str, list[WorkflowStep]], bool]:
+        """Index the steps consuming each source.
+
+        Returns:
+            A dict from each source representation to the steps with an
+        input linked to it, and whether any input is linked to
+        multiple sources.
+        """
+        consumers: dict[str, list[WorkflowStep]] = {}
+        multiple_sources = False
+        for step in steps:
+            for input_ in step.in_:
+                if isinstance(input_.source, list):
+                    multiple_sources = True
+                elif input_.source is not None:
+                    consumers.setdefault(input_.source, []).append(step)
+        return consumers, multiple_sources
+
     def generate_default_workflow_inputs(
         self,
         input_: WorkflowStepInput,
         step: WorkflowStep,
         steps: list[WorkflowStep],
+        consumers: Optional[dict[str, list[WorkflowStep]]] = None,
     ) -> Union[Path, None]:
         """Generate default workflow inputs if needed.
 
@@ -387,13 +423,22 @@ class WorkflowBuilder:
         then we need to generate a default value for this input
         and bubble it up as a workflow input value.
         This allows further manual customization.
+
+        Args:
+            input_: the step input.
+            step: the step of the input.
+            steps: all the workflow steps.
+            consumers: steps consuming each source (see `index_sources`),
+            built from `steps` if not provided.
         """
         if input_.id_ not in step._outputs:
             return None
+        if consumers is None:
+            consumers, _ = self.index_sources(steps)
         # if input is output, build its source representation
         _ref = generate_cwl_source_repr(step.id_, input_.id_)
         # check if another step input reference this output
-        for _other_step in steps:
+        for _other_step in consumers.get(_ref, []):
             if _other_step == step:
                 continue
             for _input in _other_step.in_:
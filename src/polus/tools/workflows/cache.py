@@ -0,0 +1,169 @@
+"""Process-wide cache of loaded cwl documents.
+
+Parsing a cwl file with the reference parser takes milliseconds, and
+the same files are loaded again and again when many workflows are built
+from the same library of processes. Local documents are cached, keyed
+by their resolved path, modification time and size, so that a modified
+file is parsed again. A file rewritten with the same size within one
+tick of the filesystem clock keeps its key, so `Process.save` and
+`save_all` invalidate the files they write. Other writers should call
+`invalidate()`. Cached values are pickled and every lookup returns a
+new copy, so callers can modify what they get.
+
+The maximum number of cached documents can be set with the
+`POLUS_CWL_CACHE_SIZE` environment variable.
+"""
+
+import pickle
+import threading
+from collections import OrderedDict
+from os import environ
+from pathlib import Path
+from typing import Any
+from typing import Optional
+from typing import Union
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+from polus.tools.workflows.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_SIZE = 256
+
+CacheKey = tuple[str, int, int]
+
+
+def _local_path(uri: Union[Path, str]) -> Optional[Path]:
+    """Return the path of a local document, `None` for remote ones."""
+    if isinstance(uri, Path):
+        return uri
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    # single letters are windows drives
+    if len(parsed.scheme) > 1:
+        return None
+    return Path(uri)
+
+
+class DocumentCache:
+    """LRU cache of the documents and models loaded from local cwl files.
+
+    Each cached file can hold several values (for example the
+    normalized cwl dict and the process model built from it), which are
+    evicted together.
+
+    Args:
+        max_size: maximum number of cached files.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        """Create an empty cache."""
+        if max_size is None:
+            max_size = int(environ.get("POLUS_CWL_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, dict[str, bytes]] = OrderedDict()
+        self._keys: dict[str, CacheKey] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(uri: Union[Path, str]) -> Optional[CacheKey]:
+        """Return the key of a document, `None` if it cannot be cached.
+
+        Remote documents and missing files are not cached.
+        """
+        path = _local_path(uri)
+        if path is None:
+            return None
+        try:
+            path = path.resolve()
+            stat = path.stat()
+        except (OSError, ValueError):
+            return None
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, key: Optional[CacheKey], kind: str) -> Optional[Any]:  # noqa: ANN401
+        """Return a copy of a cached value, `None` if it is not cached."""
+        if key is None or self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            data = entry.get(kind) if entry is not None else None
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(data)  # noqa: S301
+
+    def put(
+        self,
+        key: Optional[CacheKey],
+        kind: str,
+        value: Any,  # noqa: ANN401
+    ) -> None:
+        """Cache a value of a document, replacing older versions of it."""
+        if key is None or self.max_size <= 0:
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            old_key = self._keys.get(key[0])
+            if old_key is not None and old_key != key:
+                self._entries.pop(old_key, None)
+            self._keys[key[0]] = key
+            self._entries.setdefault(key, {})[kind] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._keys.pop(evicted[0], None)
+
+    def invalidate(self, uri: Optional[Union[Path, str]] = None) -> None:
+        """Forget a document, or all documents if `uri` is `None`."""
+        with self._lock:
+            if uri is None:
+                self._entries.clear()
+                self._keys.clear()
+                return
+            path = _local_path(uri)
+            if path is None:
+                return
+            key = self._keys.pop(str(path.resolve()), None)
+            if key is not None:
+                self._entries.pop(key, None)
+                logger.debug(f"Invalidated cached document {key[0]}")
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Hits, misses and number of cached documents."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "documents": len(self._entries),
+            }
+
+
+_DOCUMENT_CACHE: Optional[DocumentCache] = None
+_DOCUMENT_CACHE_LOCK = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    """Return the cache used by `Process.load`."""
+    global _DOCUMENT_CACHE  # noqa: PLW0603
+    with _DOCUMENT_CACHE_LOCK:
+        if _DOCUMENT_CACHE is None:
+            _DOCUMENT_CACHE = DocumentCache()
+        return _DOCUMENT_CACHE
+
+
+def set_document_cache(cache: Optional[DocumentCache]) -> None:
+    """Replace the cache used by `Process.load`.
+
+    If `None`, a new cache is created from the environment on next use.
+    """
+    global _DOCUMENT_CACHE  # noqa: PLW0603
+    with _DOCUMENT_CACHE_LOCK:
+        _DOCUMENT_CACHE = cache
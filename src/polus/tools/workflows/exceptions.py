@@ -122,3 +122,11 @@ class ScatterValidationError(Exception):
     """
 
     pass
+
+
+class CyclicProcessReferenceError(Exception):
+    """Raised if a workflow references itself through its steps."""
+
+    def __init__(self, cycle: list[str]) -> None:
+        """Init CyclicProcessReferenceError."""
+        super().__init__(f"Cyclic process references : {' -> '.join(cycle)}")
@@ -1,11 +1,17 @@
 """The main cwl models."""
 
+import os
+from collections import Counter
 from collections.abc import KeysView
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Annotated
 from typing import Any
 from typing import Optional
 from typing import Union
+from uuid import uuid4
 
 import cwl_utils.parser as cwl_parser
 import yaml  # type: ignore[import]
@@ -22,9 +28,11 @@ from schema_salad.exceptions import ValidationException as CwlParserException
 from typing_extensions import Self
 
 import polus.tools.workflows.builders
+from polus.tools.workflows.cache import get_document_cache
 from polus.tools.workflows.default_ids import extract_name_from_id
 from polus.tools.workflows.default_ids import generate_cwl_source_repr
 from polus.tools.workflows.exceptions import BadCwlProcessFileError
+from polus.tools.workflows.exceptions import CyclicProcessReferenceError
 from polus.tools.workflows.exceptions import IncompatibleTypeError
 from polus.tools.workflows.exceptions import IncompatibleValueError
 from polus.tools.workflows.exceptions import InvalidFormatError
@@ -57,6 +65,87 @@ from polus.tools.workflows.utils import file_exists
 
 logger = get_logger(__name__)
 
+# below this number of processes, starting a pool costs more than it saves
+MIN_PARALLEL_SAVES = 16
+
+
+class IndexedList(list):
+    """List of ios indexed by their ids.
+
+    The index is updated whenever the list is modified, so lookups by id
+    stay constant time as ios are added. Appending is incremental, other
+    modifications rebuild the index. As for a dict built from the list,
+    the last io wins if several have the same id.
+    """
+
+    __slots__ = ("by_id",)
+
+    def __init__(self, items: Any = ()) -> None:  # noqa: ANN401
+        """Copy the items and index them."""
+        super().__init__(items)
+        self.by_id: dict[str, Any] = {item.id_: item for item in self}
+
+    def _reindex(self) -> None:
+        self.by_id = {item.id_: item for item in self}
+
+    def __reduce__(self) -> tuple:
+        """Pickle and copy as a new list, the index is rebuilt."""
+        return (self.__class__, (list(self),))
+
+    def append(self, item: Any) -> None:  # noqa: ANN401
+        """Append an io and index it."""
+        super().append(item)
+        self.by_id[item.id_] = item
+
+    def extend(self, items: Any) -> None:  # noqa: ANN401
+        """Extend the list and index the new ios."""
+        for item in items:
+            self.append(item)
+
+    def __iadd__(self, items: Any) -> Self:  # noqa: ANN401
+        """Extend the list in place."""
+        self.extend(items)
+        return self
+
+    def _reindexing(name: str) -> Any:  # noqa: ANN401, N805
+        method = getattr(list, name)
+
+        def wrapper(self: "IndexedList", *args: Any) -> Any:  # noqa: ANN401
+            result = method(self, *args)
+            self._reindex()
+            return result
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    insert = _reindexing("insert")
+    pop = _reindexing("pop")
+    remove = _reindexing("remove")
+    clear = _reindexing("clear")
+    reverse = _reindexing("reverse")
+    sort = _reindexing("sort")
+    __setitem__ = _reindexing("__setitem__")
+    __delitem__ = _reindexing("__delitem__")
+    __imul__ = _reindexing("__imul__")
+    del _reindexing
+
+
+def _index(model: BaseModel, field: str) -> dict[str, Any]:
+    """Return the index by id of a list of ios of a model.
+
+    The list is replaced by an `IndexedList` on first use, which then
+    maintains the index as the list is modified.
+    """
+    items = model.__dict__.get(field)
+    if items.__class__ is IndexedList:
+        return items.by_id
+    items = getattr(model, field)
+    if not isinstance(items, IndexedList):
+        items = IndexedList(items)
+        model.__dict__[field] = items
+    return items.by_id
+
 
 def is_valid_parameter_id(id_: str) -> str:
     """Check if parameter id is valid."""
@@ -397,13 +486,13 @@ class WorkflowStep(CwlDocExtra, CwlRequireExtra):
 
     @property
     def _inputs(self) -> dict[StepIOId, WorkflowStepInput]:
-        """Generate a dict of WorkflowStepInputs for efficient retrieval."""
-        return {input_.id_: input_ for input_ in self.in_}
+        """Index of WorkflowStepInputs for efficient retrieval."""
+        return _index(self, "in_")
 
     @property
     def _outputs(self) -> dict[StepIOId, WorkflowStepOutput]:
-        """Generate a dict of WorkflowStepOutputs for efficient retrieval."""
-        return {output.id_: output for output in self.out}
+        """Index of WorkflowStepOutputs for efficient retrieval."""
+        return _index(self, "out")
 
     @field_serializer("scatter_method", when_used="always")
     @classmethod
@@ -478,10 +567,10 @@ class WorkflowStep(CwlDocExtra, CwlRequireExtra):
 
         # NOTE assignement are made on inputs only,
         # so check them first in case we have a input which is also an output.
-        if self._inputs and name in self._inputs:
-            input_ = self._inputs[name]
+        input_ = self._inputs.get(name)
+        if input_ is not None:
             input_.set_value(value)
-        elif self._outputs and name in self._outputs:
+        elif name in self._outputs:
             raise OutputAssignmentError(name)
         else:
             msg = f"undefined attribute {name}"
@@ -497,12 +586,8 @@ class WorkflowStep(CwlDocExtra, CwlRequireExtra):
         tuple[WorkflowStepInput, WorkflowStepOutput],
     ]:
         """This is enabling assignment in our python DSL."""
-        input_, output = None, None
-        if self._outputs and name in self._outputs:
-            output = self._outputs[name]
-
-        if self._inputs and name in self._inputs:
-            input_ = self._inputs[name]
+        output = self._outputs.get(name)
+        input_ = self._inputs.get(name)
 
         if input_ and output:
             logger.warning(
@@ -581,12 +666,12 @@ class Process(CwlRequireExtra, CwlDocExtra, CwlRootObject):
     @property
     def _inputs(self) -> dict[ParameterId, InputParameter]:
         """Internal index to retrieve inputs efficiently."""
-        return {input_.id_: input_ for input_ in self.inputs}
+        return _index(self, "inputs")
 
     @property
     def _outputs(self) -> dict[ParameterId, OutputParameter]:
         """Internal index to retrieve outputs efficiently."""
-        return {output.id_: output for output in self.outputs}
+        return _index(self, "outputs")
 
     @property
     def name(self) -> str:
@@ -604,10 +689,8 @@ class Process(CwlRequireExtra, CwlDocExtra, CwlRootObject):
         return version
 
     @classmethod
-    def _load(cls, cwl_file: Union[Path, str]) -> dict:
-        """Load a Process from a path or uri."""
-        if isinstance(cwl_file, Path):
-            cwl_file = file_exists(cwl_file)
+    def _parse(cls, cwl_file: Union[Path, str]) -> dict:
+        """Parse a Process and return its normalized cwl dict."""
         try:
             cwl_process = cwl_parser.load_document_by_uri(cwl_file)
         except CwlParserException:
@@ -619,32 +702,149 @@ class Process(CwlRequireExtra, CwlDocExtra, CwlRootObject):
             # NOTE By default, save rewrite all ids and refs.
             # This would prevent us for recursively loading subprocesses so
             # for workflow we substitute with the original run references.
-            full_refs_cwl = cwl_parser.save(cwl_process, relative_uris=False)
-            runs = [step["run"] for step in full_refs_cwl["steps"]]
-            for step, run in zip(yaml_cwl["steps"], runs):
+            # Only inlined processes need to be serialized again.
+            for step, parsed_step in zip(yaml_cwl["steps"], cwl_process.steps):
+                run = parsed_step.run
+                if not isinstance(run, str):
+                    run = cwl_parser.save(run, relative_uris=False)
                 step["run"] = run
 
         return yaml_cwl
 
+    @classmethod
+    def _load(cls, cwl_file: Union[Path, str]) -> dict:
+        """Load a Process from a path or uri.
+
+        Local files are parsed once, see `DocumentCache`.
+        """
+        if isinstance(cwl_file, Path):
+            cwl_file = file_exists(cwl_file)
+        cache = get_document_cache()
+        key = cache.key(cwl_file)
+        yaml_cwl = cache.get(key, "document")
+        if yaml_cwl is None:
+            yaml_cwl = cls._parse(cwl_file)
+            cache.put(key, "document", yaml_cwl)
+        return yaml_cwl
+
+    @classmethod
+    def _load_process(cls, cwl_file: Union[Path, str]) -> "Process":
+        """Load a Process model from a path or uri, using the cache."""
+        cache = get_document_cache()
+        key = cache.key(cwl_file)
+        process = cache.get(key, "process")
+        if process is None:
+            process = cls._from_dict(cls._load(cwl_file))
+            cache.put(key, "process", process)
+        return process
+
+    @classmethod
+    def _from_dict(cls, cwl_data: dict) -> "Process":
+        """Create the model of a Process from its cwl dict."""
+        process_class = cwl_data["class"]
+        if process_class == "Workflow":
+            return Workflow(**cwl_data)
+        if process_class == "CommandLineTool":
+            return CommandLineTool(**cwl_data)
+        raise UnsupportedProcessClassError(process_class)
+
+    @classmethod
+    def _load_references(
+        cls,
+        workflow: "Workflow",
+        context: dict,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Load the processes referenced by a workflow, recursively.
+
+        Each referenced document is loaded once, and documents already
+        in the context are not loaded again. Documents referenced at the
+        same depth are loaded concurrently. Processes are added to the
+        context in the order of a depth-first traversal of the steps,
+        subprocesses first, whatever the order the loads complete in.
+
+        Processes and their references are recorded under the reference
+        they were loaded from (the `run` of a step), which is not their
+        `id` if the document sets one.
+
+        Raises:
+            CyclicProcessReferenceError: if a workflow references itself.
+        """
+        processes: dict[str, Process] = {workflow.id_: workflow}
+        refs: dict[str, list[str]] = {}
+
+        def visit(process: Workflow, process_ref: str) -> list[str]:
+            """Record the references of a workflow, return the ones to load."""
+            refs[process_ref] = []
+            pending = []
+            for step in process.steps:
+                if isinstance(step.run, str):
+                    ref = step.run
+                    if ref not in processes and ref not in context:
+                        processes[ref] = None  # type: ignore[assignment]
+                        pending.append(ref)
+                else:
+                    ref = step.run.id_
+                    processes[ref] = step.run
+                    if isinstance(step.run, Workflow):
+                        pending += visit(step.run, ref)
+                refs[process_ref].append(ref)
+            return pending
+
+        pending = visit(workflow, workflow.id_)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                loaded = list(executor.map(cls._load_process, pending))
+                next_pending = []
+                for ref, process in zip(pending, loaded):
+                    processes[ref] = process
+                    if isinstance(process, Workflow):
+                        next_pending += visit(process, ref)
+                pending = next_pending
+
+        # depth-first traversal, to detect cycles and fill the context
+        visited: set[str] = set()
+        path: list[str] = []
+
+        def add(ref: str) -> None:
+            if ref in path:
+                raise CyclicProcessReferenceError([*path[path.index(ref) :], ref])
+            if ref in visited:
+                return
+            path.append(ref)
+            for sub_ref in refs.get(ref, []):
+                add(sub_ref)
+            path.pop()
+            visited.add(ref)
+            if ref != workflow.id_ and processes.get(ref) is not None:
+                context[processes[ref].id_] = processes[ref]
+
+        add(workflow.id_)
+
     @classmethod
     def load(
         cls,
         cwl_data: Union[Path, str, dict, "Process"],
         recursive: bool = False,
         context: Optional[dict] = None,
+        max_workers: Optional[int] = None,
     ) -> "Process":
         """Load a process (optionally recursively).
 
         Factory method for all subclasses.
         The process can be referenced to by a path or uri,
         serialized as a dict or just be an existing model.
+        Processes loaded from local files are cached (see
+        `polus.tools.workflows.cache`), each call returns a new model.
 
         Args:
             cwl_data: Path to the cwl file to load or an URI describing
         the resource location.
             recursive: If set to True, attempts to recursively load all
-        cwl processes referenced.
+        cwl processes referenced. Each process is loaded once, processes
+        at the same depth are loaded concurrently.
             context: Collect all cwl models found.
+            max_workers: maximum number of threads loading processes.
 
         Returns:
             The process object.
@@ -658,20 +858,13 @@ class Process(CwlRequireExtra, CwlDocExtra, CwlRootObject):
 
         if isinstance(cwl_data, Process):
             process = cwl_data
+        elif isinstance(cwl_data, (Path, str)):
+            process = cls._load_process(cwl_data)
         else:
-            if isinstance(cwl_data, (Path, str)):
-                cwl_data = cls._load(cwl_data)
-            process_class = cwl_data["class"]
-            if process_class == "Workflow":
-                process = Workflow(**cwl_data)
-            elif cwl_data["class"] == "CommandLineTool":
-                process = CommandLineTool(**cwl_data)
-            else:
-                raise UnsupportedProcessClassError(process_class)
+            process = cls._from_dict(cwl_data)
 
         if isinstance(process, Workflow) and recursive:
-            for step in process.steps:
-                Process.load(step.run, recursive=recursive, context=context)
+            cls._load_references(process, context, max_workers)
 
         context[process.id_] = process
         return process
@@ -689,14 +882,20 @@ class Process(CwlRequireExtra, CwlDocExtra, CwlRootObject):
 
         path = directory_exists(path)
         file_path = path / (self.name + ".cwl")
-        serialized_process = self.model_dump(
+        serialized_process = self._serialize()
+        with Path.open(file_path, "w", encoding="utf-8") as file:
+            file.write(yaml.dump(serialized_process))
+        # the file can keep its size and modification time, see `DocumentCache`
+        get_document_cache().invalidate(file_path)
+        return file_path
+
+    def _serialize(self) -> SerializedModel:
+        """Serialize the process as saved in cwl files."""
+        return self.model_dump(
             by_alias=True,
             exclude={"name"},
             exclude_none=True,
         )
-        with Path.open(file_path, "w", encoding="utf-8") as file:
-            file.write(yaml.dump(serialized_process))
-            return file_path
 
 
 class Workflow(Process):
@@ -767,3 +966,90 @@ class Operation(Process):
     """Operation are used for no-op placeholder."""
 
     pass
+
+
+def _write_process(job: tuple[Path, SerializedModel]) -> bool:
+    """Write a serialized process, unless the file content is the same.
+
+    The file is replaced atomically, so it is never seen partially written.
+
+    Returns:
+        `True` if the file was written.
+    """
+    file_path, serialized_process = job
+    content = yaml.dump(serialized_process)
+    try:
+        if file_path.read_text(encoding="utf-8") == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    tmp_path = file_path.with_name(f".{file_path.name}.{uuid4().hex}.tmp")
+    try:
+        with Path.open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        tmp_path.replace(file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def save_all(
+    processes: list[Process],
+    path: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> list[Path]:
+    """Save many processes as cwl files, in parallel if worthwhile.
+
+    Files are the same as the ones created by `Process.save`. They are
+    serialized on a process pool, replaced atomically and not rewritten
+    if their content did not change.
+
+    Args:
+        processes: the processes to save.
+        path: Directory in which to create the files.
+        max_workers: number of worker processes, default to the number
+        of CPUs. Processes are serialized in the current process if `1`.
+
+    Returns:
+        Paths to the cwl files, in the order of the processes.
+    """
+    if path is None:
+        path = Path()
+    path = directory_exists(path)
+    file_paths = [path / (process.name + ".cwl") for process in processes]
+    duplicates = [name for name, count in Counter(file_paths).items() if count > 1]
+    if duplicates:
+        msg = f"several processes would be saved as {duplicates}"
+        raise ValueError(msg)
+
+    jobs = [
+        (file_path, process._serialize())
+        for file_path, process in zip(file_paths, processes)
+    ]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    written: Optional[list[bool]] = None
+    if max_workers > 1 and len(jobs) >= MIN_PARALLEL_SAVES:
+        max_workers = min(max_workers, len(jobs))
+        chunksize = max(1, len(jobs) // (4 * max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # workers are started when the jobs are submitted, write errors
+            # are only raised when the results are collected
+            try:
+                results = executor.map(_write_process, jobs, chunksize=chunksize)
+            except OSError as exc:
+                logger.warning(f"Save pool failed ({exc}), saving serially.")
+            else:
+                try:
+                    written = list(results)
+                except BrokenProcessPool as exc:
+                    logger.warning(f"Save pool failed ({exc}), saving serially.")
+    if written is None:
+        written = [_write_process(job) for job in jobs]
+    cache = get_document_cache()
+    for file_path, was_written in zip(file_paths, written):
+        if was_written:
+            cache.invalidate(file_path)
+    logger.debug(f"Wrote {sum(written)} of {len(jobs)} cwl files in {path}")
+    return file_paths
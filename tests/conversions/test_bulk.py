@@ -0,0 +1,84 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for the bulk conversion of WIPP manifests."""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ict")
+
+from polus.tools.conversions import convert_manifests, find_manifests  # noqa: E402
+from polus.tools.conversions.bulk import ConversionStatus  # noqa: E402
+
+RSRC_PATH = Path(__file__).parent.parent.joinpath("plugins", "resources")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for name in ("g1", "omeconverter030"):
+        tmp_path.joinpath(name).mkdir()
+        shutil.copy(RSRC_PATH / f"{name}.json", tmp_path / name / "plugin.json")
+    tmp_path.joinpath("cookiecutter").mkdir()
+    tmp_path.joinpath("cookiecutter", "plugin.json").write_text("{}")
+    return tmp_path
+
+
+def _statuses(conversions):
+    return [conv.status for conv in conversions]
+
+
+def test_find_manifests(repo):
+    """Test ignored directories are left out."""
+    assert find_manifests(repo) == [
+        repo / "g1" / "plugin.json",
+        repo / "omeconverter030" / "plugin.json",
+    ]
+
+
+def test_convert_incremental(repo, tmp_path):
+    """Test up to date and unchanged manifests are not converted again."""
+    manifests = find_manifests(repo)
+    summary = tmp_path / "summary.json"
+    first = convert_manifests(manifests, max_workers=1, summary=summary)
+    assert _statuses(first) == [ConversionStatus.CONVERTED] * 2
+    clt = Path(first[1].output)
+    assert clt.name == "OmeConverter.cwl"
+    assert not list(repo.rglob(".*.cwl"))
+
+    second = convert_manifests(manifests, max_workers=1, summary=summary)
+    assert _statuses(second) == [ConversionStatus.SKIPPED] * 2
+
+    # a manifest with the same content is skipped even if it is newer
+    stat = clt.stat()
+    os.utime(manifests[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    third = convert_manifests(manifests, max_workers=1, summary=summary)
+    assert _statuses(third) == [ConversionStatus.SKIPPED] * 2
+
+    forced = convert_manifests(manifests, max_workers=1, force=True)
+    assert _statuses(forced) == [ConversionStatus.UNCHANGED] * 2
+
+
+def test_convert_summary(repo, tmp_path):
+    """Test failures are reported without interrupting the conversion."""
+    repo.joinpath("bad").mkdir()
+    repo.joinpath("bad", "plugin.json").write_text(json.dumps({"name": "bad"}))
+    summary = tmp_path / "summary.json"
+    conversions = convert_manifests(find_manifests(repo), summary=summary)
+    assert _statuses(conversions) == [
+        ConversionStatus.FAILED,
+        ConversionStatus.CONVERTED,
+        ConversionStatus.CONVERTED,
+    ]
+    content = json.loads(summary.read_text())
+    assert content["target"] == "clt"
+    assert content["counts"] == {
+        "converted": 2,
+        "unchanged": 0,
+        "skipped": 0,
+        "failed": 1,
+    }
+    assert content["conversions"][0]["error"]
+    assert not list(repo.joinpath("bad").glob("*.cwl"))
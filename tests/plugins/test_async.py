@@ -0,0 +1,269 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for Plugin.arun, with a fake docker CLI."""
+import asyncio
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from polus.tools.plugins._plugins.classes import _load_plugin, plugin_process
+from polus.tools.plugins._plugins.classes.plugin_process import docker_run_command
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+
+# records its arguments, prints the container arguments and sleeps
+# FAKE_DOCKER_SLEEP seconds; `kill` kills the matching `run`
+FAKE_DOCKER = f"""#!{sys.executable}
+import os, signal, sys, time
+state = os.environ["FAKE_DOCKER_STATE"]
+with open(os.path.join(state, "calls"), "a") as file:
+    file.write(" ".join(sys.argv[1:]) + "\\n")
+if sys.argv[1] == "kill":
+    with open(os.path.join(state, sys.argv[2])) as file:
+        os.kill(int(file.read()), signal.SIGKILL)
+    sys.exit(0)
+name = sys.argv[sys.argv.index("--name") + 1]
+with open(os.path.join(state, name), "w") as file:
+    file.write(str(os.getpid()))
+print(" ".join(sys.argv[sys.argv.index("polusai/basic-flatfield-correction-plugin:1.2.7") + 1:]), flush=True)
+print("starting", file=sys.stderr, flush=True)
+time.sleep(float(os.environ.get("FAKE_DOCKER_SLEEP", "0")))
+print("done", flush=True)
+"""
+
+
+@pytest.fixture
+def fake_docker(tmp_path, monkeypatch):
+    """Put a fake docker CLI first in PATH, return its state directory."""
+    bin_dir = tmp_path.joinpath("bin")
+    bin_dir.mkdir()
+    docker = bin_dir.joinpath("docker")
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    state = tmp_path.joinpath("state")
+    state.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_STATE", str(state))
+    return state
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin_.set_io(
+        inpDir=tmp_path,
+        outDir=tmp_path,
+        filePattern="img_{x}.tif",
+        darkfield=True,
+        photobleach=True,
+    )
+    return plugin_
+
+
+def _calls(state):
+    return state.joinpath("calls").read_text().splitlines()
+
+
+def test_docker_run_command():
+    """Test keyword arguments are converted to `docker run` options."""
+    cmd = docker_run_command(
+        "image:1",
+        ["--inpDir", "/data/inputs/input0"],
+        "polus-x-1",
+        [["type=bind,source=/a,target=/data/inputs/input0"]],
+        None,
+        memory="2g",
+        read_only=True,
+        privileged=False,
+        env=["A=1", "B=2"],
+    )
+    assert cmd == [
+        "docker",
+        "run",
+        "--rm",
+        "--name",
+        "polus-x-1",
+        "--mount",
+        "type=bind,source=/a,target=/data/inputs/input0",
+        "--memory",
+        "2g",
+        "--read-only",
+        "--env",
+        "A=1",
+        "--env",
+        "B=2",
+        "image:1",
+        "--inpDir",
+        "/data/inputs/input0",
+    ]
+
+
+def test_arun(fake_docker, plugin):
+    """Test the output of the container is streamed."""
+
+    async def main():
+        process = await plugin.arun(gpus=None, memory="2g")
+        lines = [(source, line) async for source, line in process.stream()]
+        return process, lines, await process.wait()
+
+    process, lines, returncode = asyncio.run(main())
+    assert returncode == 0
+    args, _ = plugin._docker_args()
+    assert ("stdout", f"{' '.join(args)}\n".encode()) in lines
+    assert ("stderr", b"starting\n") in lines
+    assert ("stdout", b"done\n") in lines
+    (call,) = _calls(fake_docker)
+    assert call.startswith(f"run --rm --name {process.container_name} --mount ")
+    assert "--memory 2g" in call
+    assert "--gpus" not in call
+
+
+def test_arun_timeout(fake_docker, plugin, monkeypatch):
+    """Test the container is killed when the timeout expires."""
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "30")
+
+    async def main():
+        process = await plugin.arun(gpus=None, timeout=0.5)
+        with pytest.raises(asyncio.TimeoutError):
+            await process.wait()
+        return process
+
+    start = time.monotonic()
+    process = asyncio.run(main())
+    assert time.monotonic() - start < 10  # noqa: PLR2004
+    assert process.returncode is not None
+    assert f"kill {process.container_name}" in _calls(fake_docker)
+
+
+def test_arun_cancel(fake_docker, plugin, monkeypatch):
+    """Test containers are killed when the waiting task is cancelled."""
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "30")
+
+    async def main():
+        processes = [await plugin.arun(gpus=None) for _ in range(3)]
+        tasks = [asyncio.ensure_future(p.wait()) for p in processes]
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, asyncio.CancelledError) for r in results)
+        return processes
+
+    processes = asyncio.run(main())
+    calls = _calls(fake_docker)
+    for process in processes:
+        assert process.returncode is not None
+        assert f"kill {process.container_name}" in calls
+
+
+def test_arun_concurrent(fake_docker, plugin, monkeypatch):
+    """Test many containers are supervised concurrently from one loop."""
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "1")
+
+    async def main():
+        processes = await asyncio.gather(*(plugin.arun(gpus=None) for _ in range(20)))
+        return await asyncio.gather(*(p.wait() for p in processes))
+
+    start = time.monotonic()
+    assert asyncio.run(main()) == [0] * 20
+    assert time.monotonic() - start < 20  # noqa: PLR2004
+    assert len(set(_calls(fake_docker))) == 20  # noqa: PLR2004
+
+
+def test_stream_timeout(fake_docker, plugin, monkeypatch):
+    """Test the container is killed when the timeout expires while streaming."""
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "30")
+
+    async def main():
+        process = await plugin.arun(gpus=None, timeout=0.5)
+        with pytest.raises(asyncio.TimeoutError):
+            async for _ in process.stream():
+                pass
+        return process
+
+    start = time.monotonic()
+    process = asyncio.run(main())
+    assert time.monotonic() - start < 10  # noqa: PLR2004
+    assert process.returncode is not None
+    assert f"kill {process.container_name}" in _calls(fake_docker)
+
+
+def test_stream_cancel(fake_docker, plugin, monkeypatch):
+    """Test the container is killed when the streaming task is cancelled."""
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "30")
+
+    async def consume(process):
+        async for _ in process.stream():
+            pass
+
+    async def main():
+        process = await plugin.arun(gpus=None)
+        task = asyncio.ensure_future(consume(process))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return process
+
+    process = asyncio.run(main())
+    assert process.returncode is not None
+    assert f"kill {process.container_name}" in _calls(fake_docker)
+
+
+def test_stream_buffer(fake_docker, plugin, monkeypatch):
+    """Test the oldest lines are dropped when the output is not consumed."""
+    monkeypatch.setattr(plugin_process, "MAX_BUFFERED_LINES", 2)
+
+    async def main():
+        process = await plugin.arun(gpus=None)
+        await process.wait()
+        return process, [line async for _, line in process.stream()]
+
+    process, lines = asyncio.run(main())
+    assert process.dropped_lines == 1
+    assert len(lines) == 2  # noqa: PLR2004
+
+
+def test_stream_tmp_dir(tmp_path):
+    """Test the temporary directory is removed when the stream ends."""
+    tmp_dir = tmp_path.joinpath("job")
+    tmp_dir.mkdir()
+
+    async def main():
+        process = await plugin_process.PluginProcess.start(
+            [sys.executable, "-c", "print('done')"],
+            tmp_dir=tmp_dir,
+        )
+        return process, [line async for _, line in process.stream()]
+
+    process, lines = asyncio.run(main())
+    assert lines == [b"done\n"]
+    assert process.returncode == 0
+    assert not tmp_dir.exists()
+
+
+def test_arun_cwl_files(plugin, monkeypatch):
+    """Test concurrent runs save their CWL files in their own directory."""
+    commands = []
+
+    async def start(cmd, timeout=None, tmp_dir=None):
+        commands.append(cmd)
+        assert Path(cmd[-1]).parent == tmp_dir
+        return tmp_dir
+
+    monkeypatch.setattr(plugin_process.PluginProcess, "start", start)
+
+    async def main():
+        return await asyncio.gather(plugin.arun_cwl(), plugin.arun_cwl())
+
+    tmp_dirs = asyncio.run(main())
+    assert tmp_dirs[0] != tmp_dirs[1]
+    for cmd in commands:
+        assert Path(cmd[-1]).exists()
+        assert Path(cmd[-2]).suffix == ".cwl"
+    for tmp_dir in tmp_dirs:
+        shutil.rmtree(tmp_dir)
@@ -0,0 +1,59 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613, W0212
+"""Benchmarks of frequent plugin operations."""
+from pathlib import Path
+
+import pytest
+
+from polus.tools.plugins._plugins.classes import _load_plugin
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    """Configured BasicFlatfieldCorrectionPlugin."""
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin_.inpDir = tmp_path
+    plugin_.outDir = tmp_path
+    plugin_.filePattern = "img_x{xx}_y{yy}.ome.tif"
+    plugin_.darkfield = True
+    return plugin_
+
+
+def test_attribute_access(benchmark, plugin):
+    """Benchmark access to plugin attributes which are not I/O."""
+    result = benchmark(lambda: (plugin.name, plugin.version, plugin.inputs))
+    assert result[0] == "BaSiC Flatfield Correction Plugin"
+
+
+def test_io_access(benchmark, plugin):
+    """Benchmark access to I/O values."""
+    assert benchmark(lambda: plugin.darkfield) is True
+
+
+def test_config(benchmark, plugin):
+    """Benchmark building the plugin config."""
+    config = benchmark(lambda: plugin._config)
+    assert config["_io_keys"]["darkfield"]["value"] is True
+
+
+def test_sweep(benchmark, plugin):
+    """Benchmark generating the configs of a sweep."""
+    grid = {"filePattern": [f"img_c{c}_x{{xx}}.tif" for c in range(1000)]}
+    grid["darkfield"] = [True, False]
+    grid["photobleach"] = [True, False]
+    configs = benchmark(lambda: list(plugin.sweep(grid)))
+    assert len(configs) == 4000  # noqa: PLR2004
+
+
+def test_docker_args(benchmark, plugin):
+    """Benchmark building the container arguments."""
+    args, mounts = benchmark(plugin._docker_args)
+    assert "--darkfield" in args
+
+
+def test_to_cwl(benchmark, plugin):
+    """Benchmark converting the plugin to a CWL CommandLineTool."""
+    clt = benchmark(plugin._to_cwl, False)
+    assert "inpDir" in clt["inputs"]
@@ -1,6 +1,7 @@
 # type: ignore
-# pylint: disable=W0621, W0613
+# pylint: disable=W0621, W0613, W0212
 """Tests for CWL utils."""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pydantic
@@ -8,7 +9,10 @@ import pytest
 import yaml
 
 import polus.tools.plugins as pp
+from polus.tools.plugins._plugins.classes import _load_plugin
+from polus.tools.plugins._plugins.classes import plugin_base
 from polus.tools.plugins._plugins.classes.plugin_base import MissingInputValuesError
+from polus.tools.plugins._plugins.cwl import CWL_BASE_DICT
 
 PYDANTIC_VERSION = pydantic.__version__.split(".")[0]
 RSRC_PATH = Path(__file__).parent.joinpath("resources")
@@ -103,3 +107,52 @@ def test_read_cwl_io(cwl_io, cwl_io_path):
     }
     assert src_io["filePattern"] == "img_r{rrr}_c{ccc}.tif"
     assert src_io["fileExtension"] == ".ome.zarr"
+
+
+def test_network_access_not_shared():
+    """Test `NetworkAccess` of a CLT does not leak to other CLTs."""
+    plugin1 = _load_plugin(OMECONVERTER)
+    plugin2 = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    assert "NetworkAccess" in plugin1._to_cwl(True)["requirements"]
+    assert "NetworkAccess" not in plugin2._to_cwl(False)["requirements"]
+    assert "NetworkAccess" not in plugin1._to_cwl(False)["requirements"]
+    assert CWL_BASE_DICT["inputs"] is None
+    assert CWL_BASE_DICT["requirements"]["DockerRequirement"]["dockerPull"] is None
+
+
+def test_to_cwl_independent():
+    """Test each CLT is an independent document."""
+    plugin = _load_plugin(OMECONVERTER)
+    clt = plugin._to_cwl(False)
+    clt["inputs"]["inpDir"]["type"] = "File"
+    clt["requirements"]["DockerRequirement"]["dockerPull"] = "other"
+    assert plugin._to_cwl(False)["inputs"]["inpDir"]["type"] == "Directory"
+    assert plugin.clt["requirements"]["DockerRequirement"]["dockerPull"] == (
+        plugin.containerId
+    )
+
+
+def test_save_cwl_cached(plug, tmp_path):
+    """Test saved CLTs are the YAML of the generated CLTs."""
+    for network_access in (False, True):
+        path = plug.save_cwl(tmp_path / "clt.cwl", network_access)
+        assert yaml.safe_load(path.read_text()) == plug._to_cwl(network_access)
+
+
+def test_to_cwl_concurrent():
+    """Test CLTs generated concurrently are the CLTs generated serially."""
+    plugins = [
+        _load_plugin(path)
+        for path in (OMECONVERTER, RSRC_PATH.joinpath("g1.json"))
+        for _ in range(20)
+    ]
+    jobs = [(plugin, bool(i % 2)) for i, plugin in enumerate(plugins * 5)]
+    plugin_base._CLT_CACHE.clear()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        clts = list(executor.map(lambda job: job[0]._to_cwl(job[1]), jobs))
+    plugin_base._CLT_CACHE.clear()
+    for (plugin, network_access), clt in zip(jobs, clts):
+        assert clt == plugin._build_cwl(network_access)
+        assert clt["requirements"]["DockerRequirement"]["dockerPull"] == (
+            plugin.containerId
+        )
@@ -0,0 +1,162 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613, W0212
+"""Tests for the in-process CWL executor, with a fake job executor."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from cwltool.factory import WorkflowStatus
+
+from polus.tools.plugins._plugins.classes import CWLExecutor, _load_plugin
+from polus.tools.plugins._plugins.classes import cwl_executor
+from polus.tools.plugins._plugins.classes.plugin_base import MissingInputValuesError
+from polus.tools.plugins._plugins.io._io import InvalidEnumValueError
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+
+
+class FakeJobExecutor:
+    """Record jobs instead of running them."""
+
+    def __init__(self, status="success"):
+        self.status = status
+        self.jobs = []
+
+    def __call__(self, process, job, runtime_context, **kwargs):
+        self.jobs.append((process, job, runtime_context.outdir))
+        return {"outDir": job["outDir"]}, self.status
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    plugin_.set_io(
+        inpDir=tmp_path,
+        outDir=tmp_path,
+        filePattern="img_{x}.tif",
+        fileExtension=".ome.tif",
+    )
+    return plugin_
+
+
+def test_executor_loads_once(plugin, tmp_path):
+    """Test the CLT is loaded once for many runs with different I/O."""
+    fake = FakeJobExecutor()
+    executor = CWLExecutor(executor=fake)
+    for pattern in ("a{x}", "b{x}", "c{x}"):
+        out = executor.run(plugin, {"filePattern": pattern})
+        assert out["outDir"]["location"] == str(tmp_path)
+    assert executor.loads == 1
+    assert [job["filePattern"] for _, job, _ in fake.jobs] == ["a{x}", "b{x}", "c{x}"]
+    assert len({id(process) for process, _, _ in fake.jobs}) == 1
+    assert all(outdir == str(tmp_path.parent) for _, _, outdir in fake.jobs)
+    assert plugin.filePattern == "img_{x}.tif"
+
+
+def test_executor_network_access(plugin):
+    """Test CLTs with and without network access are different tools."""
+    executor = CWLExecutor(executor=FakeJobExecutor())
+    tool = executor.tool(plugin)
+    other = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    assert executor.tool(other) is tool
+    network_tool = executor.tool(plugin, network_access=True)
+    assert network_tool is not tool
+    assert "NetworkAccess" in str(network_tool.t.requirements)
+    assert executor.loads == 2  # noqa: PLR2004
+
+
+def test_executor_batch(plugin, tmp_path):
+    """Test all I/O of a batch are validated before the first run."""
+    fake = FakeJobExecutor()
+    executor = CWLExecutor(tmp_path / "outputs", executor=fake)
+    ios = [{"fileExtension": ext} for ext in (".ome.tif", ".ome.zarr")]
+    outs = executor.run_batch(plugin, ios)
+    assert len(outs) == 2  # noqa: PLR2004
+    extensions = [job["fileExtension"] for _, job, _ in fake.jobs]
+    assert extensions == [".ome.tif", ".ome.zarr"]
+    assert all(outdir == str(tmp_path / "outputs") for _, _, outdir in fake.jobs)
+    with pytest.raises(InvalidEnumValueError):
+        executor.run_batch(
+            plugin,
+            [{"fileExtension": ".ome.tif"}, {"fileExtension": ".png"}],
+        )
+    assert len(fake.jobs) == 2  # noqa: PLR2004
+
+
+def test_executor_missing_input(tmp_path):
+    """Test required inputs must be set in the plugin or in the I/O."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    plugin.set_io(inpDir=tmp_path, outDir=tmp_path, fileExtension=".ome.tif")
+    executor = CWLExecutor(executor=FakeJobExecutor())
+    with pytest.raises(MissingInputValuesError):
+        executor.run(plugin, {"fileExtension": ".ome.zarr"})
+    assert executor.run(plugin, {"filePattern": "a{x}"})
+
+
+def test_executor_files(plugin, tmp_path, monkeypatch):
+    """Test files are only written when a directory is given."""
+    monkeypatch.chdir(tmp_path)
+    executor = CWLExecutor(executor=FakeJobExecutor())
+    executor.run(plugin)
+    plugin.run_cwl(executor=executor)
+    assert not list(tmp_path.glob("*.cwl")) + list(tmp_path.glob("*.yml"))
+    executor.run(plugin, save_dir=tmp_path / "saved")
+    assert sorted(p.name for p in tmp_path.joinpath("saved").iterdir()) == [
+        "OmeConverter.cwl",
+        "OmeConverter.yml",
+    ]
+
+
+def test_executor_failure(plugin):
+    """Test unsuccessful runs raise `WorkflowStatus`."""
+    executor = CWLExecutor(executor=FakeJobExecutor("permanentFail"))
+    with pytest.raises(WorkflowStatus):
+        executor.run(plugin)
+
+
+def test_executor_threads(plugin, tmp_path, monkeypatch):
+    """Test concurrent runs use their own job executor."""
+    executors = []
+    barrier = threading.Barrier(2, timeout=10)
+
+    class ConcurrentJobExecutor(FakeJobExecutor):
+        def __init__(self):
+            super().__init__()
+            executors.append(self)
+
+        def __call__(self, process, job, runtime_context, **kwargs):
+            barrier.wait()  # both runs are in progress
+            return super().__call__(process, job, runtime_context, **kwargs)
+
+    monkeypatch.setattr(cwl_executor, "SingleJobExecutor", ConcurrentJobExecutor)
+    executor = CWLExecutor()
+    out_dirs = [tmp_path / "out1", tmp_path / "out2"]
+    for out_dir in out_dirs:
+        out_dir.mkdir()
+    with ThreadPoolExecutor(2) as pool:
+        outs = list(
+            pool.map(lambda out: executor.run(plugin, {"outDir": out}), out_dirs),
+        )
+    assert [out["outDir"]["location"] for out in outs] == [str(o) for o in out_dirs]
+    assert len(executors) == 2  # noqa: PLR2004
+    assert all(len(job_executor.jobs) == 1 for job_executor in executors)
+
+
+def test_executor_shared_threads(plugin, tmp_path):
+    """Test runs of a given job executor do not overlap."""
+    active = []
+
+    class SerialJobExecutor(FakeJobExecutor):
+        def __call__(self, process, job, runtime_context, **kwargs):
+            active.append(job)
+            assert len(active) == 1
+            out = super().__call__(process, job, runtime_context, **kwargs)
+            active.pop()
+            return out
+
+    fake = SerialJobExecutor()
+    executor = CWLExecutor(executor=fake)
+    with ThreadPoolExecutor(4) as pool:
+        outs = list(pool.map(lambda _: executor.run(plugin), range(8)))
+    assert len(fake.jobs) == len(outs) == 8  # noqa: PLR2004
@@ -1,12 +1,20 @@
 # pylint: disable=C0103
 """IO Tests."""
+import os
 from pathlib import Path
 
 import pytest
 
-from polus.tools.plugins._plugins.classes import _load_plugin
+from polus.tools.plugins._plugins.classes import _load_plugin, check_plugin_paths
 from polus.tools.plugins._plugins.classes.plugin_base import IOKeyError
-from polus.tools.plugins._plugins.io import Input, IOBase
+from polus.tools.plugins._plugins.io import (
+    Input,
+    IOBase,
+    defer_path_checks,
+    get_path_cache,
+)
+from polus.tools.plugins._plugins.io import _paths as io_paths
+from polus.tools.plugins._plugins.io._io import InvalidEnumValueError, InvalidPathError
 
 RSRC_PATH = Path(__file__).parent.joinpath("resources")
 
@@ -55,3 +63,91 @@ def test_set_attr_valid1():
 def test_set_attr_valid2():
     """Test setting valid attribute."""
     plugin.darkfield = True
+
+
+def test_enum_type_shared():
+    """Test enum values from two plugin instances compare equal."""
+    manifest = RSRC_PATH.joinpath("omeconverter030.json")
+    plugin1, plugin2 = _load_plugin(manifest), _load_plugin(manifest)
+    plugin1.fileExtension = ".ome.zarr"
+    plugin2.fileExtension = ".ome.zarr"
+    value1 = plugin1._io_keys["fileExtension"].value  # pylint: disable=W0212
+    value2 = plugin2._io_keys["fileExtension"].value  # pylint: disable=W0212
+    assert value1 is value2
+    assert plugin1.fileExtension == ".ome.zarr"
+
+
+def test_enum_invalid_value():
+    """Test setting a value that is not in the enum."""
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    with pytest.raises(InvalidEnumValueError):
+        plugin_.fileExtension = ".png"
+
+
+@pytest.fixture
+def path_cache():
+    """Clear the path cache before and after the test."""
+    get_path_cache().clear()
+    yield get_path_cache()
+    get_path_cache().clear()
+
+
+def test_path_checked_once(path_cache, tmp_path, monkeypatch):
+    """Test a directory is checked once for many plugins."""
+    stats = []
+    stat = os.stat
+
+    def _stat(path, *args, **kwargs):
+        stats.append(path)
+        return stat(path, *args, **kwargs)
+
+    plugins = [_load_plugin(RSRC_PATH.joinpath("g1.json")) for _ in range(10)]
+    monkeypatch.setattr(io_paths.os, "stat", _stat)
+    for plugin_ in plugins:
+        plugin_.inpDir = tmp_path
+    assert stats == [str(tmp_path)]
+
+
+def test_path_missing(path_cache, tmp_path):
+    """Test missing directories are rejected, and not cached."""
+    with pytest.raises(InvalidPathError):
+        plugin.inpDir = tmp_path / "missing"
+    tmp_path.joinpath("missing").mkdir()
+    plugin.inpDir = tmp_path / "missing"
+    tmp_path.joinpath("file").touch()
+    with pytest.raises(InvalidPathError):
+        plugin.inpDir = tmp_path / "file"
+
+
+def test_defer_path_checks(path_cache, tmp_path):
+    """Test deferred checks happen when checking paths in batch."""
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    with defer_path_checks():
+        plugin_.outDir = tmp_path / "out"
+    with pytest.raises(InvalidPathError):
+        plugin_.check_paths()
+    tmp_path.joinpath("out").mkdir()
+    plugin_.check_paths()
+    assert plugin_.outDir == tmp_path / "out"
+
+
+def test_set_io(path_cache, tmp_path):
+    """Test setting several values at once."""
+    plugin_ = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin_.set_io(inpDir=tmp_path, outDir=tmp_path, darkfield=True)
+    assert plugin_.inpDir == tmp_path
+    with pytest.raises(InvalidPathError):
+        plugin_.set_io(inpDir=tmp_path / "missing")
+
+
+def test_check_plugin_paths(path_cache, tmp_path):
+    """Test checking the directories of many plugins at once."""
+    plugins = [_load_plugin(RSRC_PATH.joinpath("g1.json")) for _ in range(20)]
+    with defer_path_checks():
+        for n, plugin_ in enumerate(plugins):
+            plugin_.outDir = tmp_path / str(n % 5)
+    with pytest.raises(InvalidPathError):
+        check_plugin_paths(plugins)
+    for n in range(5):
+        tmp_path.joinpath(str(n)).mkdir()
+    check_plugin_paths(plugins)
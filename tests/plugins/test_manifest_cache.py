@@ -0,0 +1,244 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for the http manifest cache, against a local server."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+from polus.tools.plugins._plugins.manifests import (
+    ManifestCache,
+    ManifestNotCachedError,
+    _load_manifest,
+    set_manifest_cache,
+)
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class ManifestServer:
+    """Serve manifests with an ETag, and count requests."""
+
+    def __init__(self) -> None:
+        self.manifests = {
+            "/omeconverter022.json": RSRC_PATH.joinpath("omeconverter022.json").read_bytes(),
+            "/omeconverter030.json": RSRC_PATH.joinpath("omeconverter030.json").read_bytes(),
+        }
+        self.requests: list[tuple[str, int]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # silence the server
+                pass
+
+            def do_GET(self):  # noqa: N802
+                content = server.manifests.get(self.path)
+                if content is None:
+                    status = 404
+                elif self.headers.get("If-None-Match") == f'"{hash(content)}"':
+                    status = 304
+                else:
+                    status = 200
+                server.requests.append((self.path, status))
+                self.send_response(status)
+                if status == 200:  # noqa: PLR2004
+                    self.send_header("ETag", f'"{hash(content)}"')
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                else:
+                    self.end_headers()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+
+@pytest.fixture
+def server():
+    server = ManifestServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def test_cache_within_ttl(server, tmp_path):
+    """Test cached manifests are not requested again within the TTL."""
+    cache = ManifestCache(tmp_path, ttl=3600)
+    url = f"{server.url}/omeconverter022.json"
+    first = cache.get(url)
+    assert cache.get(url) == first
+    assert first["name"] == "OME Converter"
+    assert server.requests == [("/omeconverter022.json", 200)]
+
+
+def test_cache_revalidate(server, tmp_path):
+    """Test expired manifests are revalidated with a conditional request."""
+    cache = ManifestCache(tmp_path, ttl=0)
+    url = f"{server.url}/omeconverter022.json"
+    first = cache.get(url)
+    assert cache.get(url) == first
+    assert server.requests == [
+        ("/omeconverter022.json", 200),
+        ("/omeconverter022.json", 304),
+    ]
+
+
+def test_cache_modified(server, tmp_path):
+    """Test a modified manifest is downloaded again."""
+    cache = ManifestCache(tmp_path, ttl=0)
+    url = f"{server.url}/omeconverter022.json"
+    cache.get(url)
+    manifest = json.loads(server.manifests["/omeconverter022.json"])
+    manifest["description"] = "Modified"
+    server.manifests["/omeconverter022.json"] = json.dumps(manifest).encode()
+    assert cache.get(url)["description"] == "Modified"
+    assert [status for _, status in server.requests] == [200, 200]
+
+
+def test_cache_persistent(server, tmp_path):
+    """Test the cache is shared by instances using the same directory."""
+    url = f"{server.url}/omeconverter022.json"
+    ManifestCache(tmp_path).get(url)
+    ManifestCache(tmp_path).get(url)
+    assert len(server.requests) == 1
+
+
+def test_cache_content_addressed(server, tmp_path):
+    """Test identical manifests served from several urls are stored once."""
+    server.manifests["/copy.json"] = server.manifests["/omeconverter022.json"]
+    cache = ManifestCache(tmp_path)
+    cache.get(f"{server.url}/omeconverter022.json")
+    cache.get(f"{server.url}/copy.json")
+    assert len(cache.index["urls"]) == 2
+    assert len(cache.index["objects"]) == 1
+    assert len(list(tmp_path.joinpath("objects").rglob("*.json"))) == 1
+
+
+def test_cache_eviction(server, tmp_path):
+    """Test least recently used manifests are evicted beyond the size limit."""
+    size = len(server.manifests["/omeconverter030.json"])
+    cache = ManifestCache(tmp_path, max_size=size + 1)
+    old_url = f"{server.url}/omeconverter022.json"
+    new_url = f"{server.url}/omeconverter030.json"
+    cache.get(old_url)
+    cache.get(new_url)
+    assert list(cache.index["urls"]) == [new_url]
+    cache.get(old_url)
+    assert [status for _, status in server.requests] == [200, 200, 200]
+
+
+def test_cache_offline(server, tmp_path):
+    """Test the offline cache only serves cached manifests."""
+    url = f"{server.url}/omeconverter022.json"
+    ManifestCache(tmp_path).get(url)
+    offline = ManifestCache(tmp_path, ttl=0, offline=True)
+    assert offline.get(url)["name"] == "OME Converter"
+    with pytest.raises(ManifestNotCachedError):
+        offline.get(f"{server.url}/omeconverter030.json")
+    assert len(server.requests) == 1
+
+
+def test_cache_server_down(server, tmp_path):
+    """Test the cached copy is used if the server cannot be reached."""
+    cache = ManifestCache(tmp_path, ttl=0)
+    url = f"{server.url}/omeconverter022.json"
+    first = cache.get(url)
+    server.httpd.shutdown()
+    server.httpd.server_close()
+    assert cache.get(url) == first
+    with pytest.raises(requests.ConnectionError):
+        cache.get(f"{server.url}/omeconverter030.json")
+
+
+def _count_saves(cache, monkeypatch):
+    saves = []
+    save = cache._save_index
+
+    def _save():
+        saves.append(1)
+        save()
+
+    monkeypatch.setattr(cache, "_save_index", _save)
+    return saves
+
+
+def test_cache_hit_not_saved(server, tmp_path, monkeypatch):
+    """Test the index is only saved when it changed."""
+    cache = ManifestCache(tmp_path, ttl=3600)
+    saves = _count_saves(cache, monkeypatch)
+    url = f"{server.url}/omeconverter022.json"
+    cache.get(url)
+    for _ in range(5):
+        cache.get(url)
+    assert len(saves) == 1
+
+
+def test_cache_batch(server, tmp_path, monkeypatch):
+    """Test the index is saved once at the end of a batch."""
+    cache = ManifestCache(tmp_path)
+    saves = _count_saves(cache, monkeypatch)
+    with cache.batch():
+        cache.get(f"{server.url}/omeconverter022.json")
+        cache.get(f"{server.url}/omeconverter030.json")
+        assert saves == []
+    assert len(saves) == 1
+    assert len(ManifestCache(tmp_path).index["urls"]) == 2
+
+
+def test_cache_missing_object(server, tmp_path):
+    """Test the record of a deleted object is dropped with its url."""
+    cache = ManifestCache(tmp_path)
+    url = f"{server.url}/omeconverter022.json"
+    cache.get(url)
+    (digest,) = cache.index["objects"]
+    cache._object_path(digest).unlink()
+    assert cache.get(url)["name"] == "OME Converter"
+    assert list(cache.index["objects"]) == [digest]
+    assert cache._object_path(digest).exists()
+    cache._object_path(digest).unlink()
+    assert cache._read(url) is None
+    assert cache.index["objects"] == {}
+    assert cache.index["urls"] == {}
+
+
+def test_cache_not_writable(server, tmp_path):
+    """Test manifests are returned when the cache cannot be written."""
+    tmp_path.joinpath("file").write_text("")
+    cache = ManifestCache(tmp_path / "file" / "cache")
+    url = f"{server.url}/omeconverter022.json"
+    assert cache.get(url)["name"] == "OME Converter"
+    assert cache.get(url)["name"] == "OME Converter"
+    assert cache.index["urls"] == {}
+    assert len(server.requests) == 2  # noqa: PLR2004
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["file"]
+
+
+def test_cache_invalid_json(server, tmp_path):
+    """Test responses that are not json are not cached."""
+    cache = ManifestCache(tmp_path)
+    url = f"{server.url}/bad.json"
+    server.manifests["/bad.json"] = b"<html>maintenance</html>"
+    with pytest.raises(ValueError):
+        cache.get(url)
+    assert cache.index["urls"] == {}
+    assert not tmp_path.joinpath("objects").exists()
+    server.manifests["/bad.json"] = server.manifests["/omeconverter022.json"]
+    assert cache.get(url)["name"] == "OME Converter"
+
+
+def test_load_manifest_url(server, tmp_path):
+    """Test manifests loaded from urls go through the manifest cache."""
+    set_manifest_cache(ManifestCache(tmp_path))
+    try:
+        url = f"{server.url}/omeconverter022.json"
+        assert _load_manifest(url) == _load_manifest(url)
+    finally:
+        set_manifest_cache(None)
+    assert len(server.requests) == 1
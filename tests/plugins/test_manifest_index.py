@@ -0,0 +1,115 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for the persistent manifest index."""
+import json
+from pathlib import Path
+
+import pytest
+
+import polus.tools.plugins as pp
+from polus.tools.plugins._plugins.classes import PLUGINS, _refresh
+from polus.tools.plugins._plugins.classes import plugin_classes
+from polus.tools.plugins._plugins.manifests import ManifestIndex
+from polus.tools.plugins._plugins.manifests import manifest_validation
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+OMECONVERTER = RSRC_PATH.joinpath("omeconverter022.json")
+
+
+@pytest.fixture
+def omeconverter():
+    """Submit OmeConverter to an empty database."""
+    pp.remove_all()
+    pp.submit_plugin(OMECONVERTER)
+    return pp.OmeConverter.versions[0]
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """Record manifests validated during the test."""
+    calls = []
+    validate = manifest_validation.validate_manifest
+
+    def _validate(manifest):
+        calls.append(manifest)
+        return validate(manifest)
+
+    monkeypatch.setattr(manifest_validation, "validate_manifest", _validate)
+    return calls
+
+
+def _index():
+    return ManifestIndex(plugin_classes._PLUGIN_DIR, plugin_classes._INDEX_PATH).load()
+
+
+def _manifest_path(version):
+    return PLUGINS["OmeConverter"][version]
+
+
+def test_index_written(omeconverter):
+    """Test the index records submitted manifests."""
+    index = _index()
+    assert index.path.exists()
+    key = _manifest_path(omeconverter).relative_to(index.plugin_dir).as_posix()
+    assert index.entries[key]["name"] == "OmeConverter"
+    assert index.entries[key]["version"] == "0.2.2"
+
+
+def test_refresh_from_index(omeconverter, validated):
+    """Test unchanged manifests are not validated again."""
+    _refresh()
+    assert validated == []
+    assert pp.list == ["OmeConverter"]
+    assert list(PLUGINS["OmeConverter"]) == ["0.2.2"]
+
+
+def test_refresh_modified_manifest(omeconverter, validated):
+    """Test modified manifests are validated again."""
+    path = _manifest_path(omeconverter)
+    with path.open("r", encoding="utf-8") as file:
+        manifest = json.load(file)
+    manifest["name"] = "OME Converter Modified"
+    with path.open("w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    _refresh()
+    assert validated == [path]
+    assert pp.list == ["OmeConverterModified"]
+
+
+def test_refresh_deleted_manifest(omeconverter):
+    """Test entries of deleted manifests are dropped."""
+    _manifest_path(omeconverter).unlink()
+    _refresh()
+    assert pp.list == []
+    assert _index().entries == {}
+
+
+def test_refresh_invalid_manifest(omeconverter, validated):
+    """Test invalid manifests are recorded and not validated again."""
+    path = _manifest_path(omeconverter).with_name("Invalid_M0m0p1.json")
+    path.write_text("{}", encoding="utf-8")
+    _refresh(supress_warnings=True)
+    _refresh(supress_warnings=True)
+    assert validated == [path]
+    assert pp.list == ["OmeConverter"]
+    path.unlink()
+
+
+def test_refresh_unexpected_error(omeconverter, validated, monkeypatch):
+    """Test manifests that could not be validated are validated again."""
+    path = _manifest_path(omeconverter)
+    path.touch()
+    validate = manifest_validation.validate_manifest
+
+    def _unreadable(manifest):
+        validated.append(manifest)
+        msg = "unreadable"
+        raise OSError(msg)
+
+    monkeypatch.setattr(manifest_validation, "validate_manifest", _unreadable)
+    _refresh(supress_warnings=True)
+    assert pp.list == []
+    monkeypatch.setattr(manifest_validation, "validate_manifest", validate)
+    _refresh(supress_warnings=True)
+    assert validated == [path, path]
+    assert pp.list == ["OmeConverter"]
@@ -10,6 +10,7 @@ from polus.tools.plugins._plugins.manifests import (
     InvalidManifestError,
     _load_manifest,
     validate_manifest,
+    validate_manifests,
 )
 from polus.tools.plugins._plugins.models import WIPPPluginManifest
 
@@ -220,3 +221,15 @@ def test_good_manifest(manifest):
     """Test different manifests that all should pass validation."""
     p = RSRC_PATH.joinpath(manifest)
     assert isinstance(validate_manifest(p), WIPPPluginManifest)
+
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["serial", "pool"])
+def test_validate_manifests(workers):
+    """Test bulk validation returns results in order, with errors."""
+    manifests = [RSRC_PATH.joinpath(m) for m in good + bad] * 5
+    results = validate_manifests(manifests, max_workers=workers, chunksize=4)
+    assert [r.manifest for r in results] == manifests
+    assert [r.valid for r in results] == ([True] * 3 + [False] * 3) * 5
+    assert all(r.invalid for r in results if not r.valid)
+    assert all(isinstance(r.plugin, WIPPPluginManifest) for r in results if r.valid)
+    assert results[0].name == validate_manifest(manifests[0]).name
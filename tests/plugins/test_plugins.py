@@ -1,12 +1,21 @@
 # type: ignore
 # pylint: disable=C0116, W0621, W0613
 """Plugin Object Tests."""
+import json
+import pickle
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
 
 import polus.tools.plugins as pp
-from polus.tools.plugins._plugins.classes import Plugin, _load_plugin
+from polus.tools.plugins._plugins.classes import PLUGINS, Plugin, _load_plugin
+from polus.tools.plugins._plugins.classes import plugin_classes
+from polus.tools.plugins._plugins.classes.plugin_base import IOKeyError
+from polus.tools.plugins._plugins.io._io import InvalidEnumValueError
+from polus.tools.plugins._plugins.manifests import InvalidManifestError
+from polus.tools.plugins._plugins.manifests import manifest_validation
 
 RSRC_PATH = Path(__file__).parent.joinpath("resources")
 OMECONVERTER = RSRC_PATH.joinpath("omeconverter022.json")
@@ -214,3 +223,267 @@ def test_remove_all(submit_basic131, submit_basic127, submit_omeconverter):
     """Test remove_all."""
     pp.remove_all()
     assert pp.list == []
+
+
+def test_import_does_not_scan_registry():
+    """Test importing the package does not build the registry."""
+    code = (
+        "from polus.tools.plugins._plugins.classes import plugin_classes\n"
+        "import polus.tools.plugins\n"
+        "assert not plugin_classes._PLUGINS_LOADED\n"
+        "assert plugin_classes.PLUGINS == {}\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)  # noqa: S603
+
+
+def test_invalidate_registry(submit_omeconverter):
+    """Test the registry is built again after being invalidated."""
+    pp.invalidate_registry()
+    assert PLUGINS == {}
+    assert pp.list == ["OmeConverter"]
+    assert "OmeConverter" in PLUGINS
+
+
+OMECONVERTER030 = RSRC_PATH.joinpath("omeconverter030.json")
+
+
+def test_submit_plugins(remove_all):
+    """Test submitting several plugins at once."""
+    plugins = pp.submit_plugins([OMECONVERTER, OMECONVERTER030])
+    assert [str(p.version) for p in plugins] == ["0.2.2", "0.3.0"]
+    assert pp.list == ["OmeConverter"]
+    assert sorted(pp.OmeConverter.versions) == ["0.2.2", "0.3.0"]
+
+
+def test_submit_plugins_invalid(remove_all):
+    """Test nothing is saved if one of the manifests is invalid."""
+    with pytest.raises(InvalidManifestError):
+        pp.submit_plugins([OMECONVERTER, RSRC_PATH.joinpath("b1.json")])
+    assert pp.list == []
+
+
+def test_submit_plugins_validated_once(remove_all, monkeypatch):
+    """Test submitted manifests are not validated again once saved."""
+    validated = []
+    validate = manifest_validation.validate_manifest
+
+    def _validate(manifest):
+        validated.append(manifest)
+        return validate(manifest)
+
+    monkeypatch.setattr(manifest_validation, "validate_manifest", _validate)
+    pp.submit_plugins([OMECONVERTER, OMECONVERTER030, OMECONVERTER])
+    assert validated == [OMECONVERTER, OMECONVERTER030, OMECONVERTER]
+    pp.invalidate_registry()
+    assert sorted(pp.OmeConverter.versions) == ["0.2.2", "0.3.0"]
+    assert len(validated) == 3  # noqa: PLR2004
+
+
+def test_remove_plugin_duplicate_versions(remove_all):
+    """Test a version listed twice is removed once."""
+    pp.submit_plugins([OMECONVERTER, OMECONVERTER030])
+    pp.remove_plugin("OmeConverter", ["0.2.2", "0.2.2"])
+    assert pp.OmeConverter.versions == ["0.3.0"]
+
+
+def test_submit_remove_incremental(remove_all, monkeypatch):
+    """Test submit and remove do not validate the rest of the registry."""
+    pp.submit_plugin(OMECONVERTER)
+    monkeypatch.setattr(
+        plugin_classes,
+        "_refresh",
+        lambda *args, **kwargs: pytest.fail("registry was refreshed"),
+    )
+    pp.submit_plugin(OMECONVERTER030)
+    assert sorted(pp.OmeConverter.versions) == ["0.2.2", "0.3.0"]
+    pp.remove_plugin("OmeConverter", "0.2.2")
+    assert pp.OmeConverter.versions == ["0.3.0"]
+    pp.remove_plugin("OmeConverter")
+    assert pp.list == []
+    pp.invalidate_registry()
+    monkeypatch.undo()
+    assert pp.list == []
+
+
+def test_get_plugin_cached(submit_omeconverter):
+    """Test plugins are created from a cached template."""
+    plugin_classes._plugin_template.cache_clear()
+    plug1 = pp.get_plugin("OmeConverter")
+    plug2 = pp.get_plugin("OmeConverter")
+    assert plugin_classes._plugin_template.cache_info().hits == 1
+    assert plug1.id != plug2.id
+    assert plug1.inputs[0] is not plug2.inputs[0]
+    assert plug1.manifest == plug2.manifest
+    plug1.filePatter = "img_r{rrr}_c{ccc}.tif"
+    assert plug1.filePatter == "img_r{rrr}_c{ccc}.tif"
+    assert plug2.filePatter is None
+    assert pp.get_plugin("OmeConverter").filePatter is None
+
+
+@pytest.fixture
+def submit_omeconverter_versions(remove_all):
+    return pp.submit_plugins([OMECONVERTER, OMECONVERTER030, OMECONVERTERDEV])
+
+
+@pytest.mark.parametrize(
+    ("spec", "prerelease", "version"),
+    [
+        ("^0.3", False, "0.3.0"),
+        ("^0.3", True, "0.3.2-dev0"),
+        ("~0.2", False, "0.2.2"),
+        (">=0.2.2, <0.3.0", False, "0.2.2"),
+        (">=0.3.2-dev0", False, "0.3.2-dev0"),
+        ("!=0.3.0, <0.3.2", False, "0.2.2"),
+        ("*", False, "0.3.0"),
+    ],
+)
+def test_get_plugin_spec(submit_omeconverter_versions, spec, prerelease, version):
+    """Test getting the latest version in a range."""
+    plugin = pp.get_plugin("OmeConverter", spec=spec, prerelease=prerelease)
+    assert plugin.version == version
+
+
+def test_get_plugin_spec_no_match(submit_omeconverter_versions):
+    """Test getting a plugin from a range with no local version."""
+    with pytest.raises(KeyError):
+        pp.get_plugin("OmeConverter", spec="^1")
+    with pytest.raises(ValueError):
+        pp.get_plugin("OmeConverter", version="0.3.0", spec="^0.3")
+
+
+def test_get_plugin_spec_remove(submit_omeconverter_versions):
+    """Test ranges are resolved against the registry after a removal."""
+    pp.remove_plugin("OmeConverter", "0.3.0")
+    plugin = pp.get_plugin("OmeConverter", spec="^0.3", prerelease=True)
+    assert plugin.version == "0.3.2-dev0"
+    with pytest.raises(KeyError):
+        pp.get_plugin("OmeConverter", spec="^0.3")
+    assert pp.get_plugin("OmeConverter").version == "0.3.2-dev0"
+
+
+def test_docker_args(tmp_path):
+    """Test container arguments and mounts of a configured plugin."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    inp_dir = tmp_path.joinpath("inp")
+    inp_dir.mkdir()
+    plugin.inpDir = inp_dir
+    plugin.outDir = tmp_path
+    plugin.darkfield = True
+    args, mounts = plugin._docker_args()
+    assert args == [
+        "--inpDir",
+        "/data/inputs/input0",
+        "--darkfield",
+        "True",
+        "--outDir",
+        "/data/outputs/output0",
+    ]
+    assert mounts == [
+        [f"type=bind,source={inp_dir},target=/data/inputs/input0,readonly"],
+        [f"type=bind,source={tmp_path},target=/data/outputs/output0"],
+    ]
+
+
+def test_plugin_cli_spec():
+    """Test plugins of the same version share their compiled arguments."""
+    plugin1 = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin2 = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    generic = Plugin(**json.loads(RSRC_PATH.joinpath("g1.json").read_text()))
+    assert type(plugin1) is Plugin
+    assert plugin1._cli_spec is plugin2._cli_spec
+    assert generic._cli_spec is plugin1._cli_spec
+    assert repr(plugin1).startswith("Plugin(")
+
+
+def test_plugin_pickle(tmp_path):
+    """Test configured plugins survive a pickle round trip."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin.inpDir = tmp_path
+    plugin.outDir = tmp_path
+    plugin.photobleach = False
+    plugin_ = pickle.loads(pickle.dumps(plugin))
+    assert plugin_.id == plugin.id
+    assert plugin_.inpDir == plugin.inpDir
+    assert plugin_._docker_args() == plugin._docker_args()
+    plugin_.photobleach = True
+    assert plugin.photobleach is False
+
+
+def test_sweep_grid(tmp_path):
+    """Test a grid sweep generates all combinations of values."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    plugin.inpDir = tmp_path
+    configs = plugin.sweep(
+        {"fileExtension": [".ome.tif", ".ome.zarr"], "filePattern": ["a", "b", "c"]},
+    )
+    values = [
+        (c["_io_keys"]["fileExtension"]["value"], c["_io_keys"]["filePattern"]["value"])
+        for c in configs
+    ]
+    assert values == [
+        (".ome.tif", "a"),
+        (".ome.tif", "b"),
+        (".ome.tif", "c"),
+        (".ome.zarr", "a"),
+        (".ome.zarr", "b"),
+        (".ome.zarr", "c"),
+    ]
+    assert plugin.filePattern is None
+
+
+def test_sweep_list(tmp_path):
+    """Test a sweep from a list of values, with configs loaded back."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    plugin.inpDir = tmp_path
+    params = [
+        {"filePattern": "a", "fileExtension": ".ome.tif"},
+        {"filePattern": "b", "fileExtension": ".ome.zarr", "outDir": tmp_path},
+    ]
+    configs = list(plugin.sweep(params))
+    plugin.filePattern = "b"
+    plugin.fileExtension = ".ome.zarr"
+    plugin.outDir = tmp_path
+    assert configs[0]["id"] != configs[1]["id"]
+    assert {**configs[1], "id": None} == {**plugin._config, "id": None}
+    loaded = pp.load_config(configs[0])
+    assert loaded.filePattern == "a"
+    assert loaded.fileExtension == ".ome.tif"
+    assert loaded.inpDir == tmp_path
+    assert loaded.id != pp.load_config(configs[1]).id
+
+
+def test_sweep_files(tmp_path):
+    """Test saved sweep configs are the generated configs."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    grid = {"darkfield": [True, False], "groupBy": ["c", "t"]}
+    paths = list(plugin.sweep(grid, path=tmp_path.joinpath("configs")))
+    assert [p.name for p in paths] == [
+        f"BasicFlatfieldCorrectionPlugin_{n}.json" for n in range(4)
+    ]
+    saved = [json.loads(p.read_text()) for p in paths]
+    assert len({config["id"] for config in saved}) == 4  # noqa: PLR2004
+    assert [{**c, "id": None} for c in saved] == [
+        {**c, "id": None} for c in plugin.sweep(grid)
+    ]
+    assert pp.load_config(paths[1]).groupBy == "t"
+    assert pp.load_config(paths[0]).id != pp.load_config(paths[1]).id
+
+
+def test_sweep_invalid():
+    """Test invalid sweep values are reported before any config is generated."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("omeconverter030.json"))
+    with pytest.raises(InvalidEnumValueError):
+        plugin.sweep({"fileExtension": [".ome.tif", ".png"]})
+    with pytest.raises(IOKeyError):
+        plugin.sweep([{"fileExtension": ".ome.tif"}, {"notAnIO": 1}])
+
+
+def test_io_attribute():
+    """Test I/O values and plugin attributes are both attributes."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    assert plugin.darkfield is None
+    plugin.darkfield = True
+    assert plugin.darkfield is True
+    assert plugin.version == "1.2.7"
+    with pytest.raises(AttributeError):
+        plugin.notAnInput  # noqa: B018
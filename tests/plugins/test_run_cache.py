@@ -0,0 +1,166 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613, W0212
+"""Tests for the cache of plugin runs."""
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from polus.tools.plugins._plugins.classes import RunCache, _load_plugin
+from polus.tools.plugins._plugins.classes.plugin_base import BasePlugin
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Replace containers by writing the file pattern in the output directory."""
+    runs_ = []
+
+    def run_container(self, gpus, **kwargs):
+        runs_.append(self)
+        self.outDir.joinpath("sub").mkdir(exist_ok=True)
+        self.outDir.joinpath("sub", "out.txt").write_text(self.filePattern)
+
+    monkeypatch.setattr(BasePlugin, "_run_container", run_container)
+    return runs_
+
+
+@pytest.fixture
+def inp_dir(tmp_path):
+    inp_dir_ = tmp_path.joinpath("inp")
+    inp_dir_.mkdir()
+    inp_dir_.joinpath("img.tif").write_bytes(b"pixels")
+    return inp_dir_
+
+
+def _plugin(inp_dir, out_dir, file_pattern="img_{x}.tif"):
+    out_dir.mkdir(exist_ok=True)
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    plugin.set_io(
+        inpDir=inp_dir,
+        outDir=out_dir,
+        filePattern=file_pattern,
+        darkfield=True,
+        photobleach=True,
+    )
+    return plugin
+
+
+def test_run_cache_hit(runs, inp_dir, tmp_path):
+    """Test a run with the same inputs restores the recorded outputs."""
+    cache = RunCache(tmp_path.joinpath("cache"))
+    _plugin(inp_dir, tmp_path / "out1").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out2").run(cache=cache)
+    assert len(runs) == 1
+    assert tmp_path.joinpath("out2", "sub", "out.txt").read_text() == "img_{x}.tif"
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert stats["runs"] == 1
+    assert stats["size"] == len("img_{x}.tif")
+
+
+def test_run_cache_persistent(runs, inp_dir, tmp_path):
+    """Test cached runs are shared by instances using the same directory."""
+    _plugin(inp_dir, tmp_path / "out1").run(cache=RunCache(tmp_path / "cache"))
+    _plugin(inp_dir, tmp_path / "out2").run(cache=RunCache(tmp_path / "cache"))
+    assert len(runs) == 1
+
+
+def test_run_cache_miss(runs, inp_dir, tmp_path):
+    """Test modified parameters or input files are run again."""
+    cache = RunCache(tmp_path.joinpath("cache"))
+    _plugin(inp_dir, tmp_path / "out").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out", "other_{x}.tif").run(cache=cache)
+    inp_dir.joinpath("img.tif").write_bytes(b"other pixels")
+    _plugin(inp_dir, tmp_path / "out").run(cache=cache)
+    assert len(runs) == 3  # noqa: PLR2004
+    assert cache.stats["misses"] == 3  # noqa: PLR2004
+
+
+def test_run_cache_fingerprint(inp_dir, tmp_path):
+    """Test mtime fingerprints change when files are touched, not content ones."""
+    plugin = _plugin(inp_dir, tmp_path / "out")
+    mtime_cache = RunCache(tmp_path / "cache", fingerprint="mtime")
+    content_cache = RunCache(tmp_path / "cache", fingerprint="content")
+    mtime_key = mtime_cache.key(plugin)
+    content_key = content_cache.key(plugin)
+    stat = inp_dir.joinpath("img.tif").stat()
+    os.utime(inp_dir / "img.tif", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert mtime_cache.key(plugin) != mtime_key
+    assert content_cache.key(plugin) == content_key
+    # content keys do not depend on the location of the inputs
+    shutil.copytree(inp_dir, tmp_path / "copy")
+    assert content_cache.key(_plugin(tmp_path / "copy", tmp_path / "out")) == content_key
+
+
+def test_run_cache_link(runs, inp_dir, tmp_path):
+    """Test restored outputs can be links to the cache."""
+    cache = RunCache(tmp_path.joinpath("cache"), link=True)
+    _plugin(inp_dir, tmp_path / "out1").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out2").run(cache=cache)
+    restored = tmp_path.joinpath("out2", "sub", "out.txt")
+    assert restored.is_symlink()
+    assert restored.resolve().is_relative_to(tmp_path / "cache")
+    # linked runs are neither expired nor evicted, the links stay valid
+    cache.max_age = 0
+    cache.max_size = 0
+    cache.evict()
+    _plugin(inp_dir, tmp_path / "out3", "other_{x}.tif").run(cache=cache)
+    assert cache.stats["runs"] == 1
+    assert restored.read_text() == "img_{x}.tif"
+    _plugin(inp_dir, tmp_path / "out4").run(cache=cache)
+    assert len(runs) == 2  # noqa: PLR2004
+
+
+def test_run_cache_new_outputs(runs, inp_dir, tmp_path):
+    """Test files already in the output directory are not recorded."""
+    cache = RunCache(tmp_path.joinpath("cache"))
+    plugin = _plugin(inp_dir, tmp_path / "out1")
+    tmp_path.joinpath("out1", "old.txt").write_text("previous run")
+    plugin.run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out2").run(cache=cache)
+    assert sorted(p.name for p in tmp_path.joinpath("out2").rglob("*")) == [
+        "out.txt",
+        "sub",
+    ]
+    assert cache.stats["size"] == len("img_{x}.tif")
+
+
+def test_run_cache_eviction(runs, inp_dir, tmp_path):
+    """Test least recently used runs are evicted beyond the size limit."""
+    cache = RunCache(tmp_path.joinpath("cache"), max_size=len("a{x}") + 1)
+    _plugin(inp_dir, tmp_path / "out", "a{x}").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out", "b{x}").run(cache=cache)
+    assert cache.stats["runs"] == 1
+    assert cache.stats["evictions"] == 1
+    assert not list(tmp_path.joinpath("cache", "runs").rglob("*.tmp"))
+    _plugin(inp_dir, tmp_path / "out", "b{x}").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out", "a{x}").run(cache=cache)
+    assert len(runs) == 3  # noqa: PLR2004
+
+
+def test_run_cache_expired(runs, inp_dir, tmp_path):
+    """Test runs older than the maximum age are not restored."""
+    cache = RunCache(tmp_path.joinpath("cache"), max_age=0)
+    _plugin(inp_dir, tmp_path / "out").run(cache=cache)
+    _plugin(inp_dir, tmp_path / "out").run(cache=cache)
+    assert len(runs) == 2  # noqa: PLR2004
+    assert cache.stats["hits"] == 0
+
+
+def test_run_cache_expired_saved(runs, inp_dir, tmp_path):
+    """Test runs expired on restore are removed from the saved index."""
+    plugin = _plugin(inp_dir, tmp_path / "out")
+    plugin.run(cache=RunCache(tmp_path / "cache"))
+    cache = RunCache(tmp_path / "cache", max_age=0)
+    assert not cache.restore(cache.key(plugin), plugin)
+    assert RunCache(tmp_path / "cache").stats["runs"] == 0
+
+
+def test_run_without_cache(runs, inp_dir, tmp_path):
+    """Test runs are not cached by default."""
+    _plugin(inp_dir, tmp_path / "out").run()
+    _plugin(inp_dir, tmp_path / "out").run()
+    assert len(runs) == 2  # noqa: PLR2004
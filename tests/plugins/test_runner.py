@@ -0,0 +1,181 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for PluginRunner, with a fake docker client."""
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from polus.tools.plugins._plugins.classes import (
+    PluginRunner,
+    RunStatus,
+    _load_plugin,
+)
+from polus.tools.plugins._plugins.classes.plugin_base import (
+    MissingInputValuesError,
+    container_name,
+)
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+
+
+class FakeDocker:
+    """Fake `python_on_whales.docker` running containers for `duration` seconds.
+
+    Containers of plugins with the file pattern `fail` exit with 1.
+    If `duration` is `None`, containers run until they are killed.
+    """
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.containers = {}
+        self.running = 0
+        self.max_running = 0
+        self.killed = []
+        self.removed = []
+
+    def run(self, image, args, name, mounts, detach, **kwargs):
+        assert detach
+        with self.lock:
+            if name in self.containers:
+                raise RuntimeError(f"Conflict, container name {name} in use")
+            exit_code = 1 if "fail" in args else 0
+            self.containers[name] = {
+                "image": image,
+                "args": args,
+                "mounts": mounts,
+                "kwargs": kwargs,
+                "exit_code": exit_code,
+                "done": threading.Event(),
+            }
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def logs(self, name, follow, stream):
+        container = self.containers[name]
+        yield ("stdout", f"{container['image']} {' '.join(container['args'])}\n".encode())
+        container["done"].wait(self.duration)
+        yield ("stderr", b"done\n")
+
+    def wait(self, name):
+        self.containers[name]["done"].wait(self.duration)
+        with self.lock:
+            self.running -= 1
+        return self.containers[name]["exit_code"]
+
+    def kill(self, name):
+        self.killed.append(name)
+        self.containers[name]["exit_code"] = 137
+        self.containers[name]["done"].set()
+
+    def remove(self, name, force):
+        self.removed.append(name)
+
+
+def _plugins(tmp_path, n):
+    plugins = []
+    for i in range(n):
+        plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+        plugin.set_io(
+            inpDir=tmp_path,
+            outDir=tmp_path,
+            filePattern=f"img{i}_{{x}}.tif",
+            darkfield=True,
+            photobleach=True,
+        )
+        plugins.append(plugin)
+    return plugins
+
+
+def test_runner(tmp_path):
+    """Test plugins are run concurrently with at most `max_containers`."""
+    client = FakeDocker()
+    runner = PluginRunner(max_containers=2, log_dir=tmp_path / "logs", client=client)
+    plugins = _plugins(tmp_path, 6)
+    results = runner.run(plugins)
+    assert [r.plugin for r in results] == plugins
+    assert all(r.status == RunStatus.SUCCEEDED and r.exit_code == 0 for r in results)
+    assert client.max_running == 2  # noqa: PLR2004
+    names = [r.container_name for r in results]
+    assert len(set(names)) == 6  # noqa: PLR2004
+    assert sorted(client.removed) == sorted(names)
+    for i, result in enumerate(results):
+        assert result.duration >= client.duration
+        log = result.log_path.read_text()
+        assert f"--filePattern img{i}_{{x}}.tif" in log
+        assert log.endswith("done\n")
+
+
+def test_runner_failure(tmp_path):
+    """Test failed containers are reported in the results."""
+    plugins = _plugins(tmp_path, 3)
+    plugins[1].filePattern = "fail"
+    results = PluginRunner(client=FakeDocker(), log_dir=tmp_path).run(plugins)
+    assert [r.status for r in results] == [
+        RunStatus.SUCCEEDED,
+        RunStatus.FAILED,
+        RunStatus.SUCCEEDED,
+    ]
+    assert results[1].exit_code == 1
+    assert not results[1].ok
+
+
+def test_runner_resources(tmp_path):
+    """Test containers are started within the CPU and memory limits."""
+    client = FakeDocker()
+    runner = PluginRunner(
+        max_containers=8,
+        cpus=8,
+        memory="1g",
+        log_dir=tmp_path,
+        client=client,
+    )
+    runner.run(_plugins(tmp_path, 6), cpus=2, memory="512m")
+    assert client.max_running == 2  # noqa: PLR2004
+    for container in client.containers.values():
+        assert container["kwargs"] == {"cpus": 2, "memory": 512 * 1024**2}
+    with pytest.raises(ValueError, match="CPUs"):
+        runner.run(_plugins(tmp_path, 1), cpus=16)
+
+
+def test_runner_cancel(tmp_path):
+    """Test cancelling a batch kills running containers and skips the others."""
+    client = FakeDocker(duration=None)
+    runner = PluginRunner(max_containers=2, log_dir=tmp_path, client=client)
+    plugins = _plugins(tmp_path, 5)
+
+    def cancel():
+        deadline = time.monotonic() + 10
+        while client.running < 2 and time.monotonic() < deadline:  # noqa: PLR2004
+            time.sleep(0.01)
+        runner.cancel()
+
+    thread = threading.Thread(target=cancel)
+    thread.start()
+    results = runner.run(plugins)
+    thread.join()
+    assert all(r.status == RunStatus.CANCELLED for r in results)
+    started = [r for r in results if r.started is not None]
+    assert sorted(client.killed) == sorted(r.container_name for r in started)
+    assert all(r.exit_code == 137 for r in started)  # noqa: PLR2004
+    assert len(started) == 2  # noqa: PLR2004
+
+
+def test_runner_missing_input(tmp_path):
+    """Test no container is started if a plugin is not configured."""
+    client = FakeDocker()
+    plugins = _plugins(tmp_path, 2)
+    plugins.append(_load_plugin(RSRC_PATH.joinpath("g1.json")))
+    with pytest.raises(MissingInputValuesError):
+        PluginRunner(client=client, log_dir=tmp_path).run(plugins)
+    assert not client.containers
+
+
+def test_container_name():
+    """Test container names are unique and valid Docker names."""
+    plugin = _load_plugin(RSRC_PATH.joinpath("g1.json"))
+    names = {container_name(plugin) for _ in range(1000)}
+    assert len(names) == 1000  # noqa: PLR2004
+    assert all(n.startswith("polus-basicflatfieldcorrectionplugin-") for n in names)
@@ -0,0 +1,200 @@
+# type: ignore
+# pylint: disable=C0116, W0621, W0613
+"""Tests for the GitHub manifest scraper, against a local stand-in server."""
+import base64
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from polus.tools.plugins._plugins.manifests import ManifestScraper
+
+RSRC_PATH = Path(__file__).parent.joinpath("resources")
+REPO = "polusai/image-tools"
+
+
+class FakeGitHub:
+    """Minimal git trees/blobs API for a repository held in memory."""
+
+    def __init__(self, files: dict[str, bytes]) -> None:
+        self.files = files
+        self.requests: list[str] = []
+        self.failing: set[str] = set()
+
+    def blobs(self) -> dict[str, bytes]:
+        return {hashlib.sha1(c).hexdigest(): c for c in self.files.values()}  # noqa: S324
+
+    def tree(self) -> dict:
+        return {
+            "sha": "root",
+            "truncated": False,
+            "tree": [
+                {"path": p, "type": "blob", "sha": hashlib.sha1(c).hexdigest()}  # noqa: S324
+                for p, c in self.files.items()
+            ],
+        }
+
+    def handler(self) -> type:
+        github = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # silence the server
+                pass
+
+            def _json(self, content, etag=None):
+                if etag is not None and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = json.dumps(content).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # noqa: N802
+                github.requests.append(self.path)
+                if self.path == f"/repos/{REPO}":
+                    self._json({"default_branch": "master"}, etag='"repo"')
+                elif self.path == f"/repos/{REPO}/git/trees/master?recursive=1":
+                    tree = github.tree()
+                    etag = hashlib.sha1(json.dumps(tree).encode()).hexdigest()  # noqa: S324
+                    self._json(tree, etag=f'"{etag}"')
+                elif self.path.startswith(f"/repos/{REPO}/git/blobs/"):
+                    sha = self.path.rsplit("/", 1)[-1]
+                    if sha in github.failing:
+                        self.send_response(500)
+                        self.end_headers()
+                        return
+                    content = base64.b64encode(github.blobs()[sha]).decode()
+                    self._json({"sha": sha, "content": content})
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+
+        return Handler
+
+
+def _manifest(name: str) -> bytes:
+    return RSRC_PATH.joinpath(name).read_bytes()
+
+
+@pytest.fixture
+def github():
+    files = {
+        "README.md": b"image tools",
+        "formats/ome-converter-tool/plugin.json": _manifest("omeconverter030.json"),
+        "utils/ome-converter-old/plugin.json": _manifest("omeconverter022.json"),
+        "plugin.json": _manifest("g1.json"),  # too shallow
+        "a/b/c/plugin.json": _manifest("g2.json"),  # too deep
+        "cookiecutter/plugin/plugin.json": _manifest("g3.json"),
+    }
+    fake = FakeGitHub(files)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def _scraper(github, tmp_path):
+    return ManifestScraper(
+        REPO,
+        auth="token",
+        cache_path=tmp_path / "cache.json",
+        api_url=github.url,
+        max_workers=4,
+    )
+
+
+def test_scrape(github, tmp_path):
+    """Test manifests are found in one tree request."""
+    valid, invalid = _scraper(github, tmp_path).scrape(2, 3)
+    names = sorted((m["name"], m["version"]) for m in valid + invalid)
+    assert names == [("OME Converter", "0.2.2"), ("OME Converter", "0.3.0")]
+    assert sum("/git/trees/" in r for r in github.requests) == 1
+    assert sum("/git/blobs/" in r for r in github.requests) == 2
+
+
+def test_scrape_unchanged(github, tmp_path):
+    """Test an unchanged repository is skipped with a conditional request."""
+    scraper = _scraper(github, tmp_path)
+    scraper.scrape(2, 3)
+    scraper.save()
+    github.requests.clear()
+    assert _scraper(github, tmp_path).scrape(2, 3) == ([], [])
+    assert all("/git/blobs/" not in r for r in github.requests)
+
+
+def test_scrape_modified(github, tmp_path):
+    """Test only modified manifests are downloaded again."""
+    scraper = _scraper(github, tmp_path)
+    scraper.scrape(2, 3)
+    scraper.save()
+    manifest = json.loads(_manifest("omeconverter030.json"))
+    manifest["description"] = "Modified"
+    github.files["formats/ome-converter-tool/plugin.json"] = json.dumps(
+        manifest,
+    ).encode()
+    github.requests.clear()
+    valid, invalid = _scraper(github, tmp_path).scrape(2, 3)
+    assert [m["description"] for m in valid + invalid] == ["Modified"]
+    assert sum("/git/blobs/" in r for r in github.requests) == 1
+
+
+def test_scrape_not_saved(github, tmp_path):
+    """Test manifests are scraped again if the cache was not saved."""
+    _scraper(github, tmp_path).scrape(2, 3)
+    valid, invalid = _scraper(github, tmp_path).scrape(2, 3)
+    assert len(valid + invalid) == 2
+
+
+def test_scrape_failed_blob(github, tmp_path):
+    """Test manifests that could not be fetched are fetched on the next run."""
+    failing = hashlib.sha1(_manifest("omeconverter022.json")).hexdigest()  # noqa: S324
+    github.failing.add(failing)
+    scraper = _scraper(github, tmp_path)
+    valid, invalid = scraper.scrape(2, 3)
+    assert [m["version"] for m in valid + invalid] == ["0.3.0"]
+    scraper.save()
+    github.failing.clear()
+    github.requests.clear()
+    valid, invalid = _scraper(github, tmp_path).scrape(2, 3)
+    assert [m["version"] for m in valid + invalid] == ["0.2.2"]
+    assert github.requests.count(f"/repos/{REPO}/git/blobs/{failing}") == 1
+    assert sum("/git/blobs/" in r for r in github.requests) == 1
+
+
+def test_scrape_retain(github, tmp_path):
+    """Test manifests of plugins missing locally are fetched again."""
+    scraper = _scraper(github, tmp_path)
+    scraper.scrape(2, 3)
+    scraper.save()
+    scraper = _scraper(github, tmp_path)
+    scraper.retain({("OmeConverter", "0.3.0")})
+    github.requests.clear()
+    valid, invalid = scraper.scrape(2, 3)
+    assert [m["version"] for m in valid + invalid] == ["0.2.2"]
+    assert sum("/git/blobs/" in r for r in github.requests) == 1
+
+
+def test_scrape_rejected(github, tmp_path):
+    """Test rejected manifests are kept by retain and not fetched again."""
+    scraper = _scraper(github, tmp_path)
+    valid, invalid = scraper.scrape(2, 3)
+    for manifest in valid + invalid:
+        if manifest["version"] == "0.2.2":
+            scraper.reject(manifest)
+    scraper.save()
+    scraper = _scraper(github, tmp_path)
+    scraper.retain({("OmeConverter", "0.3.0")})
+    github.requests.clear()
+    assert scraper.scrape(2, 3) == ([], [])
+    assert all("/git/blobs/" not in r for r in github.requests)
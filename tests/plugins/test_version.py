@@ -1,11 +1,19 @@
 """Test Version object and cast_version utility function."""
 
+import itertools
+import random
+
 import pytest
 from packaging.version import Version as PyPIVersion
 from pydantic import ValidationError
 
-from polus.tools.plugins._plugins.io import Version
-from polus.tools.plugins._plugins.io._io import _semver_to_pypi
+from polus.tools.plugins._plugins.io import (
+    SortedVersions,
+    Version,
+    VersionSpec,
+    cast_version,
+)
+from polus.tools.plugins._plugins.io._io import _semver_to_pypi, prerelease_lt
 
 GOOD_VERSIONS = [
     "1.2.3",
@@ -398,3 +406,124 @@ def test_ge(ver):
 def test_ge_str(ver):
     """Test less than or equal operator with strings."""
     assert ver >= "12.21.23-beta.12"
+
+
+PRERELEASES = [
+    "alpha",
+    "alpha.1",
+    "alpha.beta",
+    "beta",
+    "beta.2",
+    "beta.11",
+    "rc.1",
+    "1",
+    "2.a",
+    "a-b",
+    "11",
+]
+
+
+@pytest.mark.parametrize(
+    "pre",
+    list(itertools.permutations(PRERELEASES, 2)),
+    ids=["<".join(p) for p in itertools.permutations(PRERELEASES, 2)],
+)
+def test_sort_key_prerelease(pre):
+    """Test the sort key orders prereleases as prerelease_lt."""
+    ver1, ver2 = (Version(f"1.0.0-{p}") for p in pre)
+    assert (ver1 < ver2) == prerelease_lt(*pre)
+    assert (ver1 > ver2) == prerelease_lt(pre[1], pre[0])
+
+
+def test_cast_version():
+    """Test versions cast from strings are interned."""
+    ver = Version("1.2.3")
+    assert cast_version(ver) is ver
+    assert cast_version("1.2.3") is cast_version("1.2.3")
+    assert cast_version("1.2.3") == ver
+    with pytest.raises(ValidationError):
+        cast_version("1.2")
+
+
+def _random_versions(n):
+    rand = random.Random(0)
+    pres = [None, *PRERELEASES]
+    versions = []
+    for _ in range(n):
+        ver = f"{rand.randrange(20)}.{rand.randrange(20)}.{rand.randrange(20)}"
+        pre = rand.choice(pres)
+        versions.append(Version(ver if pre is None else f"{ver}-{pre}"))
+    return versions
+
+
+def test_sort_benchmark(benchmark):
+    """Benchmark sorting 100k versions."""
+    versions = _random_versions(100_000)
+    sorted_versions = benchmark(sorted, versions)
+    assert all(v1 <= v2 for v1, v2 in zip(sorted_versions, sorted_versions[1:]))
+    assert max(versions) == sorted_versions[-1]
+
+
+@pytest.mark.parametrize(
+    ("spec", "matching", "not_matching"),
+    [
+        ("1.2.3", ["1.2.3", "1.2.3+build"], ["1.2.4", "1.2.3-rc.1"]),
+        ("1.2", ["1.2.0", "1.2.9"], ["1.3.0", "1.1.9", "1.2.0-rc.1"]),
+        ("^1.2", ["1.2.0", "1.9.9"], ["2.0.0", "1.1.9", "2.0.0-rc.1"]),
+        ("^1.2.3", ["1.2.3", "1.3.0"], ["1.2.2", "2.0.0"]),
+        ("^0.2.3", ["0.2.3", "0.2.9"], ["0.3.0", "0.2.2"]),
+        ("^0.0.3", ["0.0.3"], ["0.0.4", "0.0.2"]),
+        ("^0", ["0.0.1", "0.9.9"], ["1.0.0"]),
+        ("~1.2.3", ["1.2.3", "1.2.9"], ["1.3.0", "1.2.2"]),
+        ("~1", ["1.0.0", "1.9.0"], ["2.0.0"]),
+        (">=1.2.0, <2", ["1.2.0", "1.99.0"], ["2.0.0", "1.1.0"]),
+        ("> 1.2 <= 2.0", ["1.3.0", "2.0.9"], ["1.2.9", "2.1.0"]),
+        (">1.2.3", ["1.2.4", "2.0.0"], ["1.2.3", "1.2.4-rc.1"]),
+        ("!=1.2.3", ["1.2.4", "1.2.2"], ["1.2.3"]),
+        (
+            ">=1.2.3-beta.2",
+            ["1.2.3-beta.11", "1.2.3", "1.3.0"],
+            ["1.2.3-beta.1", "1.3.0-rc.1"],
+        ),
+        ("1.x", ["1.0.0", "1.5.5"], ["2.0.0"]),
+        ("*", ["0.0.0", "99.0.0"], ["1.0.0-rc.1"]),
+    ],
+)
+def test_version_spec(spec, matching, not_matching):
+    """Test semver range specifiers."""
+    spec_ = VersionSpec(spec)
+    for ver in matching:
+        assert ver in spec_, ver
+    for ver in not_matching:
+        assert ver not in spec_, ver
+
+
+def test_version_spec_prerelease():
+    """Test prereleases match ranges when allowed."""
+    assert "2.0.0-rc.1" not in VersionSpec("^1.2", prerelease=True)
+    assert "1.3.0-rc.1" in VersionSpec("^1.2", prerelease=True)
+    assert "1.3.0-rc.1" not in VersionSpec("^1.2")
+
+
+@pytest.mark.parametrize("spec", ["1.2.3.4", "^a", ">=1.2-rc", "!=1.2", "~>1.2"])
+def test_version_spec_invalid(spec):
+    """Test invalid specifiers."""
+    with pytest.raises(ValueError):
+        VersionSpec(spec)
+
+
+def test_sorted_versions():
+    """Test sorted versions stay sorted and resolve ranges."""
+    versions = SortedVersions()
+    strings = ["1.0.0", "0.9.0", "1.2.0-rc.1", "1.1.0", "2.0.0", "1.2.0"]
+    for ver in strings:
+        versions.add(cast_version(ver))
+    versions.add(cast_version("1.1.0"))
+    assert list(versions) == sorted(cast_version(v) for v in strings)
+    assert versions.latest() == "2.0.0"
+    assert versions.resolve(VersionSpec("^1")) == "1.2.0"
+    versions.remove(cast_version("1.2.0"))
+    assert versions.resolve(VersionSpec("^1")) == "1.1.0"
+    assert versions.resolve(VersionSpec("^1", prerelease=True)) == "1.2.0-rc.1"
+    assert versions.resolve(VersionSpec("^3")) is None
+    assert len(versions) == 5
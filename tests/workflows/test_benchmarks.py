@@ -0,0 +1,55 @@
+"""Benchmarks of frequent workflow operations."""
+
+from pathlib import Path
+
+import pytest
+from polus.tools.workflows import CommandLineTool
+from polus.tools.workflows import StepBuilder
+from polus.tools.workflows import WorkflowBuilder
+from polus.tools.workflows.model import WorkflowStep
+
+STEP_COUNT = 1000
+
+
+@pytest.fixture()
+def steps(test_data_dir: Path) -> list[WorkflowStep]:
+    """Steps of a large workflow, not linked yet."""
+    clt = CommandLineTool.load(test_data_dir / "echo_string.cwl")
+    builder = StepBuilder()
+    return [builder(clt, id_=f"echo_{i}") for i in range(STEP_COUNT)]
+
+
+def _wire(steps: list[WorkflowStep]) -> None:
+    """Link the output of each step to the input of the next step."""
+    for previous, step in zip(steps, steps[1:]):
+        step.message = previous.message_string
+
+
+def test_wire_steps(benchmark, steps: list[WorkflowStep]) -> None:  # noqa: ANN001
+    """Benchmark linking the ios of a 1,000 steps workflow."""
+    benchmark(_wire, steps)
+    source = steps[-1]._inputs["message"].source
+    assert source == f"echo_{STEP_COUNT - 2}/message_string"
+
+
+def test_build_workflow(
+    benchmark,  # noqa: ANN001
+    test_data_dir: Path,
+    tmp_dir: Path,
+) -> None:
+    """Benchmark building a workflow of 200 chained steps."""
+    clt = CommandLineTool.load(test_data_dir / "copy_directory.cwl")
+    builder = StepBuilder()
+
+    def chained_steps() -> tuple:
+        steps = [builder(clt, id_=f"copy_{i}") for i in range(200)]
+        for previous, step in zip(steps, steps[1:]):
+            step.inpDir = previous.outDir
+        return (steps,), {}
+
+    wf = benchmark.pedantic(
+        lambda steps: WorkflowBuilder(workdir=tmp_dir)("wf_chain", steps),
+        setup=chained_steps,
+        rounds=3,
+    )
+    assert len(wf.inputs) == 201  # noqa: PLR2004
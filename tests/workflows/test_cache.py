@@ -0,0 +1,119 @@
+"""Tests for the cache of loaded cwl documents."""
+
+import os
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import cwl_utils.parser as cwl_parser
+import pytest
+
+from polus.tools.workflows import CommandLineTool
+from polus.tools.workflows import Process
+from polus.tools.workflows import save_all
+from polus.tools.workflows.cache import DocumentCache
+from polus.tools.workflows.cache import set_document_cache
+
+
+@pytest.fixture()
+def cache() -> Iterator[DocumentCache]:
+    """Use a new document cache during the test."""
+    cache = DocumentCache()
+    set_document_cache(cache)
+    yield cache
+    set_document_cache(None)
+
+
+@pytest.fixture()
+def parses(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Record the files parsed by the cwl parser."""
+    parsed = []
+    parse = Process._parse
+
+    def record(cwl_file: Path) -> dict:
+        parsed.append(cwl_file)
+        return parse.__func__(Process, cwl_file)
+
+    monkeypatch.setattr(Process, "_parse", record)
+    return parsed
+
+
+def test_load_once(cache: DocumentCache, parses: list, test_data_dir: Path) -> None:
+    """Test a file is parsed once and every load returns a new model."""
+    cwl_file = test_data_dir / "workflow3.cwl"
+    process1 = Process.load(cwl_file)
+    process2 = Process.load(cwl_file)
+    assert len(parses) == 1
+    assert process1 == process2
+    assert process1 is not process2
+    process1.steps.pop()
+    assert len(Process.load(cwl_file).steps) == len(process2.steps)
+    assert Process._load(cwl_file) == Process._load(cwl_file)
+    assert len(parses) == 1
+    assert cache.stats["documents"] == 1
+
+
+def test_load_modified(
+    cache: DocumentCache,
+    parses: list,
+    test_data_dir: Path,
+    tmp_dir: Path,
+) -> None:
+    """Test modified or invalidated files are parsed again."""
+    cwl_file = tmp_dir / "echo_string.cwl"
+    shutil.copy(test_data_dir / "echo_string.cwl", cwl_file)
+    Process.load(cwl_file)
+    with cwl_file.open("a", encoding="utf-8") as file:
+        file.write("\n# modified\n")
+    Process.load(cwl_file)
+    assert len(parses) == 2
+    assert cache.stats["documents"] == 1
+    cache.invalidate(cwl_file)
+    Process.load(cwl_file)
+    assert len(parses) == 3
+
+
+@pytest.mark.parametrize("save", ["save", "save_all"])
+def test_load_saved(
+    cache: DocumentCache,
+    test_data_dir: Path,
+    tmp_dir: Path,
+    save: str,
+) -> None:
+    """Test saved files are parsed again, even if their stat did not change."""
+    clt = CommandLineTool.load(test_data_dir / "echo_string.cwl")
+    cwl_file = clt.save(tmp_dir)
+    stat = cwl_file.stat()
+    assert Process.load(cwl_file).base_command == "echo"
+    clt.base_command = "ecko"
+    if save == "save":
+        clt.save(tmp_dir)
+    else:
+        save_all([clt], tmp_dir, max_workers=1)
+    os.utime(cwl_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cwl_file.stat().st_size == stat.st_size
+    assert Process.load(cwl_file).base_command == "ecko"
+
+
+def test_load_evicted(cache: DocumentCache, parses: list, test_data_dir: Path) -> None:
+    """Test least recently used files are evicted."""
+    cache.max_size = 1
+    Process.load(test_data_dir / "echo_string.cwl")
+    Process.load(test_data_dir / "touch_single.cwl")
+    Process.load(test_data_dir / "echo_string.cwl")
+    assert len(parses) == 3
+    assert cache.stats["documents"] == 1
+
+
+@pytest.mark.parametrize("filename", ["workflow3.cwl", "workflow3_inline.cwl"])
+def test_load_run_references(test_data_dir: Path, filename: str) -> None:
+    """Test step runs are the references of a document without relative uris."""
+    cwl_file = (test_data_dir / filename).resolve()
+    full_refs_cwl = cwl_parser.save(
+        cwl_parser.load_document_by_uri(cwl_file),
+        relative_uris=False,
+    )
+    yaml_cwl = Process._parse(cwl_file)
+    assert [step["run"] for step in yaml_cwl["steps"]] == [
+        step["run"] for step in full_refs_cwl["steps"]
+    ]
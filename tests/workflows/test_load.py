@@ -1,9 +1,14 @@
 """Test loading and parsing cwl files."""
 
-import pytest
+import shutil
 from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+import yaml
 
 from polus.tools.workflows import CommandLineTool, Workflow, Process
+from polus.tools.workflows.exceptions import CyclicProcessReferenceError
 from polus.tools.workflows.exceptions import UnsupportedCwlVersionError
 
 
@@ -80,3 +85,86 @@ def test_load_remote(test_data_dir: Path, filename: str) -> None:
     assert (
         clt._outputs["preview_json"].format_ == "https://edamontology.org/format_3464"
     )
+
+
+def _write_workflow(path: Path, runs: list[str]) -> Path:
+    """Write a workflow running a process per step, chaining a message."""
+    steps = {}
+    source = "msg"
+    for i, run in enumerate(runs):
+        steps[f"step{i}"] = {
+            "run": run,
+            "in": {"message": source},
+            "out": ["message_string"],
+        }
+        source = f"step{i}/message_string"
+    workflow = {
+        "cwlVersion": "v1.2",
+        "class": "Workflow",
+        "requirements": {"SubworkflowFeatureRequirement": {}},
+        "inputs": {"msg": "string"},
+        "outputs": {
+            "message_string": {"type": "string", "outputSource": source},
+        },
+        "steps": steps,
+    }
+    path.write_text(yaml.dump(workflow))
+    return path
+
+
+def test_recursive_load_shared(
+    test_data_dir: Path,
+    tmp_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test shared processes are loaded once, and contexts are deterministic."""
+    shutil.copy(test_data_dir / "echo_string.cwl", tmp_dir / "echo.cwl")
+    _write_workflow(tmp_dir / "sub1.cwl", ["echo.cwl", "echo.cwl"])
+    _write_workflow(tmp_dir / "sub2.cwl", ["echo.cwl", "sub1.cwl"])
+    root = _write_workflow(tmp_dir / "root.cwl", ["sub2.cwl", "sub1.cwl", "echo.cwl"])
+    loads = []
+    load_process = Process._load_process
+
+    def record(cwl_file: str) -> Process:
+        loads.append(cwl_file)
+        return load_process.__func__(Process, cwl_file)
+
+    monkeypatch.setattr(Process, "_load_process", record)
+    contexts = []
+    for max_workers in (1, 8):
+        loads.clear()
+        context = {}
+        Process.load(root, recursive=True, context=context, max_workers=max_workers)
+        contexts.append(list(context))
+        names = sorted(Path(urlparse(ref).path).name for ref in loads[1:])
+        assert names == ["echo.cwl", "sub1.cwl", "sub2.cwl"]
+    names = [Path(urlparse(id_).path).name for id_ in contexts[0]]
+    assert names == ["echo.cwl", "sub1.cwl", "sub2.cwl", "root.cwl"]
+    assert contexts[0] == contexts[1]
+
+
+def test_recursive_load_cycle(test_data_dir: Path, tmp_dir: Path) -> None:
+    """Test workflows referencing themselves are detected."""
+    shutil.copy(test_data_dir / "echo_string.cwl", tmp_dir / "echo.cwl")
+    _write_workflow(tmp_dir / "sub.cwl", ["echo.cwl", "root.cwl"])
+    root = _write_workflow(tmp_dir / "root.cwl", ["echo.cwl", "sub.cwl"])
+    with pytest.raises(CyclicProcessReferenceError, match="root.cwl -> .*sub.cwl"):
+        Process.load(root, recursive=True)
+
+
+def test_recursive_load_explicit_id(test_data_dir: Path, tmp_dir: Path) -> None:
+    """Test subworkflows with an `id` of their own are loaded recursively."""
+    shutil.copy(test_data_dir / "echo_string.cwl", tmp_dir / "echo.cwl")
+    sub = _write_workflow(tmp_dir / "sub.cwl", ["echo.cwl"])
+    sub.write_text(sub.read_text() + "id: mysub\n")
+    root = _write_workflow(tmp_dir / "root.cwl", ["sub.cwl"])
+    context = {}
+    Process.load(root, recursive=True, context=context)
+    names = [Path(urlparse(id_).path).name for id_ in context]
+    assert names == ["echo.cwl", "sub.cwl", "root.cwl"]
+    assert list(context)[1].endswith("#mysub")
+
+    _write_workflow(tmp_dir / "sub.cwl", ["echo.cwl", "root.cwl"])
+    sub.write_text(sub.read_text() + "id: mysub\n")
+    with pytest.raises(CyclicProcessReferenceError, match="root.cwl -> .*sub.cwl"):
+        Process.load(root, recursive=True)
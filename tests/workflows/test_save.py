@@ -4,7 +4,8 @@ import pytest
 from pathlib import Path
 import logging
 
-from polus.tools.workflows import CommandLineTool, Workflow
+from polus.tools.workflows import CommandLineTool, StepBuilder, Workflow
+from polus.tools.workflows import WorkflowBuilder, save_all
 from polus.tools.workflows.utils import configure_folders
 
 
@@ -34,3 +35,65 @@ def test_save_subworkflow(test_data_dir: Path, filename: str) -> None:
     cwl_file = test_data_dir / filename
     wf2 = Workflow.load(cwl_file)
     wf2.save(path=OUTPUT_DIR)
+
+
+def _built_workflows(test_data_dir: Path, workdir: Path, count: int) -> list[Workflow]:
+    """Build workflows of two chained steps, without saving them."""
+    clt = CommandLineTool.load(test_data_dir / "copy_directory.cwl")
+    builder = WorkflowBuilder(workdir=workdir, save=False)
+    workflows = []
+    for index in range(count):
+        steps = [StepBuilder()(clt, id_=f"copy{i}") for i in range(2)]
+        steps[1].inpDir = steps[0].outDir
+        workflows.append(builder(f"wf{index}", steps))
+    return workflows
+
+
+def test_build_without_saving(test_data_dir: Path, tmp_dir: Path) -> None:
+    """Test workflows can be built without writing files."""
+    workflows = _built_workflows(test_data_dir, tmp_dir, 2)
+    assert not list(tmp_dir.iterdir())
+    assert workflows[0].id_ == (tmp_dir / "wf0.cwl").resolve().as_uri()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_save_all(test_data_dir: Path, tmp_dir: Path, max_workers: int) -> None:
+    """Test saved files are the files of `save`, unchanged files are kept."""
+    workflows = _built_workflows(test_data_dir, tmp_dir, 20)
+    saved_dir = tmp_dir / "saved"
+    saved_dir.mkdir()
+    paths = save_all(workflows, tmp_dir, max_workers=max_workers)
+    assert paths == [tmp_dir / f"wf{index}.cwl" for index in range(20)]
+    for workflow, path in zip(workflows, paths):
+        assert workflow.save(saved_dir).read_bytes() == path.read_bytes()
+
+    mtime = paths[0].stat().st_mtime_ns
+    workflows[1].steps[0].id_ = "renamed"
+    save_all(workflows, tmp_dir, max_workers=max_workers)
+    assert paths[0].stat().st_mtime_ns == mtime
+    assert "renamed" in paths[1].read_text()
+    assert not list(tmp_dir.glob(".*.tmp"))
+
+
+def test_save_all_duplicates(test_data_dir: Path, tmp_dir: Path) -> None:
+    """Test processes saved to the same file are rejected."""
+    workflow = _built_workflows(test_data_dir, tmp_dir, 1)[0]
+    with pytest.raises(ValueError, match="wf0.cwl"):
+        save_all([workflow, workflow], tmp_dir)
+    assert not list(tmp_dir.iterdir())
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_save_all_write_error(
+    test_data_dir: Path,
+    tmp_dir: Path,
+    max_workers: int,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test write errors are raised and leave no temporary files."""
+    workflows = _built_workflows(test_data_dir, tmp_dir, 20)
+    tmp_dir.joinpath("wf5.cwl").mkdir()
+    with caplog.at_level(logging.WARNING), pytest.raises(OSError):
+        save_all(workflows, tmp_dir, max_workers=max_workers)
+    assert "Save pool failed" not in caplog.text
+    assert not list(tmp_dir.glob(".*.tmp"))
@@ -1,5 +1,6 @@
 """Test we can build a step from a cwl clt file."""
 
+import pickle
 from pathlib import Path
 
 import pytest
@@ -13,3 +14,24 @@ def test_step_builder(test_data_dir: Path, filename: str) -> None:
     cwl_file = test_data_dir / filename
     clt = CommandLineTool.load(cwl_file)
     StepBuilder()(clt)
+
+
+def test_step_io_indexes(test_data_dir: Path) -> None:
+    """Test the io indexes of a step follow the modifications of its ios."""
+    clt = CommandLineTool.load(test_data_dir / "echo_string.cwl")
+    step = StepBuilder()(clt)
+    assert list(step._inputs) == ["message"]
+    assert step._inputs is step._inputs
+    extra = step.in_.pop()
+    assert step._inputs == {}
+    with pytest.raises(AttributeError):
+        step.message = "hello"
+    step.in_.append(extra)
+    step.message = "hello"
+    assert extra.value == "hello"
+    step.out = []
+    assert step._outputs == {}
+    assert clt._inputs == {input_.id_: input_ for input_ in clt.inputs}
+    copy = pickle.loads(pickle.dumps(step))
+    assert copy == step
+    assert copy._inputs["message"] is copy.in_[0]
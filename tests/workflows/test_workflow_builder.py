@@ -121,3 +121,20 @@ def test_workflow_builder_with_subworkflows(
     config = step4.save_config(OUTPUT_DIR)
 
     run_cwl(OUTPUT_DIR / f"{main_wf.name}.cwl", config_file=config, cwd=STAGING_DIR)
+
+
+def test_workflow_builder_default_inputs(test_data_dir: Path, tmp_dir: Path) -> None:
+    """Test linked inputs that are also outputs get a default value."""
+    clt = CommandLineTool.load(test_data_dir / "copy_directory.cwl")
+    steps = [StepBuilder()(clt, id_=f"copy{i}") for i in range(3)]
+    steps[1].inpDir = steps[0].outDir
+    steps[2].inpDir = steps[0].outDir
+
+    consumers, multiple_sources = WorkflowBuilder.index_sources(steps)
+    assert consumers == {"copy0/outDir": [steps[1], steps[2]]}
+    assert not multiple_sources
+
+    wf = WorkflowBuilder(workdir=tmp_dir)("wf_copy", steps=steps)
+    default_values = [step._inputs["outDir"].value for step in wf.steps]
+    assert default_values == [Path("0__copy0__outDir"), None, None]
+    assert wf.requirements == []
@@ -6,7 +6,7 @@ from pathlib import Path
 
 import typer
 
-from polus.tools.plugins._plugins.manifests import validate_manifest
+from polus.tools.plugins._plugins.manifests import validate_manifests
 
 app = typer.Typer(help="Validate image tools manifests.")
 fhandler = logging.FileHandler("validate_manifests_image_tools.log")
@@ -31,7 +31,19 @@ def main(
         "--repo",
         "-r",
         help="Path to the image-tools repository.",
-    )
+    ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        "-w",
+        help="Number of validation processes (default: number of CPUs).",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        "-c",
+        help="Number of manifests sent to a validation process at once.",
+    ),
 ) -> None:
     """Validate image-tools manifests."""
     local_manifests = list(repo.rglob("*plugin.json"))
@@ -42,12 +54,16 @@ def main(
     n = len(local_manifests)
     n_bad = 0
     logger.info(f"Found {n} manifests in {repo}")
-    for manifest in local_manifests:
-        try:
-            validate_manifest(manifest)
-        except BaseException:
+    results = validate_manifests(
+        local_manifests,
+        max_workers=workers,
+        chunksize=chunksize,
+        keep_models=False,
+    )
+    for manifest, result in zip(local_manifests, results):
+        if not result.valid:
             n_bad += 1
-            logger.error(f"Invalid {manifest}: ", exc_info=True)
+            logger.error(f"Invalid {manifest}: {result.error}")
     logger.info(f"{n-n_bad}/{n} manifests are valid. See logs for more info.")
 
 
@@ -12,10 +12,9 @@ import logging
 from pathlib import Path
 
 import typer
-from ict import ICT, validate
-from tqdm import tqdm
 
-from polus.tools.conversions import wipp_to_ict
+from polus.tools.conversions import convert_manifests, find_manifests
+from polus.tools.conversions.bulk import ConversionStatus, conversion_counts
 
 app = typer.Typer(help="Convert WIPP manifests to ICT.")
 ict_logger = logging.getLogger("ict")
@@ -57,18 +56,28 @@ def main(
         "-n",
         help="Name of the plugin to convert.",
     ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        "-w",
+        help="Number of conversion processes (default: number of CPUs).",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Convert manifests even if their ICT is up to date.",
+    ),
+    summary: Path = typer.Option(
+        Path("ict_conversion.json"),
+        "--summary",
+        "-s",
+        help="Path of the json summary of the conversions.",
+    ),
 ) -> None:
     """Convert WIPP manifests to ICT."""
-    local_manifests = list(repo.rglob("*plugin.json"))
+    local_manifests = find_manifests(repo)
     logger.info(f"Found {len(local_manifests)} manifests in {repo}")
-    ignore_list = ["cookiecutter", ".env", "Shared-Memory-OpenMP"]
-    # Shared-Memory-OpenMP ignored for now until version
-    # and container are fixed in the manifest
-    local_manifests = [
-        x for x in local_manifests if not any(ig in str(x) for ig in ignore_list)
-    ]
-    problems = {}
-    converted = 0
     if not all_ and name is None:
         logger.error("Please provide a name if not converting all manifests.")
         raise typer.Abort
@@ -77,34 +86,31 @@ def main(
             logger.warning("Ignoring --all flag since a name was provided.")
         logger.info(f"name: {name}")
         all_ = False
+        local_manifests = [x for x in local_manifests if name in str(x)]
     logger.info(f"all: {all_}")
-    if all_:
-        n = len(local_manifests)
-        for manifest in tqdm(local_manifests):
-            try:
-                ict_ = wipp_to_ict(manifest, manifest.with_name("ict.yaml"))
-                # yaml_path = ict_.save_yaml(manifest.with_name("ict.yaml"))
-                validate(ict_[1])
-                converted += 1
-
-            except BaseException as e:
-                problems[Path(manifest).parts[4:-1]] = str(e)
-    if name is not None:
-        n = 1
-        for manifest in [x for x in local_manifests if name in str(x)]:
-            try:
-                ict_ = ICT.from_wipp(manifest)
-                yaml_path = ict_.save_yaml(manifest.with_name("ict.yaml"))
-                validate(yaml_path)
-                converted += 1
-
-            except BaseException as e:
-                problems[Path(manifest).parts[4:-1]] = str(e)
+    n = len(local_manifests)
+    conversions = convert_manifests(
+        local_manifests,
+        target="ict",
+        max_workers=workers,
+        force=force,
+        summary=summary,
+    )
+    counts = conversion_counts(conversions)
+    problems = {
+        Path(conv.manifest).parts[4:-1]: conv.error
+        for conv in conversions
+        if conv.status == ConversionStatus.FAILED
+    }
 
-    logger.info(f"Converted {converted}/{n} plugins")
+    logger.info(
+        f"Converted {counts['converted']}/{n} plugins, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} up to date"
+    )
     if len(problems) > 0:
         logger.error(f"Problems: {problems}")
         logger.info(f"There were {len(problems)} problems in {n} manifests.")
+    logger.info(f"Summary saved to {summary}")
 
 
 if __name__ == "__main__":